@@ -0,0 +1,470 @@
+"""
+Checks the solvers against each other and against exact enumeration on random small positions.
+
+Every position comes from a random layout of mines, under the standard or the knight neighbors,
+with an opening and a few more cells revealed and a few mines flagged. Each engine then reports
+the cells it concludes are safe and the ones it concludes are mines:
+
+- `legacy`: the rules of `src/solver.py`.
+- `legacy_enumeration`: the same with its enumeration of every component, which finds everything
+  the numbers decide on their own.
+- `rebuild_local`: the rebuild `Solver` without the number of mines.
+- `rebuild`: the rebuild `Solver`.
+- `exact_local` and `exact`: every placement of mines, without and with the number of mines.
+
+`EXPECTED` lists which engine has to conclude at least as much as which, so an unsound move shows
+up as an engine concluding more than the exact engine above it. A failing position is shrunk while
+it keeps failing the same way, and can be written out as a solver test.
+"""
+
+import argparse
+import json
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from functools import lru_cache
+from pathlib import Path
+from random import Random
+from time import perf_counter
+from types import ModuleType
+from typing import Callable
+
+from rebuild.interfaces.solver import KNIGHT_ADJACENCY, STANDARD_ADJACENCY, Solver
+
+Position = tuple[int, int]
+Conclusions = tuple[frozenset[Position], frozenset[Position]]  # safe, mines
+
+TOPOLOGIES = {
+    "standard": [(pos.r, pos.c) for pos in STANDARD_ADJACENCY],
+    "knight": [(pos.r, pos.c) for pos in KNIGHT_ADJACENCY],
+}
+ADJACENCY = {"standard": STANDARD_ADJACENCY, "knight": KNIGHT_ADJACENCY}
+# (weaker, stronger): everything the weaker engine concludes, the stronger one has to as well
+EXPECTED = [
+    ("legacy", "rebuild_local"),
+    ("legacy", "legacy_enumeration"),
+    ("rebuild_local", "rebuild"),
+    ("legacy_enumeration", "exact_local"),
+    ("exact_local", "legacy_enumeration"),
+    ("rebuild_local", "exact_local"),
+    ("rebuild", "exact"),
+    ("exact_local", "exact"),
+]
+MAX_FRONTIER = 16  # unknown cells next to a number the exact engines enumerate
+LEGACY_MAX_NODES = 1_000_000
+CHUNK_SIZE = 50  # positions per job
+
+
+class TooLarge(Exception):
+    """Raised when a position has too many frontier cells to enumerate."""
+
+
+@dataclass(frozen=True)
+class DiffConfig:
+    cases: int = 2000
+    min_size: tuple[int, int] = (4, 4)
+    max_size: tuple[int, int] = (7, 8)
+    density: tuple[float, float] = (0.12, 0.3)
+    knight_share: float = 0.3  # share of the positions using the knight neighbors
+    seed: int = 0
+    workers: int | None = None  # processes, None for one per CPU and 0 for this one only
+    minimize: bool = True
+
+
+@dataclass(frozen=True)
+class Case:
+    size: tuple[int, int]
+    topology: str
+    mines: frozenset[Position]
+    revealed: frozenset[Position]
+    flagged: frozenset[Position]
+
+    def neighbors(self, pos: Position):
+        r, c = pos
+        for dr, dc in TOPOLOGIES[self.topology]:
+            nr, nc = r + dr, c + dc
+            if 0 <= nr < self.size[0] and 0 <= nc < self.size[1]:
+                yield (nr, nc)
+
+    def value(self, pos: Position) -> int:
+        return sum(npos in self.mines for npos in self.neighbors(pos))
+
+    def cells(self):
+        return ((r, c) for r in range(self.size[0]) for c in range(self.size[1]))
+
+    def unknown(self) -> list[Position]:
+        return [pos for pos in self.cells() if pos not in self.revealed and pos not in self.flagged]
+
+    def mines_left(self) -> int:
+        return len(self.mines) - len(self.flagged)
+
+    def rows(self) -> list[str]:
+        return [
+            "".join(
+                (
+                    str(self.value((r, c)))
+                    if (r, c) in self.revealed
+                    else "F" if (r, c) in self.flagged else "."
+                )
+                for c in range(self.size[1])
+            )
+            for r in range(self.size[0])
+        ]
+
+    def to_json(self) -> dict:
+        return {
+            "topology": self.topology,
+            "mines left": self.mines_left(),
+            "rows": self.rows(),
+            "solution": [
+                "".join("F" if (r, c) in self.mines else "." for c in range(self.size[1]))
+                for r in range(self.size[0])
+            ],
+        }
+
+
+@dataclass(frozen=True)
+class Failure:
+    kind: str  # the two engines that disagreed, or the engine that raised
+    detail: str
+
+
+def opening(case: Case, click: Position) -> set[Position]:
+    revealed = {click}
+    to_check = [click]
+    while to_check:
+        pos = to_check.pop()
+        if case.value(pos) != 0:
+            continue
+        for npos in case.neighbors(pos):
+            if npos not in revealed:
+                revealed.add(npos)
+                to_check.append(npos)
+    return revealed
+
+
+def random_case(rng: Random, config: DiffConfig) -> Case:
+    size = (
+        rng.randint(config.min_size[0], config.max_size[0]),
+        rng.randint(config.min_size[1], config.max_size[1]),
+    )
+    topology = "knight" if rng.random() < config.knight_share else "standard"
+    cells = [(r, c) for r in range(size[0]) for c in range(size[1])]
+    num_mines = max(1, round(rng.uniform(*config.density) * len(cells)))
+    mines = frozenset(rng.sample(cells, num_mines))
+    case = Case(size, topology, mines, frozenset(), frozenset())
+    safe = [pos for pos in cells if pos not in mines]
+    revealed = opening(case, rng.choice(safe))
+    revealed.update(rng.sample(safe, min(len(safe), rng.randint(0, 3))))
+    flagged = rng.sample(sorted(mines), min(num_mines, rng.randint(0, 2)))
+    return replace(case, revealed=frozenset(revealed), flagged=frozenset(flagged))
+
+
+def legacy_module() -> ModuleType:
+    """Imports the legacy solver, which is run from inside `src` so has no package."""
+    src = str(Path(__file__).resolve().parents[1] / "src")
+    if src not in sys.path:
+        sys.path.insert(0, src)
+    import solver
+
+    return solver
+
+
+def run_legacy(case: Case, enumerate_components: bool) -> Conclusions:
+    legacy = legacy_module()
+    position = [[int(val) if val.isdigit() else val for val in row] for row in case.rows()]
+    grid = [
+        ["M" if (r, c) in case.mines else case.value((r, c)) for c in range(case.size[1])]
+        for r in range(case.size[0])
+    ]
+    solver = legacy.Solver(
+        case.mines_left(),
+        position,
+        legacy.bind_verifier(grid),
+        [list(offset) for offset in TOPOLOGIES[case.topology]],
+    )
+    max_nodes = LEGACY_MAX_NODES if enumerate_components else None
+    result = solver.solve(True, max_nodes=max_nodes)
+    if not result.complete:
+        raise TooLarge
+    return frozenset(result.revealed), frozenset(result.flagged)
+
+
+def run_rebuild(case: Case, use_global_constraint: bool) -> Conclusions:
+    text = f"{case.mines_left()}\n" + "\n".join(case.rows())
+    solver = Solver(text, None, adjacency=ADJACENCY[case.topology])
+    solver.use_global_constraint = use_global_constraint
+    solver.solve()
+    return (
+        frozenset((pos.r, pos.c) for pos in solver.field.revealed),
+        frozenset((pos.r, pos.c) for pos in solver.field.flagged),
+    )
+
+
+@lru_cache(maxsize=16)
+def frontier_layouts(case: Case) -> tuple[dict[Position, int], list[int]]:
+    """Returns the bit of every frontier cell, and every placement of mines on the frontier that
+    satisfies the numbers, tried one by one. Both exact engines use the same placements.
+    """
+    index = {
+        pos: i for i, pos in enumerate(pos for pos in case.unknown() if is_frontier(case, pos))
+    }
+    if len(index) > MAX_FRONTIER:
+        raise TooLarge
+    constraints = []
+    for pos in case.revealed:
+        mask = 0
+        val = case.value(pos)
+        for npos in case.neighbors(pos):
+            if npos in index:
+                mask |= 1 << index[npos]
+            elif npos in case.flagged:
+                val -= 1
+        constraints.append((mask, val))
+    layouts = [
+        layout
+        for layout in range(1 << len(index))
+        if all((layout & mask).bit_count() == val for mask, val in constraints)
+    ]
+    return index, layouts
+
+
+def run_exact(case: Case, use_mine_count: bool) -> Conclusions:
+    """Decides every unknown cell from the frontier placements, with the rest of the mines placed
+    off the frontier.
+    """
+    index, layouts = frontier_layouts(case)
+    unknown = case.unknown()
+    num_interior = len(unknown) - len(index)
+    mines_left = case.mines_left()
+
+    can_be_mine = can_be_safe = 0
+    interior_mine = interior_safe = found = False
+    for layout in layouts:
+        interior_mines = mines_left - layout.bit_count()
+        if use_mine_count:
+            if not 0 <= interior_mines <= num_interior:
+                continue
+            interior_mine |= interior_mines > 0
+            interior_safe |= interior_mines < num_interior
+        else:
+            interior_mine = interior_safe = True
+        found = True
+        can_be_mine |= layout
+        can_be_safe |= ~layout
+    if not found:
+        raise ValueError("No placement of mines fits the position")
+
+    safe, mines = set(), set()
+    for pos in unknown:
+        if pos in index:
+            is_mine, is_safe = can_be_mine >> index[pos] & 1, can_be_safe >> index[pos] & 1
+        else:
+            is_mine, is_safe = interior_mine, interior_safe
+        if not is_mine:
+            safe.add(pos)
+        elif not is_safe:
+            mines.add(pos)
+    return frozenset(safe), frozenset(mines)
+
+
+def is_frontier(case: Case, pos: Position) -> bool:
+    return any(npos in case.revealed for npos in case.neighbors(pos))
+
+
+ENGINES: dict[str, Callable[[Case], Conclusions]] = {
+    "legacy": lambda case: run_legacy(case, False),
+    "legacy_enumeration": lambda case: run_legacy(case, True),
+    "rebuild_local": lambda case: run_rebuild(case, False),
+    "rebuild": lambda case: run_rebuild(case, True),
+    "exact_local": lambda case: run_exact(case, False),
+    "exact": lambda case: run_exact(case, True),
+}
+
+
+def check(case: Case) -> list[Failure]:
+    """Runs every engine on `case` and returns the ways they failed. Raises `TooLarge` when the
+    position is too large for the exact engines, as there is then nothing to check against.
+    """
+    failures = []
+    results: dict[str, Conclusions | None] = {}
+    for name, engine in ENGINES.items():
+        try:
+            results[name] = engine(case)
+        except TooLarge:
+            if name.startswith("exact"):
+                raise
+            results[name] = None
+        except Exception as e:  # anything raised on a real position is a bug
+            failures.append(Failure(f"{name} raised", f"{type(e).__name__}: {e}"))
+            results[name] = None
+    for weaker, stronger in EXPECTED:
+        weak, strong = results[weaker], results[stronger]
+        if weak is None or strong is None:
+            continue
+        extra_safe, extra_mines = weak[0] - strong[0], weak[1] - strong[1]
+        if extra_safe or extra_mines:
+            failures.append(
+                Failure(
+                    f"{weaker} > {stronger}",
+                    f"safe {sorted(extra_safe)}, mines {sorted(extra_mines)}",
+                )
+            )
+    return failures
+
+
+def shrink_moves(case: Case):
+    """Yields every position one step simpler than `case`."""
+    rows, columns = case.size
+    for r0, r1, c0, c1 in [
+        (1, rows, 0, columns),
+        (0, rows - 1, 0, columns),
+        (0, rows, 1, columns),
+        (0, rows, 0, columns - 1),
+    ]:
+        if r1 - r0 < 1 or c1 - c0 < 1:
+            continue
+        mines, revealed, flagged = (
+            frozenset((r - r0, c - c0) for r, c in cells if r0 <= r < r1 and c0 <= c < c1)
+            for cells in (case.mines, case.revealed, case.flagged)
+        )
+        yield Case((r1 - r0, c1 - c0), case.topology, mines, revealed, flagged)
+    for pos in sorted(case.revealed):
+        yield replace(case, revealed=case.revealed - {pos})
+    for pos in sorted(case.flagged):
+        yield replace(case, flagged=case.flagged - {pos})
+    for pos in sorted(case.mines - case.flagged):
+        yield replace(case, mines=case.mines - {pos})
+
+
+def minimize(case: Case, kind: str) -> Case:
+    """Takes simpler positions for as long as one of them still fails with `kind`."""
+    shrunk = True
+    while shrunk:
+        shrunk = False
+        for candidate in shrink_moves(case):
+            try:
+                failures = check(candidate)
+            except TooLarge:
+                continue
+            if any(failure.kind == kind for failure in failures):
+                case = candidate
+                shrunk = True
+                break
+    return case
+
+
+@dataclass
+class Found:
+    seed: int
+    case: Case
+    failures: list[Failure]
+
+    def to_json(self) -> dict:
+        return {
+            "seed": self.seed,
+            "failures": [{"kind": f.kind, "detail": f.detail} for f in self.failures],
+            "case": self.case.to_json(),
+        }
+
+
+def run_chunk(seeds: range, config: DiffConfig) -> tuple[int, int, list[Found]]:
+    """Checks the positions of `seeds`. Returns the number checked, the number too large and the
+    failures found.
+    """
+    checked = too_large = 0
+    found = []
+    for seed in seeds:
+        case = random_case(Random(f"{config.seed}/{seed}"), config)
+        try:
+            failures = check(case)
+        except TooLarge:
+            too_large += 1
+            continue
+        checked += 1
+        if not failures:
+            continue
+        if config.minimize:
+            case = minimize(case, failures[0].kind)
+            failures = check(case)
+        found.append(Found(seed, case, failures))
+    return checked, too_large, found
+
+
+def run(config: DiffConfig) -> tuple[dict, list[Found]]:
+    """Returns a summary of the run, and the failures."""
+    start = perf_counter()
+    chunks = [
+        range(first, min(first + CHUNK_SIZE, config.cases))
+        for first in range(0, config.cases, CHUNK_SIZE)
+    ]
+    if config.workers == 0:
+        results = [run_chunk(chunk, config) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(config.workers) as pool:
+            results = list(pool.map(run_chunk, chunks, [config] * len(chunks)))
+    seconds = perf_counter() - start
+    checked = sum(result[0] for result in results)
+    found = [item for result in results for item in result[2]]
+    summary = {
+        "checked": checked,
+        "too large": sum(result[1] for result in results),
+        "failed": len(found),
+        "seconds": seconds,
+        "positions per second": checked / seconds,
+    }
+    return summary, found
+
+
+def write_solver_test(case: Case, path: Path) -> None:
+    """Writes a position as a pair of solver test files, expecting what exact enumeration finds."""
+    safe, mines = run_exact(case, True)
+    expected = [
+        "".join(
+            "R" if (r, c) in safe else "F" if (r, c) in mines else val for c, val in enumerate(row)
+        )
+        for r, row in enumerate(case.rows())
+    ]
+    path.with_suffix(".in").write_text(f"{case.mines_left()}\n" + "\n".join(case.rows()) + "\n")
+    path.with_suffix(".out").write_text("\n".join(expected) + "\n")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--cases", type=int, default=DiffConfig.cases)
+    parser.add_argument("--seed", type=int, default=DiffConfig.seed)
+    parser.add_argument("--knight-share", type=float, default=DiffConfig.knight_share)
+    parser.add_argument("--workers", type=int, help="processes, 0 to run in this one")
+    parser.add_argument("--no-minimize", action="store_true")
+    parser.add_argument("--output", help="where to write the JSON report")
+    parser.add_argument("--tests", help="directory to write the failures to as solver tests")
+    args = parser.parse_args()
+
+    config = DiffConfig(
+        args.cases,
+        seed=args.seed,
+        knight_share=args.knight_share,
+        workers=args.workers,
+        minimize=not args.no_minimize,
+    )
+    summary, found = run(config)
+    if args.output is not None:
+        report = {**summary, "failures": [item.to_json() for item in found]}
+        with open(args.output, "w") as f:
+            f.write(json.dumps(report, indent=4) + "\n")
+    if args.tests is not None:
+        # the solver tests only use the standard neighbors
+        for item in found:
+            if item.case.topology == "standard":
+                write_solver_test(item.case, Path(args.tests) / f"difftest {item.seed}")
+    print(
+        f"{summary['checked']} positions checked in {summary['seconds']:.2f}s "
+        f"({summary['positions per second']:.0f}/s), {summary['too large']} too large, "
+        f"{summary['failed']} failed"
+    )
+    for item in found[:10]:
+        print(json.dumps(item.to_json()))
+
+
+if __name__ == "__main__":
+    main()
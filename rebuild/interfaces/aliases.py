@@ -8,3 +8,9 @@ Flagged = Literal["F"]
 
 MineFieldValue = int | Mine
 SolvingFieldValue = int | Revealed | Unknown | Flagged
+
+# cells are stored as one byte each, numbers as themselves
+MINE_CODE = 9
+UNKNOWN_CODE = 9
+FLAGGED_CODE = 10
+REVEALED_CODE = 11
@@ -0,0 +1,25 @@
+"""
+The bitmask constraints of `src/bitsets.py`, for the rebuild solvers.
+
+The legacy game is run from inside `src` and cannot import the rebuild package, so the module
+lives there and is imported here through `src` on the path, the way `rebuild.difftest` imports the
+legacy solver. A cell is anything hashable, so the rebuild uses a `Pos` for it.
+"""
+
+import sys
+from pathlib import Path
+
+_SRC = str(Path(__file__).resolve().parents[2] / "src")
+if _SRC not in sys.path:
+    # appended, so the legacy modules never shadow anything else
+    sys.path.append(_SRC)
+
+from bitsets import (  # noqa: E402, F401
+    Cell,
+    Frontier,
+    MaskDict,
+    SetDict,
+    basic_logic,
+    check_squeezes,
+    check_subsets,
+)
@@ -0,0 +1,127 @@
+"""
+Deductions that need any number of constraints combined, found by row reducing the linear system
+the constraints form, one connected component of the frontier at a time.
+
+Every row is kept with integer coefficients, dividing out their greatest common divisor after each
+step, so the arithmetic is exact without `Fraction`. The constraints on a frontier only overlap
+their neighbors, so with the cells in board order the rows stay sparse and most of the cubic worst
+case is never reached.
+"""
+
+from math import gcd
+
+from rebuild.interfaces.position import Pos
+
+SetDict = dict[frozenset[Pos], int]
+Row = dict[int, int]  # column -> nonzero coefficient
+
+
+def components(sets: SetDict) -> list[list[frozenset[Pos]]]:
+    """Groups the constraints that share cells, directly or through other constraints."""
+    parent: dict[Pos, Pos] = {}
+
+    def find(pos: Pos) -> Pos:
+        root = pos
+        while parent[root] != root:
+            root = parent[root]
+        while parent[pos] != root:
+            parent[pos], pos = root, parent[pos]
+        return root
+
+    for s in sets:
+        first, *rest = s
+        parent.setdefault(first, first)
+        for pos in rest:
+            parent.setdefault(pos, pos)
+            parent[find(pos)] = find(first)
+
+    groups: dict[Pos, list[frozenset[Pos]]] = {}
+    for s in sets:
+        groups.setdefault(find(next(iter(s))), []).append(s)
+    return list(groups.values())
+
+
+def normalized(row: Row, rhs: int) -> tuple[Row, int]:
+    divisor = gcd(rhs, *row.values())
+    if next(iter(row.values())) < 0:
+        divisor = -divisor
+    if divisor == 1:
+        return row, rhs
+    return {column: coefficient // divisor for column, coefficient in row.items()}, rhs // divisor
+
+
+def row_reduce(rows: list[tuple[Row, int]]) -> list[tuple[Row, int]]:
+    """Brings the rows to reduced row echelon form, up to scaling every row by an integer."""
+    reduced: list[tuple[Row, int]] = []
+    pivots: list[int] = []
+    for row, rhs in rows:
+        row = dict(row)
+        # eliminate the pivots found so far from the new row
+        for (pivot_row, pivot_rhs), pivot in zip(reduced, pivots):
+            row, rhs = subtract(row, rhs, pivot_row, pivot_rhs, pivot)
+        if not row:
+            if rhs:
+                raise ValueError("Sets/values are malformed")
+            continue
+        row, rhs = normalized(row, rhs)
+        pivot = min(row)
+        # and the new pivot from the rows found so far
+        for i, (other_row, other_rhs) in enumerate(reduced):
+            reduced[i] = subtract(other_row, other_rhs, row, rhs, pivot)
+        reduced.append((row, rhs))
+        pivots.append(pivot)
+    return reduced
+
+
+def subtract(row: Row, rhs: int, pivot_row: Row, pivot_rhs: int, pivot: int) -> tuple[Row, int]:
+    """Returns `row` with a multiple of `pivot_row` subtracted, so it is zero at `pivot`."""
+    factor = row.get(pivot)
+    if factor is None:
+        return row, rhs
+    scale = pivot_row[pivot]
+    result = {column: coefficient * scale for column, coefficient in row.items()}
+    for column, coefficient in pivot_row.items():
+        value = result.get(column, 0) - coefficient * factor
+        if value:
+            result[column] = value
+        else:
+            result.pop(column, None)
+    rhs = rhs * scale - pivot_rhs * factor
+    if not result:
+        return result, rhs
+    return normalized(result, rhs)
+
+
+def bound_deductions(row: Row, rhs: int) -> tuple[list[int], list[int]]:
+    """With every cell either 0 or 1, a row whose sum is at its lowest or highest possible value
+    fixes every cell in it. Returns the columns that are safe and the ones that are mines.
+    """
+    low = sum(coefficient for coefficient in row.values() if coefficient < 0)
+    high = sum(coefficient for coefficient in row.values() if coefficient > 0)
+    if rhs < low or rhs > high:
+        raise ValueError("Sets/values are malformed")
+    positive = [column for column, coefficient in row.items() if coefficient > 0]
+    negative = [column for column, coefficient in row.items() if coefficient < 0]
+    if rhs == low:
+        return positive, negative
+    if rhs == high:
+        return negative, positive
+    return [], []
+
+
+def eliminate(sets: SetDict) -> tuple[set[Pos], set[Pos]]:
+    """Returns the cells that are safe and the ones that are mines in every solution of `sets`."""
+    safe: set[Pos] = set()
+    mines: set[Pos] = set()
+    for component in components(sets):
+        cells = sorted(set().union(*component), key=lambda pos: (pos.r, pos.c))
+        column_of = {pos: column for column, pos in enumerate(cells)}
+        rows = [({column_of[pos]: 1 for pos in s}, sets[s]) for s in component]
+        rows.sort(key=lambda item: min(item[0]))
+        for row, rhs in row_reduce(rows):
+            safe_columns, mine_columns = bound_deductions(row, rhs)
+            safe.update(cells[column] for column in safe_columns)
+            mines.update(cells[column] for column in mine_columns)
+    if safe & mines:
+        raise ValueError("Sets/values are malformed")
+    return safe, mines
@@ -0,0 +1,147 @@
+"""
+The frontier of a position as a 0/1 matrix of constraints by frontier cells, built and reasoned
+about with array operations instead of one `frozenset` per constraint.
+
+NumPy is an optional dependency, only needed by solvers created with `matrix=True`.
+"""
+
+from collections.abc import Iterable
+
+import numpy as np
+
+from rebuild.interfaces.aliases import FLAGGED_CODE, UNKNOWN_CODE
+from rebuild.interfaces.position import Pos
+from rebuild.interfaces.solving_field import SolvingField
+
+SetDict = dict[frozenset[Pos], int]
+Offsets = Iterable[tuple[int, int]]
+
+
+class FrontierMatrix:
+    """Row `i` says that the frontier cells at the nonzero columns of row `i` hold `rhs[i]` mines.
+
+    The matrix is sparse and kept as the coordinates of its nonzero entries, `entry_rows` and
+    `entry_columns`. Column `j` is the cell `cells[j]`, and row `i` comes from the number at
+    `constraint_cells[i]`.
+    """
+
+    def __init__(
+        self,
+        entry_rows: np.ndarray,
+        entry_columns: np.ndarray,
+        rhs: np.ndarray,
+        cells: np.ndarray,
+        constraint_cells: np.ndarray,
+    ) -> None:
+        self.entry_rows = entry_rows
+        self.entry_columns = entry_columns
+        self.rhs = rhs
+        self.cells = cells
+        self.constraint_cells = constraint_cells
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return len(self.rhs), len(self.cells)
+
+    def dense(self) -> np.ndarray:
+        # floats, as only those products go through BLAS, and every count is exact in a float32
+        matrix = np.zeros(self.shape, dtype=np.float32)
+        matrix[self.entry_rows, self.entry_columns] = 1
+        return matrix
+
+    def to_sets(self) -> SetDict:
+        """The same constraints in the form `Solver.get_sets` builds them."""
+        cells = [Pos(int(r), int(c)) for r, c in self.cells]
+        members: list[set[Pos]] = [set() for _ in range(len(self.rhs))]
+        for row, column in zip(self.entry_rows.tolist(), self.entry_columns.tolist()):
+            members[row].add(cells[column])
+        return {frozenset(group): int(val) for group, val in zip(members, self.rhs)}
+
+
+def field_codes(field: SolvingField) -> np.ndarray:
+    return np.frombuffer(field.to_bytes(), dtype=np.uint8).reshape(field.size)
+
+
+def shifted(mask: np.ndarray, dr: int, dc: int) -> np.ndarray:
+    """Returns `out` with `out[r, c] == mask[r + dr, c + dc]`, which is False off the board."""
+    rows, columns = mask.shape
+    out = np.zeros_like(mask)
+    out[max(0, -dr) : rows - max(0, dr), max(0, -dc) : columns - max(0, dc)] = mask[
+        max(0, dr) : rows - max(0, -dr), max(0, dc) : columns - max(0, -dc)
+    ]
+    return out
+
+
+def build_frontier_matrix(field: SolvingField, offsets: Offsets) -> FrontierMatrix:
+    """Builds the constraint of every number bordering an unknown cell, one neighbor offset at a
+    time across the whole board.
+    """
+    offsets = list(offsets)
+    codes = field_codes(field)
+    unknown = codes == UNKNOWN_CODE
+    numbers = codes < UNKNOWN_CODE
+    unknown_neighbors = np.zeros(codes.shape, dtype=np.int32)
+    flagged_neighbors = np.zeros(codes.shape, dtype=np.int32)
+    for dr, dc in offsets:
+        unknown_neighbors += shifted(unknown, dr, dc)
+        flagged_neighbors += shifted(codes == FLAGGED_CODE, dr, dc)
+
+    bordering = numbers & (unknown_neighbors > 0)
+    constraint_r, constraint_c = np.nonzero(bordering)
+    rhs = codes[constraint_r, constraint_c].astype(np.int32) - flagged_neighbors[bordering]
+    if (rhs < 0).any():
+        raise ValueError("Negative mine count detected")
+
+    frontier = np.zeros(codes.shape, dtype=bool)
+    for dr, dc in offsets:
+        frontier |= shifted(bordering, -dr, -dc)
+    frontier &= unknown
+    cell_r, cell_c = np.nonzero(frontier)
+    index = np.full(codes.shape, -1, dtype=np.int64)
+    index[cell_r, cell_c] = np.arange(len(cell_r))
+
+    entry_rows, entry_columns = [], []
+    for dr, dc in offsets:
+        nr, nc = constraint_r + dr, constraint_c + dc
+        on_board = (nr >= 0) & (nr < codes.shape[0]) & (nc >= 0) & (nc < codes.shape[1])
+        rows = np.nonzero(on_board)[0]
+        rows = rows[unknown[nr[rows], nc[rows]]]
+        entry_rows.append(rows)
+        entry_columns.append(index[nr[rows], nc[rows]])
+    return FrontierMatrix(
+        np.concatenate(entry_rows) if entry_rows else np.zeros(0, dtype=np.int64),
+        np.concatenate(entry_columns) if entry_columns else np.zeros(0, dtype=np.int64),
+        rhs,
+        np.stack([cell_r, cell_c], axis=1),
+        np.stack([constraint_r, constraint_c], axis=1),
+    )
+
+
+def matrix_deductions(matrix: FrontierMatrix) -> tuple[list[Pos], list[Pos]]:
+    """Returns the frontier cells that are safe and the ones that are mines.
+
+    Besides the constraints that are decisive on their own, every ordered pair of overlapping
+    constraints is checked at once. When `rhs[i] - rhs[j]` equals the number of cells of `i` that
+    are not in `j`, all of those are mines and all the cells of `j` that are not in `i` are safe.
+    With `i` a subset of `j` that is the subset rule, and otherwise it is the 1-2 pattern.
+    """
+    if matrix.shape[0] == 0:
+        return [], []
+    a = matrix.dense()
+    rhs = matrix.rhs
+    sizes = a.sum(axis=1)
+    overlaps = a @ a.T
+    pairs = ((rhs[:, None] - rhs[None, :]) == (sizes[:, None] - overlaps)) & (overlaps > 0)
+    np.fill_diagonal(pairs, False)
+    pairs = pairs.astype(np.float32)
+    outside = 1 - a
+    # cell c of row i is a mine when some pair (i, j) holds and c is not in j
+    mines = (a * (pairs @ outside) > 0).any(axis=0)
+    # cell c of row j is safe when some pair (i, j) holds and c is not in i
+    safe = (a * (pairs.T @ outside) > 0).any(axis=0)
+    mines |= a[rhs == sizes].any(axis=0)
+    safe |= a[rhs == 0].any(axis=0)
+    if (mines & safe).any():
+        raise ValueError("Sets/values are malformed")
+    to_pos = lambda mask: [Pos(int(r), int(c)) for r, c in matrix.cells[mask]]
+    return to_pos(safe), to_pos(mines)
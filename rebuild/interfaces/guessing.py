@@ -0,0 +1,300 @@
+"""
+Picks the cell to reveal once the solver is stuck, and measures how often that wins games.
+
+Every unknown cell gets its exact chance of being a mine from `probability`. The cells within
+`tolerance` of the safest are then looked at more closely, by revealing every number they could
+show, weighted by the number of layouts that show it. The strategies:
+
+- `SAFEST` takes the cell most likely to be safe.
+- `PROGRESS` takes the cell most likely to both be safe and let the solver go on, looking up to
+  `depth` guesses ahead when a number leaves the solver stuck.
+- `INFORMATION` takes the cell whose number is the hardest to predict, weighted by its safety.
+
+Positions are the rows of the solver tests along with the mines left among the unknown cells, so
+they can be memoized. Worker processes are given the position in shared memory instead, once for
+all the candidates.
+"""
+
+import argparse
+import random
+from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from enum import Enum
+from functools import lru_cache
+from itertools import repeat
+from math import log2
+from time import perf_counter
+
+from rebuild.interfaces.minefield import MineField
+from rebuild.interfaces.position import Pos
+from rebuild.interfaces.probability import (
+    MAX_NODES,
+    BudgetExceeded,
+    Probabilities,
+    position_probabilities,
+)
+from rebuild.interfaces.shared_board import BoardHandle, SharedBoard, read_rows
+from rebuild.interfaces.solver import STANDARD_ADJACENCY, Solver
+
+Rows = tuple[str, ...]
+
+EXPERT_SIZE = (16, 30)
+EXPERT_MINES = 99
+
+
+class Strategy(Enum):
+    SAFEST = "safest"
+    PROGRESS = "progress"
+    INFORMATION = "information"
+
+
+@dataclass(frozen=True)
+class GuessConfig:
+    strategy: Strategy = Strategy.PROGRESS
+    depth: int = 1  # guesses looked ahead by `PROGRESS`
+    candidates: int = 8  # cells looked at beyond their probabilities
+    tolerance: float = 0.05  # how much less safe than the safest cell a candidate can be
+    max_nodes: int = MAX_NODES // 10  # placements counted per component of a position
+    workers: int = 0  # processes evaluating the candidates, 0 to evaluate them in this one
+
+
+def solver_for(rows: Rows, num_mines: int) -> Solver:
+    return Solver(f"{num_mines}\n" + "\n".join(rows), None)
+
+
+def probabilities(rows: Rows, num_mines: int, max_nodes: int = MAX_NODES) -> Probabilities:
+    solver = solver_for(rows, num_mines)
+    return position_probabilities(solver.frontier_sets(), solver.num_unknowns, num_mines, max_nodes)
+
+
+def unknown_cells(rows: Rows) -> list[Pos]:
+    return [Pos(r, c) for r, row in enumerate(rows) for c, val in enumerate(row) if val == "."]
+
+
+def neighbors(rows: Rows, pos: Pos) -> Iterable[Pos]:
+    for d_pos in STANDARD_ADJACENCY:
+        r, c = pos.r + d_pos.r, pos.c + d_pos.c
+        if 0 <= r < len(rows) and 0 <= c < len(rows[0]):
+            yield Pos(r, c)
+
+
+def with_value(rows: Rows, pos: Pos, value: int | str) -> Rows:
+    row = rows[pos.r]
+    return rows[: pos.r] + (row[: pos.c] + str(value) + row[pos.c + 1 :],) + rows[pos.r + 1 :]
+
+
+def outcomes(rows: Rows, num_mines: int, pos: Pos, max_nodes: int) -> dict[int, float]:
+    """Returns the chance of every number `pos` can show, given that it is safe."""
+    around = [rows[npos.r][npos.c] for npos in neighbors(rows, pos)]
+    weights = {}
+    for value in range(around.count("F"), around.count("F") + around.count(".") + 1):
+        try:
+            weights[value] = probabilities(
+                with_value(rows, pos, value), num_mines, max_nodes
+            ).weight
+        except ValueError:  # no layout shows that number
+            continue
+    total = sum(weights.values())
+    return {value: weight / total for value, weight in weights.items() if weight}
+
+
+def after_deductions(rows: Rows, num_mines: int) -> tuple[Rows, int, bool]:
+    """Runs the solver on a position. Returns the position it leaves, in which the cells it
+    revealed have no number yet, and whether it found anything.
+    """
+    solver = solver_for(rows, num_mines)
+    solver.solve()
+    found = bool(solver.field.revealed or solver.field.flagged)
+    new_rows = tuple("".join(map(str, row)) for row in solver.field.rows())
+    return new_rows, solver.num_mines, found
+
+
+@lru_cache(maxsize=65536)
+def evaluate(rows: Rows, num_mines: int, pos: Pos, config: GuessConfig) -> float:
+    """Scores revealing `pos`, higher being better."""
+    try:
+        safe = 1 - probabilities(rows, num_mines, config.max_nodes).of(pos)
+        if config.strategy is Strategy.SAFEST or safe == 0:
+            return safe
+        dist = outcomes(rows, num_mines, pos, config.max_nodes)
+        if config.strategy is Strategy.INFORMATION:
+            return safe * -sum(p * log2(p) for p in dist.values())
+        score = 0.0
+        for value, chance in dist.items():
+            new_rows, new_mines, found = after_deductions(with_value(rows, pos, value), num_mines)
+            if found:
+                score += chance
+            elif config.depth > 1 and "." in "".join(new_rows):
+                deeper = replace(config, depth=config.depth - 1)
+                score += chance * best_score(new_rows, new_mines, deeper)
+        return safe * score
+    except BudgetExceeded:
+        return 0.0
+
+
+def best_score(rows: Rows, num_mines: int, config: GuessConfig) -> float:
+    probs = probabilities(rows, num_mines, config.max_nodes)
+    return max(evaluate(rows, num_mines, pos, config) for pos in candidates(rows, probs, config))
+
+
+def evaluate_shared(handle: BoardHandle, pos: Pos, config: GuessConfig) -> float:
+    rows = read_rows(handle)
+    Pos.set_bounds(*handle.size)
+    return evaluate(rows, handle.num_mines, pos, config)
+
+
+def candidates(rows: Rows, probs: Probabilities, config: GuessConfig) -> list[Pos]:
+    """The cells worth a closer look: the safest ones, with the cells off the frontier, which
+    are all equally likely to be mines, represented by the ones with the fewest unknown neighbors.
+    """
+    interior = [pos for pos in unknown_cells(rows) if pos not in probs.frontier]
+    interior.sort(key=lambda pos: sum(rows[n.r][n.c] == "." for n in neighbors(rows, pos)))
+    cells = list(probs.frontier) + interior[:2]
+    safest = min(probs.of(pos) for pos in cells)
+    cells = [pos for pos in cells if probs.of(pos) <= safest + config.tolerance]
+    cells.sort(key=lambda pos: (probs.of(pos), pos.r, pos.c))
+    return cells[: config.candidates]
+
+
+def approximate_probabilities(rows: Rows, num_mines: int) -> Probabilities:
+    """Used when a position has too many layouts to count: every frontier cell takes the highest
+    density of the constraints it is in, and the other cells share the mines left.
+    """
+    solver = solver_for(rows, num_mines)
+    frontier: dict[Pos, float] = {}
+    for s, val in solver.frontier_sets().items():
+        for pos in s:
+            frontier[pos] = max(frontier.get(pos, 0.0), val / len(s))
+    num_interior = solver.num_unknowns - len(frontier)
+    left = max(0.0, num_mines - sum(frontier.values()))
+    interior = min(1.0, left / num_interior) if num_interior else 0.0
+    return Probabilities(frontier, interior, num_interior, 0)
+
+
+class GuessEngine:
+    def __init__(self, config: GuessConfig = GuessConfig()) -> None:
+        self.config = config
+        self.pool = ProcessPoolExecutor(config.workers) if config.workers else None
+
+    def choose(self, rows: Iterable[str], num_mines: int) -> Pos:
+        """Returns the cell to reveal, given the mines left among the unknown cells."""
+        rows = tuple(rows)
+        try:
+            probs = probabilities(rows, num_mines, self.config.max_nodes)
+        except BudgetExceeded:
+            probs = approximate_probabilities(rows, num_mines)
+        cells = candidates(rows, probs, self.config)
+        if probs.of(cells[0]) == 0 or len(cells) == 1:
+            return cells[0]
+        if self.pool is not None:
+            with SharedBoard.from_rows(rows, num_mines) as board:
+                handles = [board.handle] * len(cells)
+                scores = list(self.pool.map(evaluate_shared, handles, cells, repeat(self.config)))
+        else:
+            scores = [evaluate(rows, num_mines, pos, self.config) for pos in cells]
+        # ties go to the safer cell, which comes first
+        best = max(range(len(cells)), key=lambda i: (scores[i], -i))
+        return cells[best]
+
+    def close(self) -> None:
+        if self.pool is not None:
+            self.pool.shutdown()
+
+    def __enter__(self) -> "GuessEngine":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+def view(mine_field: MineField) -> Rows:
+    rows, columns = mine_field.size
+    return tuple(
+        "".join(
+            (
+                str(mine_field.get_value(pos))
+                if mine_field.is_revealed(pos := Pos(r, c))
+                else "F" if mine_field.is_flagged(pos) else "."
+            )
+            for c in range(columns)
+        )
+        for r in range(rows)
+    )
+
+
+def play_game(
+    size: tuple[int, int], num_mines: int, engine: GuessEngine, seed: object
+) -> tuple[bool, int]:
+    """Plays a game from a click in the middle. Returns whether it was won and the guesses made."""
+    mine_field = MineField(size, num_mines)
+    random.seed(seed)
+    mine_field.generate(Pos(size[0] // 2, size[1] // 2))
+    num_safe = size[0] * size[1] - num_mines
+    guesses = 0
+    while mine_field.num_revealed() < num_safe:
+        rows = view(mine_field)
+        mines_left = num_mines - sum(row.count("F") for row in rows)
+        solver = solver_for(rows, mines_left)
+        solver.solve()
+        if solver.field.revealed or solver.field.flagged:
+            for pos in solver.field.flagged:
+                mine_field.flag(pos)
+            mine_field.mark_all_revealed(solver.field.revealed)
+            continue
+        pos = engine.choose(rows, mines_left)
+        guesses += 1
+        mine_field.mark_all_revealed([pos])
+        if mine_field.get_value(pos) == "M":
+            return False, guesses
+    return True, guesses
+
+
+def win_rate(
+    games: int,
+    size: tuple[int, int] = EXPERT_SIZE,
+    num_mines: int = EXPERT_MINES,
+    config: GuessConfig = GuessConfig(),
+    seed: int = 0,
+) -> dict[str, float]:
+    start = perf_counter()
+    won = guesses = 0
+    with GuessEngine(config) as engine:
+        for game in range(games):
+            game_won, game_guesses = play_game(size, num_mines, engine, f"{seed}/{game}")
+            won += game_won
+            guesses += game_guesses
+    return {
+        "games": games,
+        "won": won,
+        "win rate": won / games,
+        "guesses per game": guesses / games,
+        "seconds": perf_counter() - start,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measures the win rate of a guessing strategy.")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--size", type=int, nargs=2, default=EXPERT_SIZE)
+    parser.add_argument("--mines", type=int, default=EXPERT_MINES)
+    parser.add_argument("--strategy", choices=[s.value for s in Strategy], default="progress")
+    parser.add_argument("--depth", type=int, default=GuessConfig.depth)
+    parser.add_argument("--candidates", type=int, default=GuessConfig.candidates)
+    parser.add_argument("--tolerance", type=float, default=GuessConfig.tolerance)
+    parser.add_argument("--workers", type=int, default=GuessConfig.workers)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    config = GuessConfig(
+        Strategy(args.strategy),
+        args.depth,
+        args.candidates,
+        args.tolerance,
+        workers=args.workers,
+    )
+    report = win_rate(args.games, tuple(args.size), args.mines, config, args.seed)  # type: ignore
+    print(", ".join(f"{key}: {value:.3f}" for key, value in report.items()))
+
+
+if __name__ == "__main__":
+    main()
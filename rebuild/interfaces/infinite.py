@@ -0,0 +1,263 @@
+import os
+from collections import OrderedDict
+from collections.abc import Generator, Iterable
+from hashlib import blake2b
+from random import Random
+
+from rebuild.interfaces.aliases import *
+from rebuild.interfaces.minefield import MineField
+from rebuild.interfaces.position import Pos
+from rebuild.interfaces.solver import Solver
+from rebuild.settings import ADJACENCY, CENTER_DISPERSAL_RADIUS
+
+CHUNK_SIZE = 32
+MAX_CHUNKS = 1024  # chunks kept in memory before the least recently used are spilled to disk
+MAX_WINDOWS = 64  # windows solved by a single call to `solve_frontier`
+DENSITY = 0.2
+# below this density the regions of zeros are likely to be infinite, so a single click could
+# flood forever
+MIN_DENSITY = 0.1
+
+HIDDEN = 0
+REVEALED = 1
+FLAGGED = 2
+
+# how far the neighbors of a cell can be from it
+REACH = max(max(abs(dr), abs(dc)) for dr, dc in ADJACENCY)
+
+
+class Chunk:
+    """The mines of a square of cells along with what the player knows about them."""
+
+    def __init__(self, mines: bytearray, state: bytearray) -> None:
+        self.mines = mines
+        self.state = state
+
+    def is_touched(self) -> bool:
+        """Whether the player changed anything, which is the only part that has to be saved."""
+        return self.state.count(HIDDEN) != len(self.state)
+
+
+class InfiniteMineField:
+    """A minefield without edges, starting from a safe opening around `Pos(0, 0)`.
+
+    The mines of a chunk are generated from a hash of the world seed and the chunk coordinate the
+    first time it is touched, so every chunk can be regenerated at any point. Only the state of the
+    cells has to be kept, and the least recently used chunks are dropped from memory once there are
+    more than `max_chunks`, with the state of the touched ones spilled to `spill_dir`.
+
+    Positions can be negative and are never checked against the global `Pos` bounds, which only
+    describe the finite windows the solver works on.
+    """
+
+    def __init__(
+        self,
+        seed: int,
+        spill_dir: str,
+        density: float = DENSITY,
+        chunk_size: int = CHUNK_SIZE,
+        max_chunks: int = MAX_CHUNKS,
+    ) -> None:
+        if not MIN_DENSITY <= density < 1:
+            raise ValueError(f"The density must be between {MIN_DENSITY} and 1, not {density}")
+        self.seed = seed
+        self.spill_dir = spill_dir
+        self.density = density
+        self.chunk_size = chunk_size
+        self.max_chunks = max_chunks
+        self.chunks: OrderedDict[tuple[int, int], Chunk] = OrderedDict()
+        # revealed numbers bordering hidden cells, which is where the solver has work to do
+        self.frontier: set[Pos] = set()
+        os.makedirs(spill_dir, exist_ok=True)
+
+    def chunk_of(self, pos: Pos) -> tuple[int, int]:
+        return pos.r // self.chunk_size, pos.c // self.chunk_size
+
+    def get_chunk(self, key: tuple[int, int]) -> Chunk:
+        chunk = self.chunks.get(key)
+        if chunk is not None:
+            self.chunks.move_to_end(key)
+            return chunk
+        chunk = self.chunks[key] = self.load_chunk(key)
+        if len(self.chunks) > self.max_chunks:
+            self.spill(*self.chunks.popitem(last=False))
+        return chunk
+
+    def generate_mines(self, key: tuple[int, int]) -> bytearray:
+        digest = blake2b(f"{self.seed},{key[0]},{key[1]}".encode(), digest_size=8).digest()
+        rng = Random(int.from_bytes(digest, "little"))
+        num_cells = self.chunk_size * self.chunk_size
+        mines = bytearray(num_cells)
+        for index in rng.sample(range(num_cells), round(self.density * num_cells)):
+            r = key[0] * self.chunk_size + index // self.chunk_size
+            c = key[1] * self.chunk_size + index % self.chunk_size
+            if r * r + c * c > CENTER_DISPERSAL_RADIUS * CENTER_DISPERSAL_RADIUS:
+                mines[index] = 1
+        return mines
+
+    def spill_path(self, key: tuple[int, int]) -> str:
+        return os.path.join(self.spill_dir, f"{key[0]}_{key[1]}.chunk")
+
+    def load_chunk(self, key: tuple[int, int]) -> Chunk:
+        path = self.spill_path(key)
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                state = bytearray(f.read())
+        else:
+            state = bytearray(self.chunk_size * self.chunk_size)
+        return Chunk(self.generate_mines(key), state)
+
+    def spill(self, key: tuple[int, int], chunk: Chunk) -> None:
+        if not chunk.is_touched():
+            return  # regenerated from the seed when it is needed again
+        path = self.spill_path(key)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(chunk.state)
+        os.replace(tmp_path, path)
+
+    def save(self) -> None:
+        """Spills every chunk in memory, which keeps them loaded as well."""
+        for key, chunk in self.chunks.items():
+            self.spill(key, chunk)
+
+    def cell(self, pos: Pos) -> tuple[Chunk, int]:
+        chunk = self.get_chunk(self.chunk_of(pos))
+        return chunk, (pos.r % self.chunk_size) * self.chunk_size + pos.c % self.chunk_size
+
+    def is_mine(self, pos: Pos) -> bool:
+        chunk, index = self.cell(pos)
+        return chunk.mines[index] == 1
+
+    def get_value(self, pos: Pos) -> MineFieldValue:
+        # counted on demand, as the neighbors of a cell on the border of a chunk are in others
+        if self.is_mine(pos):
+            return "M"
+        return sum(self.is_mine(npos) for npos in self.neighbors(pos))
+
+    def get_state(self, pos: Pos) -> int:
+        chunk, index = self.cell(pos)
+        return chunk.state[index]
+
+    def set_state(self, pos: Pos, state: int) -> None:
+        chunk, index = self.cell(pos)
+        chunk.state[index] = state
+
+    def is_revealed(self, pos: Pos) -> bool:
+        return self.get_state(pos) == REVEALED
+
+    def is_flagged(self, pos: Pos) -> bool:
+        return self.get_state(pos) == FLAGGED
+
+    @staticmethod
+    def neighbors(pos: Pos) -> Generator[Pos, None, None]:
+        for dr, dc in ADJACENCY:
+            yield Pos(pos.r + dr, pos.c + dc)
+
+    def start(self) -> set[Pos]:
+        return self.mark_all_revealed([Pos(0, 0)])
+
+    def mark_all_revealed(self, positions: Iterable[Pos]) -> set[Pos]:
+        """Reveals `positions` and floods out from the zeros among them, like `MineField`."""
+        just_revealed: set[Pos] = set()
+        to_check = list(positions)
+        while to_check:
+            pos = to_check.pop()
+            if self.get_state(pos) != HIDDEN:
+                continue
+            self.set_state(pos, REVEALED)
+            just_revealed.add(pos)
+            if self.get_value(pos) == 0:
+                to_check.extend(self.neighbors(pos))
+        self.update_frontier(just_revealed)
+        return just_revealed
+
+    def flag(self, pos: Pos) -> None:
+        if self.get_state(pos) != HIDDEN:
+            return
+        self.set_state(pos, FLAGGED)
+        self.update_frontier({pos})
+
+    def update_frontier(self, changed: set[Pos]) -> None:
+        """Rechecks the cells whose neighborhood changed."""
+        to_check = changed | {npos for pos in changed for npos in self.neighbors(pos)}
+        for pos in to_check:
+            if self.is_revealed(pos) and any(
+                self.get_state(npos) == HIDDEN for npos in self.neighbors(pos)
+            ):
+                self.frontier.add(pos)
+            else:
+                self.frontier.discard(pos)
+
+    def window(self, key: tuple[int, int]) -> "FrontierWindow":
+        """Returns the window the solver uses for the frontier of a chunk."""
+        margin = 2 * REACH
+        top = Pos(key[0] * self.chunk_size - margin, key[1] * self.chunk_size - margin)
+        size = self.chunk_size + 2 * margin
+        return FrontierWindow(self, top, (size, size))
+
+    def solve_frontier(self, max_windows: int = MAX_WINDOWS) -> bool:
+        """Runs the solver on a window around every chunk of the frontier, sliding along as the
+        frontier moves, until it stops making progress. A field without guesses can be solved
+        forever, so at most `max_windows` are solved per call. Returns whether anything changed.
+        """
+        progress = False
+        to_solve = {self.chunk_of(pos) for pos in self.frontier}
+        for _ in range(max_windows):
+            if not to_solve:
+                break
+            window = self.window(to_solve.pop())
+            solver = Solver(window)
+            solver.use_global_constraint = False
+            solver.solve()
+            revealed = self.mark_all_revealed(window.to_world(pos) for pos in solver.field.revealed)
+            # flags are shown to the solver as unknown cells, so it flags them again
+            flagged = {window.to_world(pos) for pos in solver.field.flagged}
+            flagged = {pos for pos in flagged if not self.is_flagged(pos)}
+            for pos in flagged:
+                self.flag(pos)
+            if revealed or flagged:
+                progress = True
+                to_solve |= {self.chunk_of(pos) for pos in revealed | flagged}
+                to_solve &= {self.chunk_of(pos) for pos in self.frontier}
+        return progress
+
+
+class FrontierWindow(MineField):
+    """A finite part of an `InfiniteMineField`, in coordinates relative to its top left corner.
+
+    The numbers on the outermost `REACH` rings of the window have neighbors outside of it, so they
+    are shown to the solver as unknown, which leaves the constraints it gets from the rest exact.
+    As the number of mines in an infinite field is unknown, the global constraint must be off.
+    """
+
+    def __init__(self, field: InfiniteMineField, top: Pos, size: tuple[int, int]) -> None:
+        self.field = field
+        self.top = top
+        self.size = size
+        self.num_mines = 0
+
+    def to_world(self, pos: Pos) -> Pos:
+        return Pos(pos.r + self.top.r, pos.c + self.top.c)
+
+    def get_value(self, pos: Pos) -> MineFieldValue:
+        return self.field.get_value(self.to_world(pos))
+
+    def is_revealed(self, pos: Pos) -> bool:
+        return self.field.is_revealed(self.to_world(pos))
+
+    def is_flagged(self, pos: Pos) -> bool:
+        return self.field.is_flagged(self.to_world(pos))
+
+    def all_revealed(self) -> Generator[tuple[Pos, MineFieldValue], None, None]:
+        for r in range(REACH, self.size[0] - REACH):
+            for c in range(REACH, self.size[1] - REACH):
+                pos = Pos(r, c)
+                if self.is_revealed(pos):
+                    yield pos, self.get_value(pos)
+
+    def all_flagged(self) -> Generator[Pos, None, None]:
+        for r in range(self.size[0]):
+            for c in range(self.size[1]):
+                if self.is_flagged(pos := Pos(r, c)):
+                    yield pos
@@ -1,24 +1,25 @@
-from collections.abc import Generator
+from collections.abc import Generator, Iterable
 from itertools import product
 from math import ceil
-from random import shuffle
-
-from colorama import Fore
+from random import randrange
 
 from rebuild.interfaces.aliases import *
 from rebuild.interfaces.position import Pos
+from rebuild.interfaces.rendering import render
 from rebuild.settings import (
     ADJACENCY,
     CENTER_DISPERSAL_RADIUS,
     CORNER_DISPERSAL_RADIUS,
     CORNERS,
-    color_pallette,
 )
 
+UNCOUNTED = 255  # the neighboring mines of a cell are only counted once it is looked at
+
 
 class MineField:
-    __grid: list[list[MineFieldValue]]
-    __mine_positions: set[Pos]
+    """A minefield with one byte per cell, so boards of 10^4 x 10^4 cells fit in memory."""
+
+    __grid: list[bytearray]
     __revealed: set[Pos]
     __flagged: set[Pos]
 
@@ -26,14 +27,12 @@ class MineField:
         self.size = size
         Pos.set_bounds(*size)
         self.num_mines = num_mines
-        self.__grid = [[0] * size[1] for _ in range(size[0])]
+        self.__grid = [bytearray(size[1]) for _ in range(size[0])]
         self.__revealed = set()
         self.__flagged = set()
 
     def generate(self, revealed_location: Pos) -> None:
-        possible_locations = set(
-            Pos(r, c) for r, c in product(range(self.size[0]), range(self.size[1]))
-        )
+        rows, columns = self.size
         dispersal_radius = (
             CORNER_DISPERSAL_RADIUS if revealed_location in CORNERS else CENTER_DISPERSAL_RADIUS
         )
@@ -45,30 +44,44 @@ class MineField:
             if dr * dr + dc * dc <= radius_squared
             if (npos := revealed_location + Pos(dr, dc)).is_valid()
         )
-        possible_locations -= unviable_locations
-        possible_locations = list(possible_locations)
-        shuffle(possible_locations)
-        self.__mine_positions = set(possible_locations[: self.num_mines])
-        if len(self.__mine_positions) != self.num_mines:
-            raise ValueError(
-                f"Mine counts differ. {len(self.__mine_positions)} != {self.num_mines}."
-            )
-        for pos in self.__mine_positions:
-            try:
-                self.__grid[pos.r][pos.c] = "M"
-            except:
-                print(pos)
-                raise ValueError
-            for neighbor in MineField.neighbors(pos):
-                if neighbor in self.__mine_positions:
-                    continue
-                self.__grid[neighbor.r][neighbor.c] += 1  # type: ignore
+        num_viable = rows * columns - len(unviable_locations)
+        if num_viable < self.num_mines:
+            raise ValueError(f"Mine counts differ. {num_viable} != {self.num_mines}.")
+        # rejection sample whichever of the mines and the safe cells are fewer, which takes
+        # O(mines) time instead of the O(cells) of shuffling every location
+        place_mines = self.num_mines <= num_viable // 2
+        fill, placed = (UNCOUNTED, MINE_CODE) if place_mines else (MINE_CODE, UNCOUNTED)
+        if len(self.__grid) == rows and all(len(row) == columns for row in self.__grid):
+            # a pooled field refills its rows in place instead of allocating new ones
+            fill_row = bytes([fill]) * columns
+            for row in self.__grid:
+                row[:] = fill_row
+        else:
+            self.__grid = [bytearray([fill]) * columns for _ in range(rows)]
+        for pos in unviable_locations:  # reserved until every mine is placed
+            self.__grid[pos.r][pos.c] = 0
+        to_place = self.num_mines if place_mines else num_viable - self.num_mines
+        num_cells = rows * columns
+        while to_place:
+            r, c = divmod(randrange(num_cells), columns)
+            row = self.__grid[r]
+            if row[c] != fill:
+                continue
+            row[c] = placed
+            to_place -= 1
+        for pos in unviable_locations:
+            self.__grid[pos.r][pos.c] = UNCOUNTED
         self.mark_reveled(revealed_location)
 
     def get_value(self, pos: Pos) -> MineFieldValue:
         if not pos.is_valid():
             raise ValueError
-        return self.__grid[pos.r][pos.c]
+        val = self.__grid[pos.r][pos.c]
+        if val == UNCOUNTED:
+            val = self.__grid[pos.r][pos.c] = sum(
+                self.__grid[npos.r][npos.c] == MINE_CODE for npos in MineField.neighbors(pos)
+            )
+        return "M" if val == MINE_CODE else val
 
     @staticmethod
     def neighbors(pos: Pos) -> Generator[Pos, None, None]:
@@ -83,22 +96,61 @@ class MineField:
         return pos in self.__flagged
 
     def mark_reveled(self, pos: Pos) -> None:
-        if not pos.is_valid() or pos in self.__revealed:
-            return
-        self.__revealed.add(pos)
-        if self.get_value(pos) == 0:
-            for neighbor in self.neighbors(pos):
-                self.mark_reveled(neighbor)
+        self.mark_all_revealed([pos])
+
+    def mark_all_revealed(self, positions: Iterable[Pos]) -> set[Pos]:
+        """Reveals `positions` and floods out from the zeros among them.
+
+        All the flood fills share the revealed set as their visited mask, so regions reached from
+        several starting cells are only walked once. Flagged cells are left alone. Returns the
+        cells that were newly revealed.
+        """
+        just_revealed: set[Pos] = set()
+        to_check = list(positions)
+        while to_check:
+            pos = to_check.pop()
+            if not pos.is_valid() or pos in self.__revealed or pos in self.__flagged:
+                continue
+            self.__revealed.add(pos)
+            just_revealed.add(pos)
+            if self.get_value(pos) == 0:
+                to_check.extend(self.neighbors(pos))
+        return just_revealed
+
+    def chord(self, pos: Pos) -> set[Pos]:
+        """Reveals the unflagged neighbors of a revealed number once it has as many flags around it.
+
+        Returns the cells that were newly revealed, which can include a mine if a flag was wrong.
+        """
+        val = self.get_value(pos)
+        if pos not in self.__revealed or val == "M":
+            return set()
+        neighbors = list(self.neighbors(pos))
+        if sum(neighbor in self.__flagged for neighbor in neighbors) != val:
+            return set()
+        return self.mark_all_revealed(neighbors)
 
     def flag(self, pos: Pos) -> None:
         self.__flagged.add(pos)
 
+    def unflag(self, pos: Pos) -> None:
+        self.__flagged.discard(pos)
+
+    def num_revealed(self) -> int:
+        return len(self.__revealed)
+
+    def reset(self) -> None:
+        """Clears what the player did, so the field can be generated again."""
+        Pos.set_bounds(*self.size)
+        self.__revealed.clear()
+        self.__flagged.clear()
+
     def all_revealed(self) -> Generator[tuple[Pos, MineFieldValue], None, None]:
         for pos in self.__revealed:
             yield pos, self.get_value(pos)
 
     def from_grid(self, grid: list[list[MineFieldValue]], start: Pos) -> None:
-        self.__grid = grid
+        self.__grid = [bytearray(MINE_CODE if val == "M" else val for val in row) for row in grid]
         self.size = len(grid), len(grid[0])
         self.__revealed = set()
         self.__flagged = set()
@@ -108,26 +160,16 @@ class MineField:
         for pos in self.__flagged:
             yield pos
 
+    def rows(self) -> list[list[MineFieldValue]]:
+        return [
+            [self.get_value(Pos(r, c)) for c in range(self.size[1])] for r in range(self.size[0])
+        ]
+
     def __str__(self) -> str:
-        def hex_to_ascii(hex_code: str) -> str:
-            hex_code = hex_code.lstrip("#")
-            r = int(hex_code[0:2], 16)
-            g = int(hex_code[2:4], 16)
-            b = int(hex_code[4:6], 16)
-            return f"\033[38;2;{r};{g};{b}m"
-
-        def convert(pos: Pos, val: MineFieldValue) -> str:
-            if val == "M":
-                return Fore.RED + str(val) + Fore.RESET
-            if val == 0:
-                return " "
-            if pos not in self.__revealed:
-                return Fore.LIGHTBLACK_EX + str(val) + Fore.RESET
-            return hex_to_ascii(color_pallette.cell_colors[val - 1]) + str(val) + Fore.RESET
-
-        out = ""
-        for i, row in enumerate(self.__grid):
-            for j, val in enumerate(row):
-                out += convert(Pos(i, j), val)
-            out += "\n"
-        return out
+        return render(self, plain_text)
+
+
+def plain_text(mine_field: MineField) -> str:
+    return "".join(
+        "".join(" " if val == 0 else str(val) for val in row) + "\n" for row in mine_field.rows()
+    )
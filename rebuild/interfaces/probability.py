@@ -0,0 +1,189 @@
+"""
+Exact mine probabilities for a position, from the number of ways its mines can be placed.
+
+Every component of the frontier is enumerated on its own, counting its placements by the number of
+mines they use. The unknown cells off the frontier are interchangeable, so `f` mines on the
+frontier leave C(interior, mines - f) ways to place the rest, and combining the components is a
+convolution over their mine counts.
+"""
+
+from dataclasses import dataclass, field
+from functools import lru_cache
+from math import comb
+
+from rebuild.interfaces.elimination import components
+from rebuild.interfaces.position import Pos
+
+SetDict = dict[frozenset[Pos], int]
+Counts = dict[int, int]  # number of mines -> number of placements
+
+MAX_NODES = 1_000_000  # placements tried per component before giving up
+
+
+class BudgetExceeded(Exception):
+    """Raised when a component has more placements than the budget allows trying."""
+
+
+@dataclass(frozen=True)
+class ComponentCounts:
+    cells: tuple[Pos, ...]
+    counts: Counts
+    # number of mines -> for every cell, the number of those placements with a mine on it
+    mine_counts: dict[int, tuple[int, ...]]
+
+
+@dataclass
+class Probabilities:
+    frontier: dict[Pos, float]
+    interior: float  # of every unknown cell off the frontier
+    num_interior: int
+    weight: int  # the number of layouts that fit the position
+    # the number of those layouts with a mine on every frontier cell, and on any one interior cell
+    frontier_weights: dict[Pos, int] = field(default_factory=dict)
+    interior_weight: int = 0
+
+    def of(self, pos: Pos) -> float:
+        return self.frontier.get(pos, self.interior)
+
+
+def count_component(sets: SetDict, max_nodes: int = MAX_NODES) -> ComponentCounts:
+    return _count_component(frozenset(sets.items()), max_nodes)
+
+
+@lru_cache(maxsize=4096)
+def _count_component(
+    constraints: frozenset[tuple[frozenset[Pos], int]], max_nodes: int
+) -> ComponentCounts:
+    """Counts the placements of a component by depth first search over its cells, which are
+    taken in board order so the constraints close soon after they are opened.
+    """
+    cells = sorted(set().union(*(s for s, _ in constraints)), key=lambda pos: (pos.r, pos.c))
+    index = {pos: i for i, pos in enumerate(cells)}
+    constraints_of: list[list[int]] = [[] for _ in cells]
+    mines_left, cells_left = [], []
+    for j, (s, val) in enumerate(constraints):
+        for pos in s:
+            constraints_of[index[pos]].append(j)
+        mines_left.append(val)
+        cells_left.append(len(s))
+
+    counts: Counts = {}
+    mine_counts: dict[int, list[int]] = {}
+    num_cells = len(cells)
+    values = [-1] * num_cells
+    num_mines = 0
+    nodes = 0
+    i = 0
+    while i >= 0:
+        if i == num_cells:
+            counts[num_mines] = counts.get(num_mines, 0) + 1
+            per_cell = mine_counts.setdefault(num_mines, [0] * num_cells)
+            for k, value in enumerate(values):
+                per_cell[k] += value
+            i -= 1
+            continue
+        value = values[i]
+        if value >= 0:
+            num_mines -= value
+            for j in constraints_of[i]:
+                mines_left[j] += value
+                cells_left[j] += 1
+        value += 1
+        while value <= 1 and not all(
+            0 <= mines_left[j] - value <= cells_left[j] - 1 for j in constraints_of[i]
+        ):
+            value += 1
+        if value > 1:
+            values[i] = -1
+            i -= 1
+            continue
+        nodes += 1
+        if nodes > max_nodes:
+            raise BudgetExceeded
+        num_mines += value
+        for j in constraints_of[i]:
+            mines_left[j] -= value
+            cells_left[j] -= 1
+        values[i] = value
+        i += 1
+
+    return ComponentCounts(
+        tuple(cells),
+        counts,
+        {mines: tuple(per_cell) for mines, per_cell in mine_counts.items()},
+    )
+
+
+def convolve(a: Counts, b: Counts) -> Counts:
+    result: Counts = {}
+    for mines_a, count_a in a.items():
+        for mines_b, count_b in b.items():
+            result[mines_a + mines_b] = result.get(mines_a + mines_b, 0) + count_a * count_b
+    return result
+
+
+def interior_ways(num_interior: int, mines_left: int) -> int:
+    if not 0 <= mines_left <= num_interior:
+        return 0
+    return comb(num_interior, mines_left)
+
+
+def position_probabilities(
+    sets: SetDict, num_unknowns: int, num_mines: int, max_nodes: int = MAX_NODES
+) -> Probabilities:
+    """Returns the chance of every unknown cell being a mine.
+
+    `sets` are the constraints of the frontier, without the global one, and `num_mines` the mines
+    left among the `num_unknowns` unknown cells.
+    """
+    counted = [count_component(dict(group), max_nodes) for group in grouped(sets)]
+    num_interior = num_unknowns - sum(len(component.cells) for component in counted)
+
+    frontier_weights: dict[Pos, int] = {}
+    weight = 0
+    for j, component in enumerate(counted):
+        rest: Counts = {0: 1}
+        for other in counted[:j] + counted[j + 1 :]:
+            rest = convolve(rest, other.counts)
+        # the ways to place the mines outside of the component, for every count inside of it
+        outside = {
+            mines: sum(
+                ways * interior_ways(num_interior, num_mines - mines - rest_mines)
+                for rest_mines, ways in rest.items()
+            )
+            for mines in component.counts
+        }
+        weight = sum(component.counts[mines] * ways for mines, ways in outside.items())
+        if weight == 0:
+            raise ValueError("No layout of the mines fits the position")
+        for k, pos in enumerate(component.cells):
+            frontier_weights[pos] = sum(
+                component.mine_counts[mines][k] * ways for mines, ways in outside.items()
+            )
+
+    total: Counts = {0: 1}
+    for component in counted:
+        total = convolve(total, component.counts)
+    weight = sum(
+        ways * interior_ways(num_interior, num_mines - mines) for mines, ways in total.items()
+    )
+    if weight == 0:
+        raise ValueError("No layout of the mines fits the position")
+    interior_mines = sum(
+        ways * interior_ways(num_interior, num_mines - mines) * (num_mines - mines)
+        for mines, ways in total.items()
+    )
+    # every interior cell holds the same share of the interior mines
+    interior_weight = interior_mines // num_interior if num_interior else 0
+    return Probabilities(
+        {pos: mine_weight / weight for pos, mine_weight in frontier_weights.items()},
+        interior_weight / weight,
+        num_interior,
+        weight,
+        frontier_weights,
+        interior_weight,
+    )
+
+
+def grouped(sets: SetDict) -> list[SetDict]:
+    return [{s: sets[s] for s in group} for group in components(sets)]
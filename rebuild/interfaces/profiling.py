@@ -0,0 +1,149 @@
+import json
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from time import perf_counter
+from typing import Any, TypeVar
+
+from rebuild.interfaces.bitsets import MaskDict
+from rebuild.interfaces.position import Pos
+
+SetDict = dict[frozenset[Pos], int]
+Constraints = SetDict | MaskDict
+T = TypeVar("T")
+
+
+@dataclass
+class PhaseRecord:
+    """What a single phase of a single solver step cost and achieved."""
+
+    step: int
+    phase: str
+    seconds: float
+    constraints_before: int
+    constraints_after: int
+    created: int
+    removed: int
+    cells_resolved: int
+
+
+def cells_of(key: frozenset[Pos] | int) -> set:
+    """Returns the cells of a constraint, as bit numbers for a bitmask."""
+    if isinstance(key, int):
+        return {i for i in range(key.bit_length()) if key >> i & 1}
+    return set(key)
+
+
+def decisive_cells(sets: Constraints, keys) -> set:
+    """Returns the cells that the constraints in `keys` fully determine."""
+    cells = set()
+    for key in keys:
+        val = sets.get(key)
+        if val is not None:
+            key_cells = cells_of(key)
+            if val == 0 or val == len(key_cells):
+                cells |= key_cells
+    return cells
+
+
+class SolverProfiler:
+    """Collects a `PhaseRecord` for every phase the solver runs.
+
+    A solver only calls into the profiler when one was requested, so it costs nothing when off.
+    """
+
+    def __init__(self) -> None:
+        self.records: list[PhaseRecord] = []
+        self.step = 0
+
+    def start_step(self) -> None:
+        self.step += 1
+
+    def measure_sets(
+        self, phase: str, func: Callable[[], T], count: Callable[[T], int] = len
+    ) -> T:
+        """Measures a phase that builds the constraints from scratch, `count` of them."""
+        start = perf_counter()
+        result = func()
+        seconds = perf_counter() - start
+        num_constraints = count(result)
+        self.records.append(
+            PhaseRecord(self.step, phase, seconds, 0, num_constraints, num_constraints, 0, 0)
+        )
+        return result
+
+    def measure_rule(self, phase: str, func: Callable[[Any], T], sets: Constraints) -> T:
+        """Measures a rule that derives constraints by editing `sets` in place. The constraints
+        are either sets of cells or bitmasks.
+
+        The cells resolved by a rule are the cells of the decisive constraints it created, as
+        those are the ones `apply_basic_logic` will reveal or flag because of it.
+        """
+        before = set(sets)
+        already_decided = decisive_cells(sets, before)
+        start = perf_counter()
+        result = func(sets)
+        seconds = perf_counter() - start
+        after = set(sets)
+        resolved = decisive_cells(sets, after - before) - already_decided
+        self.records.append(
+            PhaseRecord(
+                self.step,
+                phase,
+                seconds,
+                len(before),
+                len(after),
+                len(after - before),
+                len(before - after),
+                len(resolved),
+            )
+        )
+        return result
+
+    def measure_logic(
+        self,
+        phase: str,
+        func: Callable[[Any], T],
+        sets: Constraints,
+        unknowns: Callable[[], int],
+    ) -> T:
+        """Measures the phase that reveals and flags cells, which lowers the count `unknowns`."""
+        num_unknowns = unknowns()
+        start = perf_counter()
+        result = func(sets)
+        seconds = perf_counter() - start
+        self.records.append(
+            PhaseRecord(
+                self.step,
+                phase,
+                seconds,
+                len(sets),
+                len(sets),
+                0,
+                0,
+                num_unknowns - unknowns(),
+            )
+        )
+        return result
+
+    def to_dicts(self) -> list[dict[str, Any]]:
+        return [asdict(record) for record in self.records]
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """Totals of every field per phase, along with the number of calls."""
+        totals: dict[str, dict[str, float]] = {}
+        for record in self.records:
+            total = totals.setdefault(
+                record.phase,
+                {"calls": 0, "seconds": 0.0, "created": 0, "removed": 0, "cells_resolved": 0},
+            )
+            total["calls"] += 1
+            total["seconds"] += record.seconds
+            total["created"] += record.created
+            total["removed"] += record.removed
+            total["cells_resolved"] += record.cells_resolved
+        return totals
+
+    def write_jsonl(self, path: str) -> None:
+        with open(path, "w") as f:
+            for record in self.to_dicts():
+                print(json.dumps(record), file=f)
@@ -0,0 +1,19 @@
+from collections.abc import Callable
+from typing import Any
+
+Renderer = Callable[[Any], str]
+
+# filled in by the modules of `rebuild.presentation` when they are imported
+renderers: dict[type, Renderer] = {}
+
+
+def register_renderer(cls: type, renderer: Renderer) -> None:
+    renderers[cls] = renderer
+
+
+def render(obj: Any, fallback: Renderer) -> str:
+    """Renders `obj` with the renderer registered for its class, or `fallback` if there is none."""
+    for cls in type(obj).__mro__:
+        if cls in renderers:
+            return renderers[cls](obj)
+    return fallback(obj)
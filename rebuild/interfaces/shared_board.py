@@ -0,0 +1,142 @@
+"""
+Boards in shared memory, so worker processes can read them without anything being pickled.
+
+A board is stored one byte per cell, row after row, with the codes `SolvingField` keeps its cells
+in. The process that owns a board creates a `SharedBoard` and sends its `BoardHandle`, which is a
+name and a size, to the workers. They attach to the same memory and copy the rows out of it in
+one go. Cells go back as arrays of flat indices, `r * columns + c`, rather than sets of `Pos`.
+"""
+
+from array import array
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import lru_cache
+from multiprocessing import shared_memory
+
+from rebuild.interfaces.position import Pos
+from rebuild.interfaces.solver import Solver
+from rebuild.interfaces.solving_field import DECODED, SolvingField
+
+# the characters of the solver test rows for every code, and back
+CHARACTERS = "".join(map(str, DECODED)).encode()
+TO_ROWS = bytes.maketrans(bytes(range(len(CHARACTERS))), CHARACTERS)
+FROM_ROWS = bytes.maketrans(CHARACTERS, bytes(range(len(CHARACTERS))))
+
+
+@dataclass(frozen=True)
+class BoardHandle:
+    name: str
+    size: tuple[int, int]
+    num_mines: int  # among the unknown cells
+
+
+class SharedBoard:
+    """A board in shared memory, which lives until `close` is called by the process that made it."""
+
+    def __init__(self, data: bytes, size: tuple[int, int], num_mines: int) -> None:
+        self.memory = shared_memory.SharedMemory(create=True, size=max(1, len(data)))
+        self.memory.buf[: len(data)] = data
+        self.handle = BoardHandle(self.memory.name, size, num_mines)
+
+    @classmethod
+    def from_field(cls, field: SolvingField, num_mines: int) -> "SharedBoard":
+        return cls(field.to_bytes(), field.size, num_mines)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[str], num_mines: int) -> "SharedBoard":
+        rows = list(rows)
+        data = "".join(rows).encode().translate(FROM_ROWS)
+        return cls(data, (len(rows), len(rows[0])), num_mines)
+
+    def close(self) -> None:
+        self.memory.close()
+        self.memory.unlink()
+
+    def __enter__(self) -> "SharedBoard":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+@contextmanager
+def attach(handle: BoardHandle) -> Iterator[memoryview]:
+    """Gives a view of a board without copying it, which is only valid inside the block."""
+    memory = shared_memory.SharedMemory(handle.name)
+    rows, columns = handle.size
+    view = memory.buf[: rows * columns]
+    try:
+        yield view
+    finally:
+        view.release()
+        memory.close()
+
+
+def read_field(handle: BoardHandle) -> SolvingField:
+    with attach(handle) as view:
+        return SolvingField.from_buffer(view, handle.size)
+
+
+@lru_cache(maxsize=8)
+def read_rows(handle: BoardHandle) -> tuple[str, ...]:
+    """Returns a board as the rows of the solver tests. Workers are sent the same board for every
+    cell they look at, so the last few are kept.
+    """
+    columns = handle.size[1]
+    with attach(handle) as view:
+        text = view.tobytes().translate(TO_ROWS).decode()
+    return tuple(text[i : i + columns] for i in range(0, len(text), columns))
+
+
+def to_indices(cells: Iterable[Pos], columns: int) -> array:
+    return array("l", sorted(pos.r * columns + pos.c for pos in cells))
+
+
+def from_indices(indices: Iterable[int], columns: int) -> list[Pos]:
+    return [Pos(*divmod(index, columns)) for index in indices]
+
+
+def solve_shared(handle: BoardHandle) -> tuple[array, array]:
+    """Solves a shared board, returning the indices of the cells to reveal and to flag."""
+    solver = Solver(read_field(handle), handle.num_mines)
+    solver.solve()
+    columns = handle.size[1]
+    return to_indices(solver.field.revealed, columns), to_indices(solver.field.flagged, columns)
+
+
+class SolverPool:
+    """Solves boards in worker processes, handing them over through shared memory."""
+
+    def __init__(self, workers: int | None = None) -> None:
+        self.pool = ProcessPoolExecutor(workers)
+
+    def solve_all(
+        self, boards: Iterable[tuple[SolvingField, int]]
+    ) -> list[tuple[list[Pos], list[Pos]]]:
+        """Takes boards with the mines left among their unknown cells, and returns the cells to
+        reveal and to flag on each.
+        """
+        shared = [SharedBoard.from_field(field, num_mines) for field, num_mines in boards]
+        try:
+            results = list(self.pool.map(solve_shared, [board.handle for board in shared]))
+        finally:
+            for board in shared:
+                board.close()
+        return [
+            (
+                from_indices(revealed, board.handle.size[1]),
+                from_indices(flagged, board.handle.size[1]),
+            )
+            for board, (revealed, flagged) in zip(shared, results)
+        ]
+
+    def close(self) -> None:
+        self.pool.shutdown()
+
+    def __enter__(self) -> "SolverPool":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
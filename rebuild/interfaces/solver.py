@@ -1,38 +1,101 @@
-from collections.abc import Iterable
-from itertools import combinations, product
-from typing import overload
+from collections.abc import Callable, Iterable
+from typing import TYPE_CHECKING, overload
 
+from rebuild.interfaces import bitsets
+from rebuild.interfaces.bitsets import Frontier, MaskDict
+from rebuild.interfaces.elimination import eliminate
 from rebuild.interfaces.minefield import MineField
 from rebuild.interfaces.position import Pos
+from rebuild.interfaces.probability import BudgetExceeded, Probabilities, position_probabilities
 from rebuild.interfaces.solving_field import SolvingField
+from rebuild.interfaces.trace import Tracer, TraceLevel
+
+if TYPE_CHECKING:
+    from rebuild.interfaces.profiling import SolverProfiler
 
 SetDict = dict[frozenset[Pos], int]
 
+# below this many unknowns the global mine count is always added as a constraint
+GLOBAL_CONSTRAINT_THRESHOLD = 64
+# at or below this many unknowns the mine placements are counted once the rules are stuck
+ENDGAME_THRESHOLD = 64
+ENDGAME_MAX_NODES = 100_000  # placements tried per component before the endgame gives up
+
 # fmt: off
 STANDARD_ADJACENCY = [
     Pos(-1, -1), Pos(-1, 0), Pos(-1, 1),
     Pos(0, -1),              Pos(0, 1),
     Pos(1, -1),  Pos(1, 0),  Pos(1, 1),
 ]
+KNIGHT_ADJACENCY = [
+    Pos(-2, -1), Pos(-2, 1), Pos(-1, -2), Pos(-1, 2),
+    Pos(1, -2),  Pos(1, 2),  Pos(2, -1),  Pos(2, 1),
+]
 # fmt: on
 
 
 class Solver:
     @overload
-    def __init__(self, mine_field: MineField, /) -> None: ...
+    def __init__(
+        self,
+        mine_field: MineField,
+        /,
+        *,
+        profile: bool = False,
+        trace: TraceLevel = ...,
+        matrix: bool = False,
+        adjacency: list[Pos] = ...,
+    ) -> None: ...
 
     @overload
-    def __init__(self, test_input: str, test_output: str, /): ...
+    def __init__(
+        self,
+        test_input: str,
+        test_output: str | None,
+        /,
+        *,
+        profile: bool = False,
+        trace: TraceLevel = ...,
+        matrix: bool = False,
+        adjacency: list[Pos] = ...,
+    ): ...
 
-    def __init__(self, *args: MineField | str) -> None:
+    @overload
+    def __init__(
+        self,
+        field: SolvingField,
+        num_mines: int,
+        /,
+        *,
+        profile: bool = False,
+        trace: TraceLevel = ...,
+        matrix: bool = False,
+        adjacency: list[Pos] = ...,
+    ) -> None:
+        """Solves a board that is already encoded, like one read from shared memory."""
+        ...
+
+    def __init__(
+        self,
+        *args: MineField | SolvingField | str | int | None,
+        profile: bool = False,
+        trace: TraceLevel = TraceLevel.SILENT,
+        matrix: bool = False,
+        adjacency: list[Pos] = STANDARD_ADJACENCY,
+    ) -> None:
+        self.adjacency = adjacency
         if len(args) == 1:
             mine_field = args[0]
             assert isinstance(mine_field, MineField)
             self.field = SolvingField(mine_field)
             self.num_mines = mine_field.num_mines
+        elif len(args) == 2 and isinstance(args[0], SolvingField):
+            assert isinstance(args[1], int)
+            self.field = args[0]
+            self.num_mines = args[1]
         elif len(args) == 2:
             test_input, test_output = args[0], args[1]
-            assert isinstance(test_input, str) and isinstance(test_output, str)
+            assert isinstance(test_input, str) and isinstance(test_output, (str, type(None)))
             num_mines, _, test_input = test_input.partition("\n")
             self.field = SolvingField(test_input, test_output)
             self.num_mines = int(num_mines)
@@ -40,7 +103,29 @@ class Solver:
             raise NotImplementedError
         self.size = self.field.size
         self.bordering: set[Pos] = set(self.find_all_bordering())
-        self.unknowns: set[Pos] = set(self.find_all_unknown())
+        # the cells revealed or flagged since the bordering numbers were last updated
+        self.changed: set[Pos] = set()
+        self.num_unknowns = self.field.count_unknown()
+        self.profiler: SolverProfiler | None = None
+        if profile:
+            # imported here, as dataclasses alone doubles the import time of the solver
+            from rebuild.interfaces.profiling import SolverProfiler
+
+            self.profiler = SolverProfiler()
+        self.tracer = Tracer(trace)
+        self.steps = 0
+        self.global_threshold: float = GLOBAL_CONSTRAINT_THRESHOLD
+        # off when the number of mines is unknown, like in an infinite field
+        self.use_global_constraint = True
+        self.endgame_threshold: float = ENDGAME_THRESHOLD
+        # the chance of every unknown cell being a mine, from the last endgame count
+        self.probabilities: Probabilities | None = None
+        self.matrix = matrix
+        if matrix:
+            # NumPy is only needed for the matrix rules, so it is imported here rather than at the
+            # top. Importing it now makes a missing NumPy fail when the solver is created instead
+            # of partway through a solve; `matrix_step` then finds the module already loaded.
+            import rebuild.interfaces.frontier_matrix  # noqa: F401
 
     def verify(self) -> bool:
         return self.field.verify()
@@ -50,110 +135,243 @@ class Solver:
             changed = self.solve_step()
             if not changed:
                 break
+        self.tracer.summary(self.steps, self.num_unknowns, self.num_mines)
 
     def solve_step(self) -> bool:
-        if len(self.unknowns) == 0:
+        if self.num_unknowns == 0:
             return False
-        print(self.field)
-        sets = self.get_sets()
-        self.check_subsets(sets)
-        self.check_squeezes(sets)
-        self.check_subsets(sets)
+        self.steps += 1
+        self.tracer.step(self.steps, self.field)
+        if self.matrix and self.matrix_step():
+            changed = True
+        elif self.profiler is None:
+            # the pairwise rules run on bitmasks, and the constraints are only turned into sets
+            # of cells for the stages that need them
+            frontier, masks = self.get_masks()
+            self.trace_masks("get_sets", frontier, masks)
+            bitsets.check_subsets(masks)
+            self.trace_masks("check_subsets", frontier, masks)
+            bitsets.check_squeezes(masks)
+            self.trace_masks("check_squeezes", frontier, masks)
+            bitsets.check_subsets(masks)
+            self.trace_masks("check_subsets", frontier, masks)
+            changed = self.apply_mask_logic(frontier, masks)
+            sets = frontier.decode(masks) if not changed else {}
+            if not changed and self.check_elimination(sets):
+                self.tracer.rule("check_elimination", sets)
+                changed = self.apply_basic_logic(sets)
+            if not changed and self.check_endgame(sets):
+                self.tracer.rule("check_endgame", sets)
+                changed = self.apply_basic_logic(sets)
+        else:
+            changed = self.profiled_step(self.profiler)
 
-        if changed := self.apply_basic_logic(sets):
+        if changed:
             self.update_bordering()
 
         return changed
 
+    def matrix_step(self) -> bool:
+        """Resolves what the bulk rules find on the frontier matrix. The set rules only run when
+        this finds nothing, as they are stronger but scale badly with the size of the frontier.
+        """
+        from rebuild.interfaces.frontier_matrix import build_frontier_matrix, matrix_deductions
+
+        matrix = build_frontier_matrix(self.field, ((pos.r, pos.c) for pos in self.adjacency))
+        safe, mines = matrix_deductions(matrix)
+        self.reveal_all(frozenset(safe))
+        self.flag_all(frozenset(mines))
+        return bool(safe or mines)
+
+    def profiled_step(self, profiler: "SolverProfiler") -> bool:
+        """The same stages as `solve_step`, each measured on the constraints it works on."""
+        profiler.start_step()
+        frontier, masks = profiler.measure_sets(
+            "get_masks", self.get_masks, lambda result: len(result[1])
+        )
+        self.trace_masks("get_sets", frontier, masks)
+        for name, mask_rule in [
+            ("check_subsets", bitsets.check_subsets),
+            ("check_squeezes", bitsets.check_squeezes),
+            ("check_subsets", bitsets.check_subsets),
+        ]:
+            profiler.measure_rule(name, mask_rule, masks)
+            self.trace_masks(name, frontier, masks)
+        changed = profiler.measure_logic(
+            "apply_basic_logic",
+            lambda masks: self.apply_mask_logic(frontier, masks),
+            masks,
+            lambda: self.num_unknowns,
+        )
+        sets = frontier.decode(masks) if not changed else {}
+        for name, rule in [
+            ("check_elimination", self.check_elimination),
+            ("check_endgame", self.check_endgame),
+        ]:
+            if changed or not profiler.measure_rule(name, rule, sets):
+                continue
+            self.tracer.rule(name, sets)
+            changed = profiler.measure_logic(
+                "apply_basic_logic", self.apply_basic_logic, sets, lambda: self.num_unknowns
+            )
+        return changed
+
+    def apply_mask_logic(self, frontier: Frontier, masks: MaskDict) -> bool:
+        to_reveal, to_flag = bitsets.basic_logic(masks)
+        self.reveal_all(frontier.cells_of(to_reveal))
+        self.flag_all(frontier.cells_of(to_flag))
+        return bool(to_reveal or to_flag)
+
     def get_sets(self) -> SetDict:
-        sets: SetDict = {}
+        frontier, masks = self.get_masks()
+        return frontier.decode(masks)
+
+    def get_masks(self) -> tuple[Frontier, MaskDict]:
+        frontier, masks = self.frontier_masks()
+        if self.use_global_constraint and self.global_constraint_can_help(masks):
+            masks[frontier.mask(self.field.unknown_cells())] = self.num_mines
+        return frontier, masks
+
+    def frontier_sets(self) -> SetDict:
+        frontier, masks = self.frontier_masks()
+        return frontier.decode(masks)
+
+    def frontier_masks(self) -> tuple[Frontier, MaskDict]:
+        frontier = Frontier()
+        masks: MaskDict = {}
         for pos in self.bordering:
             val = self.field.get_value(pos)
             if not isinstance(val, int):
                 continue
 
-            group = set()
+            mask = 0
             for npos in self.neighbors(pos):
                 n_val = self.field.get_value(npos)
                 if n_val == ".":
-                    group.add(npos)
+                    mask |= frontier.bit(npos)
                 elif n_val == "F":
                     val -= 1
 
             if val < 0:
                 raise ValueError(f"Negative mine count detected at {pos}")
-            if group:
-                sets[frozenset(group)] = val
-        sets[frozenset(self.unknowns)] = self.num_mines
-        return sets
+            if mask:
+                if masks.get(mask, val) != val:
+                    raise ValueError(f"Conflicting mine counts around {pos}")
+                masks[mask] = val
+        return frontier, masks
+
+    def trace_masks(self, name: str, frontier: Frontier, masks: MaskDict) -> None:
+        if self.tracer.level >= TraceLevel.RULE:
+            self.tracer.rule(name, frontier.decode(masks))
+
+    def global_constraint_can_help(self, masks: MaskDict) -> bool:
+        """Checks whether `unknowns -> num_mines` can lead to any deduction.
+
+        The rules only get something out of the global constraint once the frontier constraints
+        are subtracted from it, leaving the cells off the frontier with the mines not accounted
+        for. That remainder is decisive only if it has no mines, which needs the frontier to be
+        able to hold every mine, or if it has no safe cells, which needs the frontier to be able
+        to hold every safe cell. Outside of those cases the huge set would only slow down every
+        pairwise rule.
+        """
+        if self.num_unknowns <= self.global_threshold:
+            return True
+        num_frontier, low, high = self.frontier_mine_bounds(masks)
+        num_safe = self.num_unknowns - self.num_mines
+        return self.num_mines <= high or num_safe <= num_frontier - low
+
+    def frontier_mine_bounds(self, masks: MaskDict) -> tuple[int, int, int]:
+        """Returns the number of frontier cells and bounds on the number of mines among them.
+
+        The lower bound comes from constraints that do not overlap, the upper bound from
+        constraints that cover the whole frontier.
+        """
+        frontier = 0
+        for mask in masks:
+            frontier |= mask
+        num_frontier = frontier.bit_count()
+        low = packed = 0
+        for mask, val in sorted(masks.items(), key=lambda item: -item[1]):
+            if not packed & mask:
+                packed |= mask
+                low += val
+        high = covered = 0
+        for mask, val in sorted(masks.items(), key=lambda item: item[1] / item[0].bit_count()):
+            if mask & ~covered:
+                covered |= mask
+                high += val
+        return num_frontier, low, min(high, num_frontier)
 
     def check_subsets(self, sets: SetDict) -> bool:
-        changed = False
-        for (set1, val1), (set2, val2) in combinations(list(sets.items()), 2):
-            if set1.issubset(set2):
-                superset, superset_val = set2, val2
-                subset, subset_val = set1, val1
-            elif set2.issubset(set1):
-                superset, superset_val = set1, val1
-                subset, subset_val = set2, val2
-            else:
-                continue
-
-            new_val = superset_val - subset_val
-            new_set = superset - subset
-
-            if superset in sets:
-                sets.pop(superset)
-                changed = True
-            if new_set and new_set not in sets:
-                sets[new_set] = new_val
-                changed = True
+        return self.apply_mask_rule(bitsets.check_subsets, sets)
 
+    def check_squeezes(self, sets: SetDict) -> bool:
+        return self.apply_mask_rule(bitsets.check_squeezes, sets)
+
+    def apply_mask_rule(self, rule: Callable[[MaskDict], bool], sets: SetDict) -> bool:
+        """Runs a pairwise rule on the constraints as bitmasks, and writes back what it derived."""
+        frontier = Frontier()
+        masks = frontier.encode(sets)
+        changed = rule(masks)
+        if changed:
+            sets.clear()
+            sets.update(frontier.decode(masks))
         return changed
 
-    def check_squeezes(self, sets: SetDict) -> bool:
-        seen_groups = {}
+    def check_elimination(self, sets: SetDict) -> bool:
+        """Adds a constraint for every cell that row reducing the constraints resolves, which
+        combines any number of them instead of two at a time. It only runs once the pairwise rules
+        are stuck, as it costs more than they do.
+
+        The global constraint joins every component into one, so it is only included while there
+        are few enough unknowns for it to be added unconditionally.
+        """
+        constraints = sets
+        if self.num_unknowns > self.global_threshold:
+            constraints = {s: val for s, val in sets.items() if len(s) < self.num_unknowns}
+        safe, mines = eliminate(constraints)
         changed = False
-        for (set1, val1), (set2, val2) in combinations(list(sets.items()), 2):
-            if val1 == 0 or val2 == 0:
-                continue
-            if val1 == val2:
-                continue
+        for pos, val in [(pos, 0) for pos in safe] + [(pos, 1) for pos in mines]:
+            s = frozenset([pos])
+            if s not in sets:
+                sets[s] = val
+                changed = True
+        return changed
 
-            intersection = set1 & set2
-            if len(intersection) < min(val1, val2) + 1:
-                continue
+    def check_endgame(self, sets: SetDict) -> bool:
+        """Adds a constraint for every cell that has the same value in every layout of the mines
+        left, which is exact where the rules only combine the global mine count linearly.
 
-            large_set, small_val, large_val = (
-                (set2, val1, val2) if val1 < val2 else (set1, val2, val1)
+        The layouts of every frontier component are counted by the number of mines they use, and
+        those counts are convolved with the ways to place the rest off the frontier. That only
+        needs the components to be small, so it runs once few unknowns are left, and gives up on a
+        component with too many placements.
+        """
+        if not self.use_global_constraint or self.num_unknowns > self.endgame_threshold:
+            return False
+        try:
+            probs = position_probabilities(
+                self.frontier_sets(), self.num_unknowns, self.num_mines, ENDGAME_MAX_NODES
             )
-            large_not_small = large_set - intersection
-
-            if len(large_not_small) == large_val - small_val:
-                if intersection not in sets:
-                    sets[intersection] = small_val
-                    changed = True
-                continue
-
-            if intersection not in seen_groups:
-                seen_groups[intersection] = (0, small_val)
-            else:
-                other_small, _ = seen_groups[intersection]
-                if small_val == other_small and intersection not in sets:
-                    sets[intersection] = small_val
-                    changed = True
-
-            if large_not_small not in seen_groups:
-                seen_groups[large_not_small] = (large_val - small_val, large_val)
-            else:
-                other_small, other_large = seen_groups[large_not_small]
-                if other_small != large_val and other_large != large_val - small_val:
-                    continue
-                val = large_val if other_small == large_val else other_large
-                if large_not_small not in sets:
-                    sets[large_not_small] = val
-                    changed = True
-
+        except BudgetExceeded:
+            return False
+        self.probabilities = probs
+        decided = {
+            pos: int(mine_weight == probs.weight)
+            for pos, mine_weight in probs.frontier_weights.items()
+            if mine_weight in (0, probs.weight)
+        }
+        if probs.num_interior and probs.interior_weight in (0, probs.weight):
+            val = int(probs.interior_weight == probs.weight)
+            for pos in self.field.unknown_cells():
+                if pos not in probs.frontier_weights:
+                    decided[pos] = val
+        changed = False
+        for pos, val in decided.items():
+            s = frozenset([pos])
+            if s not in sets:
+                sets[s] = val
+                changed = True
         return changed
 
     def apply_basic_logic(self, sets: SetDict) -> bool:
@@ -165,23 +383,30 @@ class Solver:
                 self.reveal_all(s)
                 changed = True
             elif len(s) == val:
-                self.num_mines -= len(s)
                 self.flag_all(s)
                 changed = True
         return changed
 
     def reveal_all(self, s: frozenset[Pos]):
         for pos in s:
+            # overlapping constraints can resolve the same cell
+            if self.field.get_value(pos) != ".":
+                continue
             self.field.reveal(pos)
-            self.unknowns.remove(pos)
+            self.changed.add(pos)
+            self.num_unknowns -= 1
 
     def flag_all(self, s: frozenset[Pos]):
         for pos in s:
+            if self.field.get_value(pos) != ".":
+                continue
             self.field.flag(pos)
-            self.unknowns.remove(pos)
+            self.changed.add(pos)
+            self.num_unknowns -= 1
+            self.num_mines -= 1
 
     def neighbors(self, pos: Pos) -> Iterable[Pos]:
-        for d_pos in STANDARD_ADJACENCY:
+        for d_pos in self.adjacency:
             npos = pos + d_pos
             if npos.is_valid():
                 yield npos
@@ -195,31 +420,22 @@ class Solver:
                 return True
         return False
 
-    def find_all_unknown(self) -> Iterable[Pos]:
-        for r, c in product(range(self.size[0]), range(self.size[1])):
-            pos = Pos(r, c)
-            if self.field.get_value(pos) == ".":
-                yield pos
-
     def find_all_bordering(self) -> Iterable[Pos]:
-        for r, c in product(range(self.size[0]), range(self.size[1])):
-            pos = Pos(r, c)
+        # only numbers can border unknown cells, and the field finds those without a full scan
+        for pos in self.field.number_cells():
             if self.is_bordering(pos):
                 yield pos
 
     def update_bordering(self) -> None:
-        new_bordering = set()
-        seen = self.bordering.copy()
-
-        while self.bordering:
-            pos = self.bordering.pop()
-            seen.add(pos)
+        """Re-checks only the cells that `is_bordering` can answer differently for since the last
+        update: the cells that changed and their neighbors.
+        """
+        to_check = set(self.changed)
+        for pos in self.changed:
+            to_check.update(self.neighbors(pos))
+        self.changed.clear()
+        for pos in to_check:
             if self.is_bordering(pos):
-                new_bordering.add(pos)
-            for npos in self.neighbors(pos):
-                if npos in seen:
-                    continue
-                if self.is_bordering(npos):
-                    new_bordering.add(npos)
-
-        self.bordering = new_bordering
+                self.bordering.add(pos)
+            else:
+                self.bordering.discard(pos)
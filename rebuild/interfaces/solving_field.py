@@ -1,12 +1,17 @@
-from itertools import product
-from typing import Any, cast, overload
-
-from colorama import Fore
+from collections.abc import Generator
+from typing import Any, overload
 
 from rebuild.interfaces.aliases import *
 from rebuild.interfaces.minefield import MineField
 from rebuild.interfaces.position import Pos
-from rebuild.settings import color_pallette
+from rebuild.interfaces.rendering import render
+
+
+# the value of each byte in the grid
+DECODED: tuple[SolvingFieldValue, ...] = (*range(9), ".", "F", "R")
+ENCODED: dict[str, int] = {".": UNKNOWN_CODE, "F": FLAGGED_CODE, "R": REVEALED_CODE}
+# maps the numbers to 1 and everything else to 0
+NUMBER_MASK = bytes(int(code < UNKNOWN_CODE) for code in range(256))
 
 
 class SolverError(Exception):
@@ -29,9 +34,13 @@ class SolutionField:
 
 
 class SolvingField:
-    """A class for storing the state of a minefield from the perspective of the solver."""
+    """A class for storing the state of a minefield from the perspective of the solver.
+
+    Every row is a `bytearray`, so the solver can find the unknown and numbered cells of a large
+    board by scanning the rows in C instead of looking at every cell.
+    """
 
-    __grid: list[list[SolvingFieldValue]]
+    __grid: list[bytearray]
 
     @overload
     def __init__(self, mine_field: MineField, /) -> None:
@@ -47,26 +56,30 @@ class SolvingField:
         ...
 
     def __init__(self, *args: Any) -> None:
-        def convert(s: str) -> SolvingFieldValue:
+        def convert(s: str) -> int:
             if s.isnumeric():
                 return int(s)
-            if s not in [".", "F", "R"]:
+            if s not in ENCODED:
                 raise ValueError
-            return cast(SolvingFieldValue, s)
+            return ENCODED[s]
 
         if len(args) == 1:
             mine_field = args[0]
             assert isinstance(mine_field, MineField)
             self.__solution_field = mine_field
-            self.__grid = [["."] * mine_field.size[1] for _ in range(mine_field.size[0])]
+            self.__grid = [
+                bytearray([UNKNOWN_CODE]) * mine_field.size[1] for _ in range(mine_field.size[0])
+            ]
             for pos, val in mine_field.all_revealed():
                 if val == "M":
                     raise ValueError
                 self.__grid[pos.r][pos.c] = val
         elif len(args) == 2:
-            test_input, solution = map(lambda s: s.strip().split(), args)
-            self.__grid = [[convert(s) for s in row] for row in test_input]
-            self.__solution_field = SolutionField(solution)
+            test_input, solution = args
+            self.__grid = [bytearray(convert(s) for s in row) for row in test_input.strip().split()]
+            self.__solution_field = SolutionField(
+                None if solution is None else solution.strip().split()
+            )
         else:
             raise NotImplementedError
         self.size = len(self.__grid), len(self.__grid[0])
@@ -74,61 +87,82 @@ class SolvingField:
         self.revealed = set()
         self.flagged = set()
 
+    @classmethod
+    def from_buffer(cls, buffer: bytes | memoryview, size: tuple[int, int]) -> "SolvingField":
+        """Copies a board encoded the way `to_bytes` encodes it, with no solution to check the
+        moves against. Every row is copied in one go, so this costs next to nothing.
+        """
+        field = cls.__new__(cls)
+        rows, columns = size
+        field.__grid = [bytearray(buffer[r * columns : (r + 1) * columns]) for r in range(rows)]
+        field.__solution_field = SolutionField(None)
+        field.size = size
+        Pos.set_bounds(*size)
+        field.revealed = set()
+        field.flagged = set()
+        return field
+
     def get_value(self, pos: Pos) -> SolvingFieldValue:
         if not pos.is_valid():
             raise ValueError
-        return self.__grid[pos.r][pos.c]
+        return DECODED[self.__grid[pos.r][pos.c]]
 
     def reveal(self, pos: Pos) -> None:
         if self.__solution_field.get_value(pos) == "M":
             raise SolverError
-        self.__grid[pos.r][pos.c] = "R"
+        self.__grid[pos.r][pos.c] = REVEALED_CODE
         self.revealed.add(pos)
 
     def flag(self, pos: Pos) -> None:
-        if self.__solution_field.get_value(pos) != "M":
+        if self.__solution_field.get_value(pos) not in ("M", None):
             raise SolverError
-        self.__grid[pos.r][pos.c] = "F"
+        self.__grid[pos.r][pos.c] = FLAGGED_CODE
         self.flagged.add(pos)
 
     def verify(self) -> bool:
         if self.__solution_field is None:
             raise ValueError("No verification is possible without a set `solution_field`.")
-        for r, c in product(range(self.size[0]), range(self.size[1])):
-            pos = Pos(r, c)
-            self_val = self.get_value(pos)
-            # revealing and flagging are already checked
-            # if the value is an integer, then it must have been revealed beforehand
-            if self_val == "R" or self_val == "F" or isinstance(self_val, int):
+        # revealing and flagging are already checked, so only the cells left unknown can be wrong
+        # if the value in the solution field is not unknown, then there should have been more
+        # actions taken and the solver failed
+        for pos in self.unknown_cells():
+            try:
+                self.__solution_field.get_value(pos)
+            except SolverError:  # the cell is unknown in the solution too
                 continue
-            # if the value in the solution field is not unknown, then there should have been more
-            # actions taken and the solver failed
-            if self.__solution_field.get_value(pos) != ".":
-                return False
+            return False
         return True
 
+    def count_unknown(self) -> int:
+        return sum(row.count(UNKNOWN_CODE) for row in self.__grid)
+
+    def unknown_cells(self) -> Generator[Pos, None, None]:
+        for r, row in enumerate(self.__grid):
+            c = row.find(UNKNOWN_CODE)
+            while c != -1:
+                yield Pos(r, c)
+                c = row.find(UNKNOWN_CODE, c + 1)
+
+    def number_cells(self) -> Generator[Pos, None, None]:
+        for r, row in enumerate(self.__grid):
+            numbers = row.translate(NUMBER_MASK)
+            c = numbers.find(1)
+            while c != -1:
+                yield Pos(r, c)
+                c = numbers.find(1, c + 1)
+
+    def to_bytes(self) -> bytes:
+        """Returns the encoded cells, row after row."""
+        return b"".join(self.__grid)
+
+    def rows(self) -> list[list[SolvingFieldValue]]:
+        return [[DECODED[code] for code in row] for row in self.__grid]
+
     def __str__(self) -> str:
-        def hex_to_ascii(hex_code: str) -> str:
-            hex_code = hex_code.lstrip("#")
-            r = int(hex_code[0:2], 16)
-            g = int(hex_code[2:4], 16)
-            b = int(hex_code[4:6], 16)
-            return f"\033[38;2;{r};{g};{b}m"
-
-        def convert(val: SolvingFieldValue) -> str:
-            if val == "F":
-                return Fore.RED + str(val) + Fore.RESET
-            if val == ".":
-                return Fore.LIGHTBLACK_EX + str(val) + Fore.RESET
-            if val == "R":
-                return Fore.CYAN + str(val) + Fore.RESET
-            if val == 0:
-                return " "
-            return hex_to_ascii(color_pallette.cell_colors[val - 1]) + str(val) + Fore.RESET
-
-        out = ""
-        for row in self.__grid:
-            for val in row:
-                out += convert(val)
-            out += "\n"
-        return out
+        return render(self, plain_text)
+
+
+def plain_text(field: SolvingField) -> str:
+    return "".join(
+        "".join(" " if val == 0 else str(val) for val in row) + "\n" for row in field.rows()
+    )
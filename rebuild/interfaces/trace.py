@@ -0,0 +1,52 @@
+import sys
+from enum import IntEnum
+from typing import TextIO
+
+from rebuild.interfaces.position import Pos
+
+SetDict = dict[frozenset[Pos], int]
+
+
+class TraceLevel(IntEnum):
+    SILENT = 0
+    SUMMARY = 1  # one line once solving stops
+    STEP = 2  # the board after every step
+    RULE = 3  # the constraints after every rule
+
+
+class Tracer:
+    """Writes solver output up to a given `TraceLevel`.
+
+    Everything that is costly to format is built only once the level check passes.
+    """
+
+    def __init__(self, level: TraceLevel = TraceLevel.SILENT, stream: TextIO | None = None):
+        self.level = level
+        self.stream = stream
+        if level >= TraceLevel.STEP:
+            try:  # colour the boards when the presentation dependencies are installed
+                import rebuild.presentation.ansi
+            except ImportError:
+                pass
+
+    def write(self, text: str) -> None:
+        print(text, file=self.stream or sys.stdout)
+
+    def summary(self, steps: int, num_unknowns: int, num_mines: int) -> None:
+        if self.level >= TraceLevel.SUMMARY:
+            self.write(
+                f"Stopped after {steps} steps with {num_unknowns} unknowns and "
+                f"{num_mines} mines left"
+            )
+
+    def step(self, step: int, field: object) -> None:
+        if self.level >= TraceLevel.STEP:
+            self.write(f"Step {step}:\n{field}")
+
+    def rule(self, name: str, sets: SetDict) -> None:
+        if self.level >= TraceLevel.RULE:
+            constraints = ", ".join(
+                f"{{{', '.join(map(str, sorted(s, key=lambda p: (p.r, p.c))))}}}={val}"
+                for s, val in sets.items()
+            )
+            self.write(f"  {name}: {len(sets)} constraints: {constraints}")
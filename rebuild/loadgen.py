@@ -0,0 +1,330 @@
+"""
+Simulates many concurrent bots playing on the game server and reports how it held up.
+
+Every bot plays its games over its own connection. It asks for the state of the board, reveals and
+flags whatever the rebuild `Solver` can deduce, and guesses a random unknown cell when it cannot
+deduce anything. Each bot has its own seeded random generator, so a configuration always plays the
+same guesses, and the report records the configuration next to the results.
+
+By default the server runs in a child process on a Unix socket, and the bots solve their boards in
+a pool of worker processes. Neither the bots' solving nor their event loop then share a CPU core
+with the server, so the latencies measure the server and not the bots. Use `--host`/`--port` or
+`--unix` to load an already running server instead.
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import tracemalloc
+from collections.abc import Awaitable, Callable
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from random import Random
+from time import perf_counter
+from typing import Any
+
+from rebuild.interfaces.position import Pos
+from rebuild.interfaces.solver import Solver
+from rebuild.server import GameServer, Request, Response, run
+
+SERVER_START_TIMEOUT = 10.0  # seconds to wait for the server process to listen
+
+ACTIONS = ("reveal", "flag")
+PERCENTILES = (50, 95, 99)
+MEMORY_SAMPLES = 16
+
+Connect = Callable[[], Awaitable[tuple[asyncio.StreamReader, asyncio.StreamWriter]]]
+
+
+@dataclass
+class LoadConfig:
+    bots: int = 16
+    games: int = 4  # per bot
+    size: tuple[int, int] = (16, 30)
+    mines: int = 99
+    rate: float = 0.0  # actions per second per bot, 0 for as fast as possible
+    seed: int = 0
+
+
+@dataclass
+class LoadStats:
+    latencies: dict[str, list[float]] = field(default_factory=dict)
+    won: int = 0
+    lost: int = 0
+    guesses: int = 0
+    errors: int = 0
+
+    def record(self, op: str, seconds: float) -> None:
+        self.latencies.setdefault(op, []).append(seconds)
+
+
+def percentile(sorted_values: list[float], percent: float) -> float:
+    """Nearest rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * percent // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def latency_summary(values: list[float]) -> dict[str, float]:
+    values = sorted(values)
+    summary = {f"p{p}": percentile(values, p) * 1000 for p in PERCENTILES}
+    summary["max"] = values[-1] * 1000 if values else 0.0
+    summary["count"] = len(values)
+    return summary
+
+
+class Client:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.reader = reader
+        self.writer = writer
+
+    async def request(self, request: Request) -> tuple[Response, float]:
+        start = perf_counter()
+        self.writer.write(json.dumps(request).encode() + b"\n")
+        await self.writer.drain()
+        line = await self.reader.readline()
+        if not line:
+            raise ConnectionError("The server closed the connection")
+        return json.loads(line), perf_counter() - start
+
+    async def close(self) -> None:
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+class Pacer:
+    """Spaces out the actions of a bot to `rate` per second."""
+
+    def __init__(self, rate: float) -> None:
+        self.interval = 1 / rate if rate > 0 else 0.0
+        self.next_time = perf_counter()
+
+    async def wait(self) -> None:
+        if not self.interval:
+            return
+        delay = self.next_time - perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        self.next_time = max(self.next_time, perf_counter()) + self.interval
+
+
+def solver_moves(rows: list[str], num_mines: int) -> tuple[list[Pos], list[Pos]]:
+    """Returns the cells the solver can reveal and flag from the board the server sent."""
+    num_flags = sum(row.count("F") for row in rows)
+    solver = Solver(f"{num_mines - num_flags}\n" + "\n".join(rows), None)
+    solver.solve()
+    return list(solver.field.revealed), list(solver.field.flagged)
+
+
+class Bot:
+    def __init__(
+        self,
+        bot_id: int,
+        client: Client,
+        config: LoadConfig,
+        stats: LoadStats,
+        executor: Executor | None = None,
+    ):
+        self.client = client
+        self.executor = executor
+        self.config = config
+        self.stats = stats
+        self.rng = Random(f"{config.seed}/{bot_id}")
+        self.pacer = Pacer(config.rate)
+
+    async def send(self, request: Request) -> Response:
+        if request["op"] in ACTIONS:
+            await self.pacer.wait()
+        response, seconds = await self.client.request(request)
+        self.stats.record(request["op"], seconds)
+        if "error" in response:
+            self.stats.errors += 1
+        return response
+
+    async def play(self) -> None:
+        rows, columns = self.config.size
+        new = {"op": "new", "size": [rows, columns], "mines": self.config.mines}
+        game = (await self.send(new))["game"]
+        response = await self.send({"op": "reveal", "game": game, "pos": [rows // 2, columns // 2]})
+        while not response.get("lost") and not response.get("won") and "error" not in response:
+            board = (await self.send({"op": "state", "game": game}))["rows"]
+            # solved off the event loop, so the other bots' requests are timed while it runs
+            reveals, flags = await asyncio.get_running_loop().run_in_executor(
+                self.executor, solver_moves, board, self.config.mines
+            )
+            if not reveals and not flags:
+                unknowns = [
+                    Pos(r, c)
+                    for r, row in enumerate(board)
+                    for c, val in enumerate(row)
+                    if val == "."
+                ]
+                reveals = [self.rng.choice(unknowns)]
+                self.stats.guesses += 1
+            for pos in flags:
+                await self.send({"op": "flag", "game": game, "pos": [pos.r, pos.c]})
+            for pos in reveals:
+                response = await self.send({"op": "reveal", "game": game, "pos": [pos.r, pos.c]})
+                if response.get("lost") or response.get("won") or "error" in response:
+                    break
+        if response.get("won"):
+            self.stats.won += 1
+        elif response.get("lost"):
+            self.stats.lost += 1
+        await self.send({"op": "close", "game": game})
+
+
+async def run_bots(connect: Connect, config: LoadConfig, stats: LoadStats) -> None:
+    with ProcessPoolExecutor() as executor:
+
+        async def run_bot(bot_id: int) -> None:
+            client = Client(*await connect())
+            bot = Bot(bot_id, client, config, stats, executor)
+            for _ in range(config.games):
+                await bot.play()
+            await client.close()
+
+        await asyncio.gather(*(run_bot(bot_id) for bot_id in range(config.bots)))
+
+
+def serve_unix(path: str) -> None:
+    """Runs a server on the Unix socket at `path`. The target of the server process."""
+    asyncio.run(run("", 0, path))
+
+
+async def start_server(path: str) -> multiprocessing.Process:
+    """Starts a server process listening on `path` and waits until it accepts connections."""
+    process = multiprocessing.Process(target=serve_unix, args=(path,), daemon=True)
+    process.start()
+    deadline = perf_counter() + SERVER_START_TIMEOUT
+    while True:
+        try:
+            _, writer = await asyncio.open_unix_connection(path)
+        except (FileNotFoundError, ConnectionRefusedError):
+            if not process.is_alive() or perf_counter() > deadline:
+                process.terminate()
+                raise RuntimeError("The server process did not start listening")
+            await asyncio.sleep(0.01)
+            continue
+        writer.close()
+        await writer.wait_closed()
+        return process
+
+
+async def server_stats(connect: Connect) -> Response:
+    client = Client(*await connect())
+    response, _ = await client.request({"op": "stats"})
+    await client.close()
+    return response
+
+
+def measure_game_memory(config: LoadConfig, samples: int = MEMORY_SAMPLES) -> float:
+    """Returns the bytes the server allocates for a started game of the configured size."""
+    server = GameServer()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for _ in range(samples):
+        game = server.handle({"op": "new", "size": list(config.size), "mines": config.mines})
+        rows, columns = config.size
+        server.handle({"op": "reveal", "game": game["game"], "pos": [rows // 2, columns // 2]})
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / samples
+
+
+async def run_load(config: LoadConfig, connect: Connect | None = None) -> dict[str, Any]:
+    """Runs the load test, starting a server process unless `connect` is given."""
+    stats = LoadStats()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        process = None
+        if connect is None:
+            path = os.path.join(tmp_dir, "server.sock")
+            process = await start_server(path)
+            connect = lambda: asyncio.open_unix_connection(path)
+        try:
+            start = perf_counter()
+            await run_bots(connect, config, stats)
+            seconds = perf_counter() - start
+            server = await server_stats(connect)
+        finally:
+            if process is not None:
+                process.terminate()
+                process.join()
+    return make_report(config, stats, seconds, server)
+
+
+def make_report(
+    config: LoadConfig, stats: LoadStats, seconds: float, server: Response
+) -> dict[str, Any]:
+    actions = [latency for op in ACTIONS for latency in stats.latencies.get(op, [])]
+    requests = sum(len(latencies) for latencies in stats.latencies.values())
+    games = stats.won + stats.lost
+    return {
+        "config": asdict(config),
+        "environment": {"python": sys.version.split()[0], "platform": platform.platform()},
+        "seconds": seconds,
+        "games": games,
+        "won": stats.won,
+        "lost": stats.lost,
+        "guesses": stats.guesses,
+        "errors": stats.errors,
+        "throughput": {
+            "games per second": games / seconds,
+            "actions per second": len(actions) / seconds,
+            "requests per second": requests / seconds,
+        },
+        "latency ms": {
+            "actions": latency_summary(actions),
+            **{op: latency_summary(latencies) for op, latencies in sorted(stats.latencies.items())},
+        },
+        "memory per game bytes": measure_game_memory(config),
+        "server": server,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--bots", type=int, default=LoadConfig.bots)
+    parser.add_argument("--games", type=int, default=LoadConfig.games, help="games per bot")
+    parser.add_argument("--size", type=int, nargs=2, default=LoadConfig.size)
+    parser.add_argument("--mines", type=int, default=LoadConfig.mines)
+    parser.add_argument("--rate", type=float, default=LoadConfig.rate)
+    parser.add_argument("--seed", type=int, default=LoadConfig.seed)
+    parser.add_argument("--host", help="host of a running server")
+    parser.add_argument("--port", type=int, help="port of a running server")
+    parser.add_argument("--unix", help="Unix socket of a running server")
+    parser.add_argument("--output", help="where to write the JSON report")
+    args = parser.parse_args()
+
+    config = LoadConfig(
+        args.bots, args.games, tuple(args.size), args.mines, args.rate, args.seed  # type: ignore
+    )
+    connect: Connect | None = None
+    if args.unix is not None:
+        connect = lambda: asyncio.open_unix_connection(args.unix)
+    elif args.port is not None:
+        connect = lambda: asyncio.open_connection(args.host or "127.0.0.1", args.port)
+    report = asyncio.run(run_load(config, connect))
+
+    text = json.dumps(report, indent=4)
+    if args.output is None:
+        print(text)
+        return
+    with open(args.output, "w") as f:
+        f.write(text + "\n")
+    actions = report["latency ms"]["actions"]
+    print(
+        f"{report['games']} games in {report['seconds']:.2f}s, "
+        f"{report['throughput']['actions per second']:.0f} actions/s, "
+        f"p50 {actions['p50']:.2f}ms p95 {actions['p95']:.2f}ms p99 {actions['p99']:.2f}ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+from functools import cache
+
+from colorama import Fore
+
+from rebuild.interfaces.minefield import MineField
+from rebuild.interfaces.position import Pos
+from rebuild.interfaces.rendering import register_renderer
+from rebuild.interfaces.solving_field import SolvingField
+from rebuild.settings import load_color_pallette
+
+
+def hex_to_ascii(hex_code: str) -> str:
+    hex_code = hex_code.lstrip("#")
+    r = int(hex_code[0:2], 16)
+    g = int(hex_code[2:4], 16)
+    b = int(hex_code[4:6], 16)
+    return f"\033[38;2;{r};{g};{b}m"
+
+
+@cache
+def number_colors() -> tuple[str, ...]:
+    """The rendered numbers 1-8, indexed by `value - 1`."""
+    return tuple(
+        hex_to_ascii(color) + str(val) + Fore.RESET
+        for val, color in enumerate(load_color_pallette().cell_colors, start=1)
+    )
+
+
+@cache
+def solving_field_palette() -> dict:
+    palette: dict = {
+        "F": Fore.RED + "F" + Fore.RESET,
+        ".": Fore.LIGHTBLACK_EX + "." + Fore.RESET,
+        "R": Fore.CYAN + "R" + Fore.RESET,
+        0: " ",
+    }
+    palette.update(enumerate(number_colors(), start=1))
+    return palette
+
+
+@cache
+def mine_field_palette(revealed: bool) -> dict:
+    palette: dict = {"M": Fore.RED + "M" + Fore.RESET, 0: " "}
+    if revealed:
+        palette.update(enumerate(number_colors(), start=1))
+    else:
+        palette.update((val, Fore.LIGHTBLACK_EX + str(val) + Fore.RESET) for val in range(1, 9))
+    return palette
+
+
+def render_mine_field(mine_field: MineField) -> str:
+    revealed, hidden = mine_field_palette(True), mine_field_palette(False)
+    return "".join(
+        "".join(
+            (revealed if mine_field.is_revealed(Pos(r, c)) else hidden)[val]
+            for c, val in enumerate(row)
+        )
+        + "\n"
+        for r, row in enumerate(mine_field.rows())
+    )
+
+
+def render_solving_field(field: SolvingField) -> str:
+    palette = solving_field_palette()
+    return "".join("".join(palette[val] for val in row) + "\n" for row in field.rows())
+
+
+register_renderer(MineField, render_mine_field)
+register_renderer(SolvingField, render_solving_field)
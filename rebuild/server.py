@@ -0,0 +1,252 @@
+"""
+Hosts many headless games at once over a local socket, so bots, load generators and other front
+ends can play without a window.
+
+Every request and response is a JSON object on its own line. Requests name an `op`:
+
+- `new` with `size` ([rows, columns]) and `mines` starts a game and returns its `game` id. The
+  mines are placed on the first reveal, which is always safe.
+- `reveal`, `flag` and `chord` with `game` and `pos` ([row, column]) play a move. Flagging a flag
+  removes it.
+- `state` with `game` returns the board as strings, using the characters of the solver tests.
+- `close` with `game` ends a game. The games of a client are also closed once it disconnects.
+- `stats` returns the number of games served.
+
+Any request can carry an `id`, which is copied into its response. Failed requests get an `error`.
+
+All games share one event loop thread, so each request runs to completion before the next one
+starts. That is what makes sharing the global `Pos` bounds safe, as they are set to the size of a
+game at the start of every request on it.
+"""
+
+import argparse
+import asyncio
+import json
+from itertools import count
+from time import perf_counter
+from typing import Any
+
+from rebuild.interfaces.minefield import MineField
+from rebuild.interfaces.position import Pos
+
+MAX_POOLED = 64  # free fields kept for every board size and mine count
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+Request = dict[str, Any]
+Response = dict[str, Any]
+
+
+class RequestError(Exception):
+    """Raised for requests that cannot be served, and sent back to the client as an error."""
+
+
+class ServerGame:
+    def __init__(self, mine_field: MineField) -> None:
+        self.mine_field = mine_field
+        self.started = False
+        self.lost = False
+        self.won = False
+
+    @property
+    def num_safe(self) -> int:
+        rows, columns = self.mine_field.size
+        return rows * columns - self.mine_field.num_mines
+
+    def check_result(self, revealed: set[Pos]) -> None:
+        if any(self.mine_field.get_value(pos) == "M" for pos in revealed):
+            self.lost = True
+        elif self.mine_field.num_revealed() == self.num_safe:
+            self.won = True
+
+    def rows(self) -> list[str]:
+        rows, columns = self.mine_field.size
+        return ["".join(self.cell(Pos(r, c)) for c in range(columns)) for r in range(rows)]
+
+    def cell(self, pos: Pos) -> str:
+        if self.mine_field.is_revealed(pos):
+            return str(self.mine_field.get_value(pos))
+        if self.mine_field.is_flagged(pos):
+            return "F"
+        return "."
+
+
+class FieldPool:
+    """Finished mine fields kept by size and mine count, so new games reuse their grids."""
+
+    def __init__(self, max_pooled: int = MAX_POOLED) -> None:
+        self.max_pooled = max_pooled
+        self.free: dict[tuple[tuple[int, int], int], list[MineField]] = {}
+
+    def take(self, size: tuple[int, int], num_mines: int) -> MineField:
+        fields = self.free.get((size, num_mines))
+        if fields:
+            mine_field = fields.pop()
+            mine_field.reset()
+            return mine_field
+        return MineField(size, num_mines)
+
+    def give(self, mine_field: MineField) -> None:
+        fields = self.free.setdefault((mine_field.size, mine_field.num_mines), [])
+        if len(fields) < self.max_pooled:
+            fields.append(mine_field)
+
+
+class GameServer:
+    def __init__(self, max_pooled: int = MAX_POOLED) -> None:
+        self.pool = FieldPool(max_pooled)
+        self.games: dict[int, ServerGame] = {}
+        self.ids = count()
+        self.games_started = 0
+        self.games_finished = 0
+        self.start_time = perf_counter()
+
+    def handle(self, request: Request, owned: set[int] | None = None) -> Response:
+        """Serves a single request. The ids of games started by it are added to `owned`."""
+        response: Response = {} if "id" not in request else {"id": request["id"]}
+        try:
+            op = request.get("op")
+            if op == "new":
+                game_id = self.new_game(request)
+                if owned is not None:
+                    owned.add(game_id)
+                response["game"] = game_id
+            elif op == "stats":
+                response.update(self.stats())
+            elif op in ("reveal", "flag", "chord", "state", "close"):
+                game_id = request.get("game")
+                if game_id not in self.games:
+                    raise RequestError(f"No game with the id {game_id}")
+                response.update(getattr(self, op)(game_id, request))
+                if op == "close" and owned is not None:
+                    owned.discard(game_id)
+            else:
+                raise RequestError(f"Unknown op {op!r}")
+        except (RequestError, KeyError, TypeError, ValueError) as e:
+            response["error"] = str(e) or type(e).__name__
+        return response
+
+    def new_game(self, request: Request) -> int:
+        rows, columns = request["size"]
+        num_mines = request["mines"]
+        if rows <= 0 or columns <= 0 or not 0 <= num_mines < rows * columns:
+            raise RequestError("Invalid size or mine count")
+        game_id = next(self.ids)
+        self.games[game_id] = ServerGame(self.pool.take((rows, columns), num_mines))
+        self.games_started += 1
+        return game_id
+
+    def game_at(self, game_id: int, request: Request) -> tuple[ServerGame, Pos]:
+        game = self.games[game_id]
+        Pos.set_bounds(*game.mine_field.size)
+        pos = Pos(*request["pos"])
+        if not pos.is_valid():
+            raise RequestError(f"{pos} is not on the board")
+        if game.lost or game.won:
+            raise RequestError("The game is over")
+        return game, pos
+
+    def result(self, game: ServerGame, revealed: set[Pos]) -> Response:
+        game.check_result(revealed)
+        if game.lost or game.won:
+            self.games_finished += 1
+        return {
+            "revealed": [[pos.r, pos.c, game.mine_field.get_value(pos)] for pos in revealed],
+            "lost": game.lost,
+            "won": game.won,
+        }
+
+    def reveal(self, game_id: int, request: Request) -> Response:
+        game, pos = self.game_at(game_id, request)
+        if not game.started:
+            game.mine_field.generate(pos)
+            game.started = True
+            revealed = {revealed_pos for revealed_pos, _ in game.mine_field.all_revealed()}
+        else:
+            revealed = game.mine_field.mark_all_revealed([pos])
+        return self.result(game, revealed)
+
+    def chord(self, game_id: int, request: Request) -> Response:
+        game, pos = self.game_at(game_id, request)
+        if not game.started:
+            raise RequestError("The game has not started")
+        return self.result(game, game.mine_field.chord(pos))
+
+    def flag(self, game_id: int, request: Request) -> Response:
+        game, pos = self.game_at(game_id, request)
+        if game.mine_field.is_revealed(pos):
+            raise RequestError(f"{pos} is revealed")
+        if game.mine_field.is_flagged(pos):
+            game.mine_field.unflag(pos)
+        else:
+            game.mine_field.flag(pos)
+        return {"flagged": game.mine_field.is_flagged(pos)}
+
+    def state(self, game_id: int, request: Request) -> Response:
+        game = self.games[game_id]
+        Pos.set_bounds(*game.mine_field.size)
+        return {"rows": game.rows(), "lost": game.lost, "won": game.won}
+
+    def close(self, game_id: int, request: Request | None = None) -> Response:
+        game = self.games.pop(game_id)
+        self.pool.give(game.mine_field)
+        return {"closed": game_id}
+
+    def stats(self) -> Response:
+        seconds = perf_counter() - self.start_time
+        return {
+            "games": len(self.games),
+            "started": self.games_started,
+            "finished": self.games_finished,
+            "seconds": seconds,
+            "finished per second": self.games_finished / seconds if seconds else 0.0,
+        }
+
+    async def serve_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        owned: set[int] = set()
+        try:
+            while line := await reader.readline():
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("Requests must be objects")
+                except ValueError as e:
+                    response: Response = {"error": f"Malformed request: {e}"}
+                else:
+                    response = self.handle(request, owned)
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            for game_id in owned:
+                if game_id in self.games:
+                    self.close(game_id)
+            writer.close()
+
+    async def serve(
+        self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, path: str | None = None
+    ) -> asyncio.Server:
+        """Starts listening on a TCP port, or on a Unix socket if `path` is set."""
+        if path is not None:
+            return await asyncio.start_unix_server(self.serve_client, path)
+        return await asyncio.start_server(self.serve_client, host, port)
+
+
+async def run(host: str, port: int, path: str | None) -> None:
+    server = await GameServer().serve(host, port, path)
+    async with server:
+        await server.serve_forever()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", help="path of a Unix socket to listen on instead")
+    args = parser.parse_args()
+    asyncio.run(run(args.host, args.port, args.unix))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,23 @@
-from os.path import join
+from functools import cache
+from os.path import exists, join
 import json
-from pydantic import BaseModel
+from typing import TYPE_CHECKING, NamedTuple
+
+if TYPE_CHECKING:
+    from rebuild.settings_models import ColorPallette
 
 # region: colors
-class ColorPallette(BaseModel):
-    background: str
-    header_color: str
-    light_field: str
-    dark_field: str
-    light_empty: str
-    dark_empty: str
-    light_field_highlight: str
-    dark_field_highlight: str
-    light_empty_highlight: str
-    dark_empty_highlight: str
-    separator_color: str
-    cell_colors: list
-    revealed: str
-    flagged: str
-    
-with open(join("assets", "color pallettes.json")) as f:
-    color_data = json.load(f)
-
-color_pallette = ColorPallette.model_validate(color_data["default"])
+COLOR_PALLETTES_PATH = join("assets", "color pallettes.json")
+COLOR_PALLETTE_NAME = "default"
+
+
+@cache
+def load_color_pallette() -> "ColorPallette":
+    from rebuild.settings_models import ColorPallette
+
+    with open(COLOR_PALLETTES_PATH) as f:
+        color_data = json.load(f)
+    return ColorPallette.model_validate(color_data[COLOR_PALLETTE_NAME])
 
 
 # endregion: colors
@@ -55,6 +50,60 @@ CENTER_DISPERSAL_RADIUS = 1.5
 CORNER_DISPERSAL_RADIUS = 2.5
 # endregion: constants
 
+# region: game settings
+GAME_SETTINGS_PATH = join("src", "settings.json")
+
+
+class GameSettings(NamedTuple):
+    """The game options of `src/settings.json`, each defaulting to the constant it overrides."""
+
+    grid_size: tuple[int, int]  # (rows, columns)
+    mine_percent: float
+    neighboring_pattern: str
+    adjacency: list[list[int]]
+    max_fps: int
+
+    @property
+    def num_mines(self) -> int:
+        return int(self.mine_percent * self.grid_size[0] * self.grid_size[1])
+
+
+@cache
+def load_game_settings() -> GameSettings:
+    """Merges `src/settings.json` over the constants of this module.
+
+    The file is read as plain JSON, so the solver path can use the settings without pydantic.
+    """
+    data = {}
+    if exists(GAME_SETTINGS_PATH):
+        with open(GAME_SETTINGS_PATH) as f:
+            data = json.load(f)
+    pattern = data.get("neighboring pattern", "STANDARD")
+    patterns = {"STANDARD": CLASSIC, "CLASSIC": CLASSIC, "KNIGHT": KNIGHT}
+    rows, columns = data.get("grid size", (MINE_FIELD_HEIGHT, MINE_FIELD_WIDTH))
+    game_settings = GameSettings(
+        (int(rows), int(columns)),
+        float(data.get("mine percent", MINE_PERCENT)),
+        pattern,
+        data.get(pattern, patterns.get(pattern, ADJACENCY)),
+        int(data.get("max fps", MAX_FPS)),
+    )
+    if not 0 <= game_settings.mine_percent < 1:
+        raise ValueError(f"The mine percent in {GAME_SETTINGS_PATH} must be in [0, 1)")
+    return game_settings
+
+
+def __getattr__(name: str):
+    # loaded on first access, so that importing the settings stays free of pydantic and file IO
+    if name == "color_pallette":
+        return load_color_pallette()
+    if name == "game_settings":
+        return load_game_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# endregion: game settings
+
 # region: data
 CORNERS = [
     # topleft
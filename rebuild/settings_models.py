@@ -0,0 +1,19 @@
+from pydantic import BaseModel
+
+
+class ColorPallette(BaseModel):
+    background: str
+    header_color: str
+    light_field: str
+    dark_field: str
+    light_empty: str
+    dark_empty: str
+    light_field_highlight: str
+    dark_field_highlight: str
+    light_empty_highlight: str
+    dark_empty_highlight: str
+    separator_color: str
+    cell_colors: list
+    revealed: str
+    flagged: str
+
@@ -1,6 +1,11 @@
+import os
 import pygame
 from os.path import join
 from _game import Game
+from board import POOL_KEY
+from board_pool import BoardPool
+from high_scores import HighScores, score_key
+from replay import REPLAYS_DIR
 
 
 # region setup
@@ -29,6 +34,7 @@ MAX_FPS = 60
 
 MINE_IMAGE_PATH = join("assets", "mine.gif")
 HIGH_SCORES_PATH = join("High Scores.txt")
+BOARD_POOL_PATH = join("Board Pool.json")
 
 pygame.display.set_caption("Minesweeper")
 ICON = pygame.image.load(MINE_IMAGE_PATH)
@@ -39,38 +45,28 @@ SCREEN = pygame.display.set_mode(SCREEN_SIZE, pygame.RESIZABLE)
 
 
 def main():
+    board_pool = BoardPool(BOARD_POOL_PATH)
+    board_pool.refill(POOL_KEY)
+    high_scores = HighScores(HIGH_SCORES_PATH)
     while True:
-        game = Game(SCREEN)
+        game = Game(SCREEN, board_pool)
         game.run()
+        save_replay(game)
         if not game.did_win():
             continue
-        write_high_score(game.get_starting_time())
+        write_high_score(high_scores, game.get_starting_time())
 
 
-def write_high_score(starting_time: int):
+def save_replay(game: Game):
+    if game.recorder.first_click is None:
+        return
+    os.makedirs(REPLAYS_DIR, exist_ok=True)
+    game.recorder.save(join(REPLAYS_DIR, f"{game.seed:016x}.replay"))
+
+
+def write_high_score(high_scores: HighScores, starting_time: int):
     score = int((pygame.time.get_ticks() - starting_time) / 1000)
-    with open(HIGH_SCORES_PATH) as f:
-        lines = f.read().split("\n")
-    for i, line in enumerate(lines):
-        line = line.split(";")
-        if not len(line):
-            continue
-        if (
-            line[0] == f"{GRID_SIZE[0]}*{GRID_SIZE[1]}"
-            and line[1] == str(MINE_PERCENT)
-            and line[2] == str(NEIGHBORING)
-        ):
-            if int(line[3]) > score:
-                lines[i] = f"{GRID_SIZE[0]}*{GRID_SIZE[1]};{MINE_PERCENT};{NEIGHBORING};{score}"
-            break
-    else:
-        lines.append(f"{GRID_SIZE[0]}*{GRID_SIZE[1]};{MINE_PERCENT};{NEIGHBORING};{score}")
-    with open(HIGH_SCORES_PATH, mode="w") as f:
-        string = ""
-        for line in lines:
-            if line:
-                string += line + "\n"
-        f.write(string)
+    high_scores.record(score_key(GRID_SIZE, MINE_PERCENT, NEIGHBORING), score)
 
 
 if __name__ == "__main__":
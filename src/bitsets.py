@@ -0,0 +1,153 @@
+"""
+Constraints as bitmasks over a numbering of the cells they cover.
+
+A constraint is an int with one bit per cell, so subset and intersection tests are single integer
+operations and the sizes are popcounts. The rules here are the pairwise rules of the solvers,
+applied to a `MaskDict` with the same order of edits as on a `SetDict`, so both reach the same
+constraints. Only the `Frontier` that numbered the cells can turn the masks back into cells.
+
+The legacy game cannot import the rebuild package, so `rebuild.interfaces.bitsets` imports this
+module from `src` instead. A cell is anything hashable: a (row, column) tuple in the legacy solver,
+a `Pos` in the rebuild.
+"""
+
+from collections.abc import Hashable, Iterable
+from itertools import combinations
+
+Cell = Hashable
+SetDict = dict[frozenset[Cell], int]
+MaskDict = dict[int, int]  # cells -> number of mines among them
+
+
+class Frontier:
+    """Numbers the cells of some constraints, giving every cell a bit."""
+
+    def __init__(self) -> None:
+        self.cells: list[Cell] = []
+        self.index: dict[Cell, int] = {}
+        # the cells of every mask seen, so unchanged constraints are not rebuilt
+        self.decoded: dict[int, frozenset[Cell]] = {}
+
+    def bit(self, pos: Cell) -> int:
+        """Returns the bit of `pos`, numbering it if it is new."""
+        i = self.index.get(pos)
+        if i is None:
+            i = self.index[pos] = len(self.cells)
+            self.cells.append(pos)
+        return 1 << i
+
+    def mask(self, s: Iterable[Cell]) -> int:
+        mask = 0
+        for pos in s:
+            mask |= self.bit(pos)
+        return mask
+
+    def cells_of(self, mask: int) -> frozenset[Cell]:
+        s = self.decoded.get(mask)
+        if s is None:
+            s = self.decoded[mask] = frozenset(
+                self.cells[i] for i in range(mask.bit_length()) if mask >> i & 1
+            )
+        return s
+
+    def encode(self, sets: SetDict) -> MaskDict:
+        masks = {}
+        for s, val in sets.items():
+            mask = self.mask(s)
+            self.decoded[mask] = s
+            masks[mask] = val
+        return masks
+
+    def decode(self, masks: MaskDict) -> SetDict:
+        return {self.cells_of(mask): val for mask, val in masks.items()}
+
+
+def check_subsets(masks: MaskDict) -> bool:
+    changed = False
+    for (mask1, val1), (mask2, val2) in combinations(list(masks.items()), 2):
+        common = mask1 & mask2
+        if common == mask1:
+            superset, superset_val, subset, subset_val = mask2, val2, mask1, val1
+        elif common == mask2:
+            superset, superset_val, subset, subset_val = mask1, val1, mask2, val2
+        else:
+            continue
+
+        new_mask = superset ^ subset
+        if superset in masks:
+            masks.pop(superset)
+            changed = True
+        if new_mask and new_mask not in masks:
+            masks[new_mask] = superset_val - subset_val
+            changed = True
+
+    return changed
+
+
+def check_squeezes(masks: MaskDict) -> bool:
+    """
+    Check for "squeezes" that could occur.
+    Ex:
+    ....
+    .12#
+    The cell in the top right must be a mine and the leftmost two cells must not be mines.
+    """
+    seen_groups: dict[int, tuple[int, int]] = {}
+    changed = False
+    for (mask1, val1), (mask2, val2) in combinations(list(masks.items()), 2):
+        # no squeeze can happen if both cells have the same values
+        if val1 == 0 or val2 == 0 or val1 == val2:
+            continue
+
+        intersection = mask1 & mask2
+        # squeezes can only happen when a number of mines in an area is limited by an adjacent
+        # cell, thus the shared area between the sets must be more than the minimum number of
+        # mines in an area
+        if intersection.bit_count() < min(val1, val2) + 1:
+            continue
+
+        large_mask, small_val, large_val = (
+            (mask2, val1, val2) if val1 < val2 else (mask1, val2, val1)
+        )
+        large_not_small = large_mask ^ intersection
+        # after limiting the number of mines that can be in the intersecting area, there must be
+        # mines in the larger, non-intersecting area
+        if large_not_small.bit_count() == large_val - small_val:
+            if intersection not in masks:
+                masks[intersection] = small_val
+                changed = True
+            continue
+
+        if intersection not in seen_groups:
+            seen_groups[intersection] = (0, small_val)
+        else:
+            other_small, _ = seen_groups[intersection]
+            if small_val == other_small and intersection not in masks:
+                masks[intersection] = small_val
+                changed = True
+
+        if large_not_small not in seen_groups:
+            seen_groups[large_not_small] = (large_val - small_val, large_val)
+        else:
+            other_small, other_large = seen_groups[large_not_small]
+            if other_small != large_val and other_large != large_val - small_val:
+                continue
+            val = large_val if other_small == large_val else other_large
+            if large_not_small not in masks:
+                masks[large_not_small] = val
+                changed = True
+
+    return changed
+
+
+def basic_logic(masks: MaskDict) -> tuple[int, int]:
+    """Returns the masks of the cells to reveal and to flag."""
+    to_reveal = to_flag = 0
+    for mask, val in masks.items():
+        if mask == 0 or val > mask.bit_count():
+            raise ValueError("Sets/values are malformed")
+        if val == 0:
+            to_reveal |= mask
+        elif mask.bit_count() == val:
+            to_flag |= mask
+    return to_reveal, to_flag
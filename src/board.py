@@ -0,0 +1,203 @@
+"""The state and rules of a game, without anything to do with displaying it."""
+
+from random import Random, getrandbits
+from typing import Iterable, Literal
+from solver import Solver, bind_verifier, PlayerPosition
+from board_pool import BoardPool, pool_key
+from replay import GameRecorder
+
+
+# region game modes
+STANDARD = [[-1, -1], [-1, 0], [-1, 1], [0, -1], [0, 1], [1, -1], [1, 0], [1, 1]]
+KNIGHT = [
+    [1, 2],
+    [1, -2],
+    [2, 1],
+    [2, -1],
+    [-1, 2],
+    [-1, -2],
+    [-2, 1],
+    [-2, -1],
+]
+NEIGHBORING = STANDARD  # edit this to change the game mode!
+MINE_PERCENT = 0.24
+assert MINE_PERCENT < 1, "MINE_PERCENT must be less than 1"
+GRID_SIZE = 20, 24  # (number of rows, number of columns)
+CORNERS = [
+    # topleft
+    *[(0, 0), (0, 1), (1, 0), (1, 1)],
+    *[
+        (GRID_SIZE[0] - 1, 0),
+        (GRID_SIZE[0] - 1, 1),
+        (GRID_SIZE[0] - 2, 0),
+        (GRID_SIZE[0] - 2, 1),
+    ],  # topright
+    *[
+        (0, GRID_SIZE[1] - 1),
+        (1, GRID_SIZE[1] - 1),
+        (0, GRID_SIZE[1] - 2),
+        (1, GRID_SIZE[1] - 2),
+    ],  # bottomleft
+    *[
+        (GRID_SIZE[0] - 1, GRID_SIZE[1] - 1),
+        (GRID_SIZE[0] - 1, GRID_SIZE[1] - 2),
+        (GRID_SIZE[0] - 2, GRID_SIZE[1] - 1),
+        (GRID_SIZE[0] - 2, GRID_SIZE[1] - 2),
+    ],  # topright
+]
+CENTER_DISPERSAL_RADIUS = 1.5
+CORNER_DISPERSAL_RADIUS = 2.5
+NUM_MINES = int(MINE_PERCENT * GRID_SIZE[0] * GRID_SIZE[1])
+POOL_KEY = pool_key(GRID_SIZE, MINE_PERCENT, NEIGHBORING)
+# endregion
+
+MINE = "M"
+
+# region types
+Position = tuple[int, int]
+Grid = list[list[int | Literal["M"]]]
+PositionSet = set[Position]
+# endregion
+
+
+class Board:
+    def __init__(self, board_pool: BoardPool | None = None) -> None:
+        self.board_pool = board_pool
+        self.mine_field: Grid = []
+        self.mine_positions: PositionSet = set()
+        self.won = False
+        self.first_click = True
+        self.revealed: PositionSet = set()
+        self.flagged: PositionSet = set()
+        self.guess_flags: PositionSet = set()
+        self.changed: PositionSet = set()  # tiles to redraw
+        self.solver: Solver | None = None
+        self.seed = getrandbits(64)
+        self.recorder = GameRecorder(GRID_SIZE, NEIGHBORING, self.seed)
+
+    def get_player_position(self):
+        """
+        Return a version of the minefield that the player would be seeing
+        0-8: Neighboring tile values
+        .  : Unknown
+        F  : Flagged
+        """
+        self.flagged
+        self.revealed
+        field: PlayerPosition = []
+        for x, row in enumerate(self.mine_field):
+            field.append([])
+            for y, val in enumerate(row):
+                pos = (x, y)
+                if pos in self.flagged:
+                    field[-1].append("F")
+                    continue
+                if pos in self.revealed:
+                    field[-1].append(int(val))
+                    continue
+                field[-1].append(".")
+        return field
+    
+    def save_to_file(self):
+        """
+        Saves the initially revealed position to a file
+        """
+        field = self.get_player_position()
+        with open("Tests.txt", "a") as f:
+            print(NUM_MINES, file=f)
+            for row in field:
+                print("".join(map(str, row)), file=f)
+            print("=====", file=f)
+            for row in self.mine_field:
+                print("".join(map(str, row)), file=f)
+            print("==========", file=f)
+
+    def quick_reveal(self, pos) -> PositionSet:
+        n = self.val_at_pos(pos)
+        if n == MINE:
+            return set()
+        num_unrevealed = 0
+        unrevealed_neighbors = set()
+        for neighbor in self.neighbors(pos):
+            if neighbor in self.flagged:
+                n -= 1
+            elif neighbor not in self.revealed:
+                num_unrevealed += 1
+                unrevealed_neighbors.add(neighbor)
+        just_revealed = set()
+        if n == 0:
+            just_revealed = self.reveal_tiles(unrevealed_neighbors)
+        if n == num_unrevealed:
+            for unrevealed in unrevealed_neighbors:
+                self.flagged.add(unrevealed)
+            self.changed |= unrevealed_neighbors
+        return just_revealed
+
+    def reveal_tile(self, pos: Position) -> PositionSet:
+        return self.reveal_tiles([pos])
+
+    def reveal_tiles(self, positions: Iterable[Position]) -> PositionSet:
+        """
+        Reveals `positions` and floods out from the zeros among them. The flood fills share one
+        visited set, so a chord opening several zero regions walks each cell once. Returns the
+        union of the newly revealed tiles.
+        """
+        just_revealed: PositionSet = set()
+        to_check = list(positions)
+        while to_check:
+            tile = to_check.pop()
+            if tile in just_revealed or tile in self.revealed or tile in self.flagged:
+                continue
+            just_revealed.add(tile)
+            if self.val_at_pos(tile) == 0:
+                to_check.extend(self.neighbors(tile))
+        self.revealed |= just_revealed
+        self.changed |= just_revealed
+        return just_revealed
+
+    def mine_field_set_up(self, mouse_pos: Position):
+        if self.board_pool is not None:
+            mine_positions = self.board_pool.take(POOL_KEY, mouse_pos)
+            self.board_pool.refill(POOL_KEY)
+            if mine_positions is not None:
+                self.mine_positions = mine_positions
+                self.mine_field_from_mines(mouse_pos)
+                return
+        # rejection sampling only looks at as many tiles as there are mines, not the whole board
+        mr, mc = mouse_pos
+        radius = CORNER_DISPERSAL_RADIUS if mouse_pos in CORNERS else CENTER_DISPERSAL_RADIUS
+        rng = Random(self.seed)
+        self.mine_positions = set()
+        while len(self.mine_positions) < NUM_MINES:
+            r, c = rng.randrange(GRID_SIZE[0]), rng.randrange(GRID_SIZE[1])
+            if (mr - r) ** 2 + (mc - c) ** 2 <= radius**2:
+                continue
+            self.mine_positions.add((r, c))
+        self.mine_field_from_mines(mouse_pos)
+
+    def mine_field_from_mines(self, mouse_pos: Position):
+        self.mine_field: Grid = [[0] * GRID_SIZE[1] for _ in range(GRID_SIZE[0])]
+
+        for r, c in self.mine_positions:
+            self.mine_field[r][c] = MINE
+            for nr, nc in self.neighbors((r, c)):
+                if (nr, nc) in self.mine_positions:
+                    continue
+                assert self.mine_field[nr][nc] != "M", "Mine not marked in mine_locations"
+                self.mine_field[nr][nc] += 1  # type: ignore
+        self.reveal_tile(mouse_pos)
+        self.solver = Solver(NUM_MINES, self.get_player_position(), bind_verifier(self.mine_field))
+
+    def neighbors(self, pos: Position):
+        r, c = pos
+        for dr, dc in NEIGHBORING:
+            nr, nc = r + dr, c + dc
+            if 0 <= nr < GRID_SIZE[0] and 0 <= nc < GRID_SIZE[1]:
+                yield (nr, nc)
+
+    def val_at_pos(self, pos: Position):
+        return self.mine_field[pos[0]][pos[1]]
+
+    def did_win(self):
+        return self.won
+    
@@ -0,0 +1,400 @@
+"""
+A pool of pre-generated boards that can be solved without guessing.
+
+Boards are generated by a rejection loop in background worker processes, which also find every
+first click each board can be solved from. They are persisted to disk and handed out in O(1) when a
+game starts.
+"""
+
+import atexit
+import json
+import os
+from collections import deque
+from collections.abc import Callable, Iterable
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import product
+from random import Random
+from threading import Lock
+from typing import Literal
+
+from solver import Solver, bind_verifier, PlayerPosition, UNKNOWN
+
+Position = tuple[int, int]
+Grid = list[list[int | Literal["M"]]]
+Neighboring = tuple[tuple[int, int], ...]
+PoolKey = tuple[tuple[int, int], float, Neighboring]
+Transform = Callable[[Position], Position]
+
+MINE = "M"
+CENTER_DISPERSAL_RADIUS = 1.5
+CORNER_DISPERSAL_RADIUS = 2.5
+POOL_SIZE = 32  # number of boards to keep ready for every key
+MAX_ATTEMPTS = 500  # number of boards tried per job before giving up
+MAX_RETRIES = 3  # number of jobs in a row that may give up before refilling stops
+MAX_REMAP_CHECKS = 8  # number of pooled boards solved from a click that none of them is indexed by
+
+
+def pool_key(grid_size: Iterable[int], mine_percent: float, neighboring: Iterable[Iterable[int]]):
+    rows, columns = grid_size
+    return (rows, columns), mine_percent, tuple((dr, dc) for dr, dc in neighboring)
+
+
+def count_mines(key: PoolKey) -> int:
+    (rows, columns), mine_percent, _ = key
+    return int(mine_percent * rows * columns)
+
+
+def is_corner(pos: Position, grid_size: tuple[int, int]) -> bool:
+    r, c = pos
+    rows, columns = grid_size
+    return (r < 2 or r >= rows - 2) and (c < 2 or c >= columns - 2)
+
+
+def dispersal_radius(pos: Position, grid_size: tuple[int, int]) -> float:
+    return CORNER_DISPERSAL_RADIUS if is_corner(pos, grid_size) else CENTER_DISPERSAL_RADIUS
+
+
+def in_dispersal_area(click: Position, pos: Position, grid_size: tuple[int, int]) -> bool:
+    radius = dispersal_radius(click, grid_size)
+    return (click[0] - pos[0]) ** 2 + (click[1] - pos[1]) ** 2 <= radius**2
+
+
+def neighbors(pos: Position, grid_size: tuple[int, int], neighboring: Neighboring):
+    r, c = pos
+    for dr, dc in neighboring:
+        nr, nc = r + dr, c + dc
+        if 0 <= nr < grid_size[0] and 0 <= nc < grid_size[1]:
+            yield (nr, nc)
+
+
+def make_grid(key: PoolKey, mine_positions: Iterable[Position]) -> Grid:
+    grid_size, _, neighboring = key
+    mine_positions = set(mine_positions)
+    grid: Grid = [[0] * grid_size[1] for _ in range(grid_size[0])]
+    for r, c in mine_positions:
+        grid[r][c] = MINE
+        for nr, nc in neighbors((r, c), grid_size, neighboring):
+            if (nr, nc) not in mine_positions:
+                grid[nr][nc] += 1  # type: ignore
+    return grid
+
+
+def opening(key: PoolKey, grid: Grid, click: Position) -> set[Position]:
+    """Returns the tiles revealed by clicking on `click`."""
+    grid_size, _, neighboring = key
+    revealed = {click}
+    to_check = [click]
+    while to_check:
+        pos = to_check.pop()
+        if grid[pos[0]][pos[1]] != 0:
+            continue
+        for neighbor in neighbors(pos, grid_size, neighboring):
+            if neighbor not in revealed:
+                revealed.add(neighbor)
+                to_check.append(neighbor)
+    return revealed
+
+
+def random_mines(key: PoolKey, click: Position, rng: Random) -> list[Position]:
+    grid_size, _, _ = key
+    possible_locations = [
+        pos
+        for pos in product(range(grid_size[0]), range(grid_size[1]))
+        if not in_dispersal_area(click, pos, grid_size)
+    ]
+    return rng.sample(possible_locations, count_mines(key))
+
+
+def is_solvable(key: PoolKey, grid: Grid, click: Position) -> bool:
+    """Checks that every safe tile can be revealed from `click` without guessing."""
+    _, _, neighboring = key
+    revealed = opening(key, grid, click)
+    position: PlayerPosition = [
+        [grid[r][c] if (r, c) in revealed else UNKNOWN for c in range(len(row))]  # type: ignore
+        for r, row in enumerate(grid)
+    ]
+    solver = Solver(count_mines(key), position, bind_verifier(grid), [*map(list, neighboring)])
+    try:
+        solver.solve(False)
+    except ValueError:
+        return False
+    return all(
+        val != UNKNOWN or grid[r][c] == MINE
+        for r, row in enumerate(solver.position)
+        for c, val in enumerate(row)
+    )
+
+
+def is_clear(key: PoolKey, mines: Iterable[Position], click: Position) -> bool:
+    """Checks that no mine lies in the dispersal area of `click`."""
+    grid_size, _, _ = key
+    return not any(in_dispersal_area(click, mine, grid_size) for mine in mines)
+
+
+def servable_clicks(key: PoolKey, mines: list[Position]) -> list[Position]:
+    """Returns every first click the board can be solved from without guessing."""
+    (rows, columns), _, _ = key
+    grid = make_grid(key, mines)
+    return [
+        pos
+        for pos in product(range(rows), range(columns))
+        if is_clear(key, mines, pos) and is_solvable(key, grid, pos)
+    ]
+
+
+def generate_solvable_board(
+    key: PoolKey, click: Position, seed: int
+) -> tuple[Position, list[Position], list[Position]] | None:
+    """
+    Runs the rejection loop for a single board and finds the other first clicks it can serve.
+    Meant to be run in a worker process.
+    """
+    rng = Random(seed)
+    for _ in range(MAX_ATTEMPTS):
+        mines = random_mines(key, click, rng)
+        if is_solvable(key, make_grid(key, mines), click):
+            return click, mines, servable_clicks(key, mines)
+    return None
+
+
+def symmetries(key: PoolKey) -> list[Transform]:
+    """Returns the reflections/rotations of the board that keep the neighboring pattern intact."""
+    (rows, columns), _, neighboring = key
+    candidates: list[tuple[Transform, Callable[[int, int], tuple[int, int]]]] = [
+        (lambda p: p, lambda dr, dc: (dr, dc)),
+        (lambda p: (rows - 1 - p[0], p[1]), lambda dr, dc: (-dr, dc)),
+        (lambda p: (p[0], columns - 1 - p[1]), lambda dr, dc: (dr, -dc)),
+        (lambda p: (rows - 1 - p[0], columns - 1 - p[1]), lambda dr, dc: (-dr, -dc)),
+    ]
+    if rows == columns:
+        candidates += [
+            (lambda p: (p[1], p[0]), lambda dr, dc: (dc, dr)),
+            (lambda p: (rows - 1 - p[1], p[0]), lambda dr, dc: (-dc, dr)),
+            (lambda p: (p[1], columns - 1 - p[0]), lambda dr, dc: (dc, -dr)),
+            (lambda p: (rows - 1 - p[1], columns - 1 - p[0]), lambda dr, dc: (-dc, -dr)),
+        ]
+    pattern = set(neighboring)
+    return [
+        transform
+        for transform, offset in candidates
+        if set(offset(dr, dc) for dr, dc in pattern) == pattern
+    ]
+
+
+def valid_clicks(key: PoolKey, click: Position, mines: list[Position]) -> set[Position]:
+    """
+    Returns the tiles that open the same region as `click` while respecting the dispersal radius.
+    Any of them can be used as the first click, as the solve from that point on is identical.
+    """
+    grid = make_grid(key, mines)
+    if grid[click[0]][click[1]] != 0:
+        candidates = {click}
+    else:
+        candidates = {(r, c) for r, c in opening(key, grid, click) if grid[r][c] == 0}
+    return {candidate for candidate in candidates if is_clear(key, mines, candidate)}
+
+
+class BoardPool:
+    """
+    Boards that can be solved without guessing, keyed by (size, density, neighboring pattern).
+
+    Every board is indexed by each first click it can serve (after reflecting/rotating it), so
+    taking a board is a dictionary lookup. A click no board is indexed by is tried on a few pooled
+    boards before giving up. Refilling and saving run on a background thread, off the click path.
+    """
+
+    def __init__(self, path: str, pool_size: int = POOL_SIZE, max_workers: int | None = None):
+        self.path = path
+        self.pool_size = pool_size
+        self.max_workers = max_workers
+        self.lock = Lock()
+        self.executor: ProcessPoolExecutor | None = None
+        self.background = ThreadPoolExecutor(1)
+        self.save_pending = False
+        self.next_id = 0
+        self.boards: dict[PoolKey, dict[int, tuple[Position, list[Position], list[Position]]]] = {}
+        self.index: dict[PoolKey, dict[Position, deque[tuple[int, Transform]]]] = {}
+        self.pending: dict[PoolKey, int] = {}
+        self.failures: dict[PoolKey, int] = {}
+        self.load()
+        atexit.register(self.close)
+
+    def add(
+        self,
+        key: PoolKey,
+        click: Position,
+        mines: list[Position],
+        clicks: Iterable[Position] | None = None,
+    ) -> None:
+        """
+        Adds a board, indexed by `clicks`. Without them, only the clicks that open the same region
+        as `click` are indexed.
+        """
+        if clicks is None:
+            clicks = valid_clicks(key, click, mines)
+        clicks = list(clicks)
+        with self.lock:
+            board_id = self.next_id
+            self.next_id += 1
+            self.boards.setdefault(key, {})[board_id] = (click, mines, clicks)
+            index = self.index.setdefault(key, {})
+            for transform in symmetries(key):
+                for valid_click in clicks:
+                    index.setdefault(transform(valid_click), deque()).append(
+                        (board_id, transform)
+                    )
+
+    def take(self, key: PoolKey, click: Position) -> set[Position] | None:
+        """Removes and returns the mine positions of a board that can start from `click`."""
+        mines = None
+        with self.lock:
+            boards = self.boards.get(key, {})
+            candidates = self.index.get(key, {}).get(click, deque())
+            while candidates:
+                board_id, transform = candidates.popleft()
+                if board_id not in boards:  # taken through another first click
+                    continue
+                _, mines, _ = boards.pop(board_id)
+                mines = list(map(transform, mines))
+                break
+        if mines is None:
+            mines = self.remap(key, click)
+            if mines is None:
+                return None
+        self.schedule_save()
+        return set(mines)
+
+    def remap(self, key: PoolKey, click: Position) -> list[Position] | None:
+        """
+        Looks for a pooled board that can be solved from `click` although it is not indexed by it,
+        trying at most `MAX_REMAP_CHECKS` of them. The solves run without the lock, so a board is
+        only removed if no other thread took it in the meantime.
+        """
+        with self.lock:
+            pooled = list(self.boards.get(key, {}).items())
+        checks = 0
+        for board_id, (_, mines, _) in pooled:
+            for transform in symmetries(key):
+                moved = [transform(mine) for mine in mines]
+                if not is_clear(key, moved, click):
+                    continue
+                if checks == MAX_REMAP_CHECKS:
+                    return None
+                checks += 1
+                if is_solvable(key, make_grid(key, moved), click):
+                    with self.lock:
+                        if self.boards.get(key, {}).pop(board_id, None) is not None:
+                            return moved
+                    break  # taken by another thread, so its other symmetries are gone too
+        return None
+
+    def available(self, key: PoolKey) -> int:
+        return len(self.boards.get(key, {}))
+
+    def refill(self, key: PoolKey) -> None:
+        """Tops the pool for `key` back up to `pool_size` boards in the background."""
+        self.background.submit(self.start_jobs, key)
+
+    def start_jobs(self, key: PoolKey) -> None:
+        """Starts the worker jobs for the boards the pool for `key` is missing."""
+        with self.lock:
+            missing = self.pool_size - len(self.boards.get(key, {})) - self.pending.get(key, 0)
+            if missing <= 0:
+                return
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(self.max_workers)
+            self.pending[key] = self.pending.get(key, 0) + missing
+            executor = self.executor
+            clicks = self.uncovered_clicks(key)
+        rng = Random()
+        for _ in range(missing):
+            click = clicks.pop() if clicks else (rng.randrange(key[0][0]), rng.randrange(key[0][1]))
+            future = executor.submit(generate_solvable_board, key, click, rng.getrandbits(64))
+            future.add_done_callback(lambda future: self.on_generated(key, future))
+
+    def uncovered_clicks(self, key: PoolKey) -> list[Position]:
+        """Returns the first clicks no board in the pool can serve, in random order."""
+        (rows, columns), _, _ = key
+        boards = self.boards.get(key, {})
+        index = self.index.get(key, {})
+        clicks = [
+            pos
+            for pos in product(range(rows), range(columns))
+            if not any(board_id in boards for board_id, _ in index.get(pos, ()))
+        ]
+        Random().shuffle(clicks)
+        return clicks
+
+    def on_generated(self, key: PoolKey, future: Future) -> None:
+        with self.lock:
+            self.pending[key] -= 1
+        if future.cancelled() or future.exception() is not None:
+            return
+        if (board := future.result()) is None:
+            # the rejection loop ran out of attempts; try again, unless it keeps doing so
+            with self.lock:
+                self.failures[key] = self.failures.get(key, 0) + 1
+                retry = self.failures[key] <= MAX_RETRIES
+            if retry:
+                self.refill(key)
+            return
+        with self.lock:
+            self.failures[key] = 0
+        self.add(key, *board)
+        self.schedule_save()
+
+    def load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path) as f:
+            data = json.load(f)
+        for board in data["boards"]:
+            key = pool_key(board["grid size"], board["mine percent"], board["neighboring"])
+            clicks = board.get("clicks")  # missing from pools saved by older versions
+            self.add(
+                key,
+                tuple(board["click"]),
+                [tuple(mine) for mine in board["mines"]],
+                None if clicks is None else [tuple(pos) for pos in clicks],
+            )
+
+    def schedule_save(self) -> None:
+        """Saves the pool in the background, unless a save is already waiting to run."""
+        with self.lock:
+            if self.save_pending:
+                return
+            self.save_pending = True
+        self.background.submit(self.save)
+
+    def save(self) -> None:
+        """Writes the pool to disk atomically, so a crash cannot leave a truncated file."""
+        with self.lock:
+            self.save_pending = False
+            data = {
+                "boards": [
+                    {
+                        "grid size": grid_size,
+                        "mine percent": mine_percent,
+                        "neighboring": neighboring,
+                        "click": click,
+                        "mines": mines,
+                        "clicks": clicks,
+                    }
+                    for (grid_size, mine_percent, neighboring), boards in self.boards.items()
+                    for click, mines, clicks in boards.values()
+                ]
+            }
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+
+    def join(self) -> None:
+        """Waits for the background thread to finish the refills and saves queued so far."""
+        self.background.submit(lambda: None).result()
+
+    def close(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+        self.background.shutdown(wait=True)
@@ -8,23 +8,22 @@ from util import Position
 
 
 class FieldSurface(Surface):
-    def __init__(self):
-        super().__init__()
-        self.resize()
-
     def update(self, position: Position) -> None:
         raise NotImplementedError
 
-    def draw(self) -> None:
-        self.display_surface.blit(self.surface, [get_left_margin(), get_top_margin() + HEADER_HEIGHT])
-
-    def resize(self) -> None:
-        super().resize()
-        block_size = get_block_size()
-        for row in range(MINE_FIELD_HEIGHT):
-            for col in range(MINE_FIELD_WIDTH):
-                rect = pygame.rect.Rect(col * block_size, row * block_size, block_size, block_size)
+    def render_chunk(self, chunk: Position, block_size: int) -> pygame.Surface:
+        rows, columns = self.chunks.cells(chunk)
+        surface = pygame.Surface([len(columns) * block_size, len(rows) * block_size])
+        for row in rows:
+            for col in columns:
+                rect = pygame.rect.Rect(
+                    (col - columns.start) * block_size,
+                    (row - rows.start) * block_size,
+                    block_size,
+                    block_size,
+                )
                 color = (
                     ColorPallette.DARK_FIELD if (row + col) % 2 == 1 else ColorPallette.LIGHT_FIELD
                 )
-                pygame.draw.rect(self.surface, color, rect)
+                pygame.draw.rect(surface, color, rect)
+        return surface
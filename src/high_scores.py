@@ -0,0 +1,100 @@
+"""
+An append-only store of every high score, indexed in memory by game mode.
+
+Every line of the file is `size;mine percent;neighboring;scores`, where scores is a comma separated
+list. A win appends a line holding a single score, and once enough of those have piled up the file
+is compacted to one line per game mode. This keeps files written by older versions (one best score
+per line) readable as they are.
+"""
+
+import os
+from bisect import bisect_right, insort
+from collections.abc import Iterable
+
+ScoreKey = tuple[str, str, str]
+
+COMPACT_AFTER = 256  # number of appended lines before the file is rewritten
+
+
+def score_key(grid_size: Iterable[int], mine_percent: float, neighboring: list) -> ScoreKey:
+    rows, columns = grid_size
+    return f"{rows}*{columns}", str(mine_percent), str(neighboring)
+
+
+class HighScores:
+    def __init__(self, path: str, compact_after: int = COMPACT_AFTER) -> None:
+        self.path = path
+        self.compact_after = compact_after
+        self.history: dict[ScoreKey, list[int]] = {}
+        self.sorted_scores: dict[ScoreKey, list[int]] = {}
+        self.appended = 0
+        self.load()
+
+    def load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb+") as f:
+            data = f.read()
+            # the last line is only complete if the file ends with a newline; a torn one is cut off
+            # so that the next append starts on a line of its own
+            end = data.rfind(b"\n") + 1
+            if end < len(data):
+                f.truncate(end)
+        for line in data[:end].decode().split("\n")[:-1]:
+            fields = line.split(";")
+            if len(fields) != 4:
+                continue
+            try:
+                scores = [int(score) for score in fields[3].split(",")]
+            except ValueError:
+                continue
+            key = fields[0], fields[1], fields[2]
+            for score in scores:
+                self.add(key, score)
+            self.appended += 1
+        self.appended -= len(self.history)
+
+    def add(self, key: ScoreKey, score: int) -> None:
+        self.history.setdefault(key, []).append(score)
+        insort(self.sorted_scores.setdefault(key, []), score)
+
+    def record(self, key: ScoreKey, score: int) -> None:
+        """Adds a score to the index and appends it to the file."""
+        self.add(key, score)
+        with open(self.path, "a") as f:
+            f.write(f"{';'.join(key)};{score}\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.appended += 1
+        if self.appended >= self.compact_after:
+            self.compact()
+
+    def compact(self) -> None:
+        """Rewrites the file with one line per game mode, atomically."""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            for key, scores in self.history.items():
+                f.write(f"{';'.join(key)};{','.join(map(str, scores))}\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self.appended = 0
+
+    def best(self, key: ScoreKey) -> int | None:
+        scores = self.sorted_scores.get(key)
+        return scores[0] if scores else None
+
+    def percentile(self, key: ScoreKey, percent: float) -> int | None:
+        """Returns the score matched or beaten by `percent` percent of the recorded scores."""
+        scores = self.sorted_scores.get(key)
+        if not scores:
+            return None
+        index = max(0, min(len(scores) - 1, int(len(scores) * percent / 100 + 0.5) - 1))
+        return scores[index]
+
+    def rank(self, key: ScoreKey, score: int) -> float:
+        """Returns the percentage of the recorded scores that `score` is strictly better than."""
+        scores = self.sorted_scores.get(key, [])
+        if not scores:
+            return 100.0
+        return 100 * (len(scores) - bisect_right(scores, score)) / len(scores)
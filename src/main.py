@@ -27,6 +27,8 @@ class Game:
                         pygame.quit()
                         sys.exit()
                     self.mine_field.handle_key_down(event)
+                if event.type == pygame.MOUSEWHEEL:
+                    self.mine_field.handle_mouse_wheel(event)
                 if event.type == pygame.VIDEORESIZE:
                     width, height = event.size
                     width = max(width, MIN_WIDTH)
@@ -1,6 +1,15 @@
 import pygame
 from revealed_surface import RevealedSurface
 from field_surface import FieldSurface
+from util import get_viewport
+from viewport import PAN_STEP, ZOOM_STEP
+
+PAN_KEYS = {
+    pygame.K_LEFT: (-PAN_STEP, 0),
+    pygame.K_RIGHT: (PAN_STEP, 0),
+    pygame.K_UP: (0, -PAN_STEP),
+    pygame.K_DOWN: (0, PAN_STEP),
+}
 
 
 class MineField:
@@ -12,10 +21,16 @@ class MineField:
         self.flag_surface = ...
     
     def handle_key_down(self, event: pygame.event.Event) -> None:
-        pass
-    
+        if event.key in PAN_KEYS:
+            get_viewport().pan(*PAN_KEYS[event.key])
+
+    def handle_mouse_wheel(self, event: pygame.event.Event) -> None:
+        get_viewport().zoom(ZOOM_STEP if event.y > 0 else 1 / ZOOM_STEP, pygame.mouse.get_pos())
+
     def draw(self) -> None:
         self.field_surface.draw()
     
     def resize(self) -> None:
+        self.display_surface = pygame.display.get_surface()
+        get_viewport().resize(self.display_surface.get_size())
         self.field_surface.resize()
@@ -0,0 +1,388 @@
+"""
+Recording of played games as compact binary action logs, and replaying them.
+
+A log is a header (board size, neighboring pattern, seed, first click and a bitmap of the mines)
+followed by fixed size events of (milliseconds since the start, action, row, column). The replay
+engine stores a snapshot every `keyframe_interval` events, so reconstructing any move replays at
+most that many events.
+"""
+
+import os
+import struct
+from bisect import bisect_right
+from collections.abc import Iterable, Iterator
+
+from solver import Budget, BudgetExceeded, PositionSet, Solver, placements
+
+Position = tuple[int, int]
+
+MAGIC = b"MSRP"
+VERSION = 1
+HEADER = struct.Struct("<4sBHHB")  # magic, version, rows, columns, number of neighbor offsets
+OFFSET = struct.Struct("<bb")
+START = struct.Struct("<QHH")  # seed, first click
+EVENT = struct.Struct("<IBHH")  # timestamp, action, row, column
+
+REVEAL = 0
+CHORD = 1
+FLAG = 2
+UNFLAG = 3
+LOSE = 4  # a guess in expert mode, which ends the game
+
+HIDDEN = 0
+REVEALED = 1
+FLAGGED = 2
+
+MINE = "M"
+UNKNOWN = "."
+KEYFRAME_INTERVAL = 32
+REPLAYS_DIR = "Replays"
+CORPUS_DIR = "Replay Tests"
+MAX_NODES = 100_000  # placements tried on each component before a position is not exported
+
+
+class GameRecorder:
+    def __init__(self, grid_size: tuple[int, int], neighboring: list[list[int]], seed: int):
+        self.grid_size = grid_size
+        self.neighboring = neighboring
+        self.seed = seed
+        self.first_click: Position | None = None
+        self.mine_positions: set[Position] = set()
+        self.events = bytearray()
+
+    def start(self, first_click: Position, mine_positions: Iterable[Position]) -> None:
+        self.first_click = first_click
+        self.mine_positions = set(mine_positions)
+
+    def record(self, timestamp: int, action: int, pos: Position) -> None:
+        if self.first_click is None:
+            return
+        self.events += EVENT.pack(timestamp, action, *pos)
+
+    def to_bytes(self) -> bytes:
+        if self.first_click is None:
+            raise ValueError("Nothing was recorded, the game was never started")
+        rows, columns = self.grid_size
+        mines = bytearray((rows * columns + 7) // 8)
+        for r, c in self.mine_positions:
+            index = r * columns + c
+            mines[index // 8] |= 1 << (index % 8)
+        return b"".join(
+            [
+                HEADER.pack(MAGIC, VERSION, rows, columns, len(self.neighboring)),
+                *(OFFSET.pack(dr, dc) for dr, dc in self.neighboring),
+                START.pack(self.seed, *self.first_click),
+                mines,
+                self.events,
+            ]
+        )
+
+    def save(self, path: str) -> None:
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(self.to_bytes())
+        os.replace(tmp_path, path)
+
+
+class Replay:
+    def __init__(self, data: bytes, keyframe_interval: int = KEYFRAME_INTERVAL) -> None:
+        magic, version, rows, columns, num_offsets = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Not a replay file")
+        offset = HEADER.size
+        self.neighboring = [
+            OFFSET.unpack_from(data, offset + i * OFFSET.size) for i in range(num_offsets)
+        ]
+        offset += num_offsets * OFFSET.size
+        self.seed, *first_click = START.unpack_from(data, offset)
+        self.first_click: Position = tuple(first_click)  # type: ignore
+        offset += START.size
+        self.grid_size = rows, columns
+        num_bytes = (rows * columns + 7) // 8
+        mines = data[offset : offset + num_bytes]
+        self.mine_positions = {
+            (index // columns, index % columns)
+            for index in range(rows * columns)
+            if mines[index // 8] >> (index % 8) & 1
+        }
+        offset += num_bytes
+        self.events: list[tuple[int, int, Position]] = [
+            (timestamp, action, (r, c))
+            for timestamp, action, r, c in EVENT.iter_unpack(data[offset:])
+        ]
+        self.timestamps = [timestamp for timestamp, _, _ in self.events]
+        self.mine_field = self.make_mine_field()
+        self.keyframe_interval = keyframe_interval
+        self.keyframes: list[tuple[bytes, bool]] = []
+        self.build_keyframes()
+
+    @classmethod
+    def load(cls, path: str, keyframe_interval: int = KEYFRAME_INTERVAL) -> "Replay":
+        with open(path, "rb") as f:
+            return cls(f.read(), keyframe_interval)
+
+    def make_mine_field(self) -> list[list[int | str]]:
+        rows, columns = self.grid_size
+        mine_field: list[list[int | str]] = [[0] * columns for _ in range(rows)]
+        for r, c in self.mine_positions:
+            mine_field[r][c] = MINE
+            for nr, nc in self.neighbors((r, c)):
+                if (nr, nc) not in self.mine_positions:
+                    mine_field[nr][nc] += 1  # type: ignore
+        return mine_field
+
+    def neighbors(self, pos: Position) -> Iterator[Position]:
+        r, c = pos
+        for dr, dc in self.neighboring:
+            nr, nc = r + dr, c + dc
+            if 0 <= nr < self.grid_size[0] and 0 <= nc < self.grid_size[1]:
+                yield (nr, nc)
+
+    def index(self, pos: Position) -> int:
+        return pos[0] * self.grid_size[1] + pos[1]
+
+    def build_keyframes(self) -> None:
+        state = bytearray(self.grid_size[0] * self.grid_size[1])
+        self.reveal(state, self.first_click)
+        lost = False
+        for i, (_, action, pos) in enumerate(self.events):
+            if i % self.keyframe_interval == 0:
+                self.keyframes.append((bytes(state), lost))
+            lost = self.apply(state, action, pos) or lost
+        if len(self.events) % self.keyframe_interval == 0:
+            self.keyframes.append((bytes(state), lost))
+
+    def apply(self, state: bytearray, action: int, pos: Position) -> bool:
+        """Applies an action to `state`, returning whether it lost the game."""
+        index = self.index(pos)
+        if action == REVEAL:
+            return self.reveal(state, pos)
+        if action == CHORD:
+            return self.chord(state, pos)
+        if action == FLAG:
+            state[index] = FLAGGED
+        elif action == UNFLAG:
+            state[index] = HIDDEN
+        elif action == LOSE:
+            return True
+        return False
+
+    def reveal(self, state: bytearray, pos: Position) -> bool:
+        to_check = [pos]
+        while to_check:
+            tile = to_check.pop()
+            index = self.index(tile)
+            if state[index] != HIDDEN:
+                continue
+            state[index] = REVEALED
+            value = self.mine_field[tile[0]][tile[1]]
+            if value == MINE:
+                return True
+            if value == 0:
+                to_check.extend(self.neighbors(tile))
+        return False
+
+    def chord(self, state: bytearray, pos: Position) -> bool:
+        n = self.mine_field[pos[0]][pos[1]]
+        if n == MINE or state[self.index(pos)] != REVEALED:
+            return False
+        hidden = []
+        for neighbor in self.neighbors(pos):
+            if state[self.index(neighbor)] == FLAGGED:
+                n -= 1  # type: ignore
+            elif state[self.index(neighbor)] == HIDDEN:
+                hidden.append(neighbor)
+        lost = False
+        if n == 0:
+            for neighbor in hidden:
+                lost = self.reveal(state, neighbor) or lost
+        if n == len(hidden):
+            for neighbor in hidden:
+                state[self.index(neighbor)] = FLAGGED
+        return lost
+
+    def state_at(self, move: int) -> tuple[bytearray, bool]:
+        """Returns the state of every cell and whether the game was lost after `move` events."""
+        move = max(0, min(move, len(self.events)))
+        keyframe = move // self.keyframe_interval
+        snapshot, lost = self.keyframes[keyframe]
+        state = bytearray(snapshot)
+        for _, action, pos in self.events[keyframe * self.keyframe_interval : move]:
+            lost = self.apply(state, action, pos) or lost
+        return state, lost
+
+    def move_at_time(self, timestamp: int) -> int:
+        """Returns the number of events that happened up to `timestamp` milliseconds."""
+        return bisect_right(self.timestamps, timestamp)
+
+    def state_at_time(self, timestamp: int) -> tuple[bytearray, bool]:
+        return self.state_at(self.move_at_time(timestamp))
+
+    def think_times(self) -> list[tuple[int, int, Position, int]]:
+        """Returns every event with the milliseconds the player took before making it."""
+        previous = 0
+        times = []
+        for timestamp, action, pos in self.events:
+            times.append((timestamp - previous, action, pos, timestamp))
+            previous = timestamp
+        return times
+
+    def player_position(self, state: bytearray) -> list[list[int | str]]:
+        rows, columns = self.grid_size
+        return [
+            [
+                (
+                    self.mine_field[r][c]
+                    if state[r * columns + c] == REVEALED
+                    else "F" if state[r * columns + c] == FLAGGED else UNKNOWN
+                )
+                for c in range(columns)
+            ]
+            for r in range(rows)
+        ]
+
+    def solver_position(self, move: int) -> tuple[list[list[int | str]], int]:
+        """
+        Returns the position after `move` events and the number of flags left in it. Incorrect
+        flags are turned back into unknowns, as the solver trusts every flag.
+        """
+        state, _ = self.state_at(move)
+        position = self.player_position(state)
+        flagged = 0
+        for r, row in enumerate(position):
+            for c, value in enumerate(row):
+                if value == "F" and self.mine_field[r][c] != MINE:
+                    row[c] = UNKNOWN
+                elif value == "F":
+                    flagged += 1
+        return position, flagged
+
+    def to_solver_test(self, move: int) -> tuple[str, str]:
+        """
+        Returns the position after `move` events in the format of `tests/solver tests`. The
+        solution only marks the hidden cells the position forces, as revealing a cell in a solver
+        test does not show its number. Raises `BudgetExceeded` when a component has too many
+        placements to tell.
+        """
+        position, flagged = self.solver_position(move)
+        num_mines = len(self.mine_positions) - flagged
+        safe, mines = forced_cells(position, num_mines, self.neighboring)
+        test_input, solution = [], []
+        for r, row in enumerate(position):
+            test_input.append("".join(map(str, row)))
+            solution.append(
+                "".join(
+                    str(value) if value != UNKNOWN
+                    else "R" if (r, c) in safe else "F" if (r, c) in mines else UNKNOWN
+                    for c, value in enumerate(row)
+                )
+            )
+        return f"{num_mines}\n" + "\n".join(test_input) + "\n", "\n".join(solution) + "\n"
+
+
+def forced_cells(
+    position: list[list[int | str]],
+    num_mines: int,
+    neighboring: Iterable[Iterable[int]],
+    max_nodes: int = MAX_NODES,
+) -> tuple[PositionSet, PositionSet]:
+    """
+    Returns the unknown cells that are safe and the ones that are mines in every layout of the
+    `num_mines` mines left that fits the numbers. Every component is enumerated, keeping which
+    cells are mines in any and in all of its placements with each number of mines, and a number of
+    mines only counts if the other components and the cells away from the numbers can take the
+    rest.
+    """
+    solver = Solver(num_mines, position, lambda *_: None, [list(offset) for offset in neighboring])
+    components: list[tuple[list[Position], dict[int, tuple[int, int]]]] = []
+    for _, sets in solver.get_components():
+        cells = sorted(set().union(*sets))
+        layouts: dict[int, tuple[int, int]] = {}  # mines -> (mines in any, mines in all)
+        for values in placements(cells, sets, Budget(max_nodes=max_nodes)):
+            mask = 0
+            for i, value in enumerate(values):
+                mask |= value << i
+            in_any, in_all = layouts.get(mask.bit_count(), (0, -1))
+            layouts[mask.bit_count()] = in_any | mask, in_all & mask
+        if not layouts:
+            raise ValueError("No placement of mines satisfies the constraints")
+        components.append((cells, layouts))
+    frontier = {pos for cells, _ in components for pos in cells}
+    interior = [
+        (r, c)
+        for r, row in enumerate(position)
+        for c, value in enumerate(row)
+        if value == UNKNOWN and (r, c) not in frontier
+    ]
+
+    def totals(skip: int | None = None) -> set[int]:
+        """Returns the numbers of mines the components other than `skip` can hold together."""
+        result = {0}
+        for j, (_, layouts) in enumerate(components):
+            if j != skip:
+                result = {total + count for total in result for count in layouts}
+        return result
+
+    def fits(total: int) -> bool:
+        return 0 <= num_mines - total <= len(interior)
+
+    safe: PositionSet = set()
+    mines: PositionSet = set()
+    for j, (cells, layouts) in enumerate(components):
+        others = totals(j)
+        in_any, in_all = 0, -1
+        for count, (any_mask, all_mask) in layouts.items():
+            if any(fits(count + total) for total in others):
+                in_any |= any_mask
+                in_all &= all_mask
+        if in_all == -1:
+            raise ValueError("No placement of mines satisfies the constraints")
+        safe.update(pos for i, pos in enumerate(cells) if not in_any >> i & 1)
+        mines.update(pos for i, pos in enumerate(cells) if in_all >> i & 1)
+    interior_mines = [num_mines - total for total in totals() if fits(total)]
+    if interior and max(interior_mines) == 0:
+        safe.update(interior)
+    elif interior and min(interior_mines) == len(interior):
+        mines.update(interior)
+    return safe, mines
+
+
+def export_corpus(paths: Iterable[str], out_dir: str, moves: Iterable[int] | None = None) -> int:
+    """
+    Writes solver tests for the positions of every replay in `paths` into `out_dir`, returning
+    the number of tests written. By default, every position a player acted on is exported, unless
+    it forces nothing or has too many placements to tell.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    written = 0
+    for path in paths:
+        replay = Replay.load(path)
+        name = os.path.splitext(os.path.basename(path))[0]
+        for move in moves if moves is not None else range(len(replay.events)):
+            state, lost = replay.state_at(move)
+            if lost or HIDDEN not in state:
+                continue
+            try:
+                test_input, solution = replay.to_solver_test(move)
+            except BudgetExceeded:
+                continue
+            if "R" not in solution and test_input.count("F") == solution.count("F"):
+                continue
+            with open(os.path.join(out_dir, f"{name} {move}.in"), "w") as f:
+                f.write(test_input)
+            with open(os.path.join(out_dir, f"{name} {move}.out"), "w") as f:
+                f.write(solution)
+            written += 1
+    return written
+
+
+def replay_paths(directory: str) -> list[str]:
+    if not os.path.isdir(directory):
+        return []
+    return sorted(
+        os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(".replay")
+    )
+
+
+if __name__ == "__main__":
+    print(f"Exported {export_corpus(replay_paths(REPLAYS_DIR), CORPUS_DIR)} positions")
@@ -10,22 +10,27 @@ class RevealedSurface(Surface):
     """Manages drawing values of revealed tiles."""
 
     def __init__(self, mine_field: MineField) -> None:
+        super().__init__()
         self.revealed: PositionSet = set()
         self.mine_field = mine_field
 
     def update(self, position: Position) -> None:
         self.revealed.add(position)
-        val = int(value_at(position))
-        make_text(
-            self.surface, convert_to_absolute(position), val, get_block_size(), CELL_COLORS[val]
-        )
+        self.chunks.invalidate([position])
 
-    def draw(self) -> None:
-        self.display_surface.blit(
-            self.surface, (get_left_margin(), get_top_margin() + HEADER_HEIGHT)
+    def render_chunk(self, chunk: Position, block_size: int) -> pygame.Surface:
+        rows, columns = self.chunks.cells(chunk)
+        surface = pygame.Surface(
+            [len(columns) * block_size, len(rows) * block_size], pygame.SRCALPHA
         )
-
-    def resize(self) -> None:
-        super().resize()
-        for revealed in self.revealed:
-            self.update(revealed)
+        for row in rows:
+            for col in columns:
+                if (row, col) not in self.revealed:
+                    continue
+                val = int(value_at((row, col)))
+                center = (
+                    (col - columns.start + 0.5) * block_size,
+                    (row - rows.start + 0.5) * block_size,
+                )
+                make_text(surface, center, val, block_size, CELL_COLORS[val])
+        return surface
@@ -0,0 +1,143 @@
+"""
+Draws mine layouts uniformly from the ones that fit what the player sees.
+
+The constraints of the numbers split into components that share no unknown cells. Every component
+is enumerated once, keeping its placements by the number of mines they use in the solver's table
+of tallies, so later draws and solves of the same component reuse them, and the unknown cells
+away from the numbers share the mines left over in any way. So a layout is drawn in three steps:
+how many mines each component gets, in proportion to the number of layouts that give it that many,
+then one of its placements with that many mines, then the cells away from the numbers that get the
+rest.
+
+A component with more placements than the budget allows is only sampled from the placements found
+before it ran out, which are not spread evenly over the board. The result says when that happened.
+"""
+
+from math import exp, lgamma
+from random import Random
+from typing import Iterable, NamedTuple
+
+from solver import UNKNOWN, Budget, Position, PositionSet, SetDict, Solver, Tally, tally
+
+MAX_NODES = 100_000  # placements tried on each component before it makes do with the ones found
+
+
+class SampleResult(NamedTuple):
+    mines: PositionSet
+    uniform: bool  # False when a component was cut short, making the draw biased
+
+
+def log_choose(n: int, k: int) -> float:
+    return lgamma(n + 1) - lgamma(k + 1) - lgamma(n - k + 1)
+
+
+def pick(weights: dict[int, float], rng: Random) -> int:
+    x = rng.random() * sum(weights.values())
+    for key, weight in weights.items():
+        x -= weight
+        if x < 0:
+            return key
+    return max(weights, key=weights.__getitem__)  # only reached through rounding
+
+
+def sample_interior(
+    position: list, frontier: PositionSet, count: int, num_interior: int, rng: Random
+) -> PositionSet:
+    """Picks `count` of the unknown cells that are not in `frontier`, all equally likely."""
+    num_rows, num_columns = len(position), len(position[0])
+    chosen: PositionSet = set()
+    # drawing cells until enough fit is cheaper than listing the board, unless few of them fit
+    if num_interior * 8 >= num_rows * num_columns and count * 2 <= num_interior:
+        while len(chosen) < count:
+            r, c = rng.randrange(num_rows), rng.randrange(num_columns)
+            if position[r][c] == UNKNOWN and (r, c) not in frontier:
+                chosen.add((r, c))
+        return chosen
+    interior = [
+        (r, c)
+        for r, row in enumerate(position)
+        if UNKNOWN in row
+        for c, val in enumerate(row)
+        if val == UNKNOWN and (r, c) not in frontier
+    ]
+    return set(rng.sample(interior, count))
+
+
+def sample_layout(
+    solver: Solver,
+    rng: Random,
+    mines: Iterable[Position] = (),
+    safe: Iterable[Position] = (),
+    max_nodes: int = MAX_NODES,
+) -> SampleResult:
+    """
+    Returns the mines on the unknown cells of a layout that fits the solver's position and its
+    number of mines left, with the cells in `mines` being mines and the ones in `safe` not, and
+    whether the layout was drawn uniformly. Raises ValueError when there is no such layout, and
+    BudgetExceeded when a component has too many placements to find any of them.
+    """
+    position = solver.position
+    forced: SetDict = {}
+    for value, cells in ((1, mines), (0, safe)):
+        for r, c in cells:
+            if position[r][c] != UNKNOWN:
+                raise ValueError(f"{(r, c)} is not an unknown cell")
+            if forced.setdefault(frozenset([(r, c)]), value) != value:
+                raise ValueError(f"{(r, c)} cannot be both a mine and safe")
+
+    # the forced cells join the component they are in, or make one of their own, and the
+    # components they change are no longer the ones in the table
+    components: list[tuple[int | None, SetDict]] = list(solver.get_components())
+    owner = {pos: i for i, (_, sets) in enumerate(components) for s in sets for pos in s}
+    for s, value in forced.items():
+        (pos,) = s
+        if pos not in owner:
+            components.append((None, {s: value}))
+            continue
+        sets = components[owner[pos]][1]
+        if sets.setdefault(s, value) != value:
+            raise ValueError("No placement of mines satisfies the constraints")
+        components[owner[pos]] = None, sets
+    enumerated: list[Tally] = []
+    for key, sets in components:
+        budget = Budget(max_nodes=max_nodes)
+        if key is None:
+            enumerated.append(tally(sets, budget))
+        else:
+            enumerated.append(solver.component_tally(key, sets, budget))
+    uniform = all(counted.complete for counted in enumerated)
+    frontier = {pos for counted in enumerated for pos in counted.cells}
+
+    # ways[i][m]: in proportion, the ways for the first i components to take m mines
+    ways = [{0: 1.0}]
+    for counted in enumerated:
+        row: dict[int, float] = {}
+        for m, weight in ways[-1].items():
+            for k, count in counted.counts().items():
+                row[m + k] = row.get(m + k, 0.0) + weight * count
+        top = max(row.values())
+        ways.append({m: weight / top for m, weight in row.items()})
+
+    num_interior = sum(row.count(UNKNOWN) for row in position) - len(frontier)
+    num_mines = solver.num_mines
+    totals = {
+        m: log_choose(num_interior, num_mines - m)
+        for m in ways[-1]
+        if 0 <= num_mines - m <= num_interior
+    }
+    if not totals:
+        raise ValueError("No placement of mines satisfies the constraints")
+    top = max(totals.values())
+    m = pick({m: ways[-1][m] * exp(log - top) for m, log in totals.items()}, rng)
+
+    layout = sample_interior(position, frontier, num_mines - m, num_interior, rng)
+    for i in range(len(enumerated) - 1, -1, -1):
+        cells, layouts = enumerated[i].cells, enumerated[i].layouts
+        weights = {
+            k: len(placed) * ways[i][m - k] for k, placed in layouts.items() if m - k in ways[i]
+        }
+        k = pick(weights, rng)
+        mask = rng.choice(layouts[k])
+        layout.update(pos for j, pos in enumerate(cells) if mask >> j & 1)
+        m -= k
+    return SampleResult(layout, uniform)
@@ -1,14 +1,19 @@
+import logging
 from itertools import combinations
-from typing import Literal, Callable, Iterable, overload
+from typing import Literal, Callable, Iterable, Iterator, NamedTuple, overload
 from time import perf_counter
-from colorama import Fore, Back
 from copy import deepcopy
 
+from bitsets import Frontier, basic_logic, check_squeezes, check_subsets
+from transposition import TranspositionTable, ZobristKeys
+
 PlayerPosition = list[list[int | Literal[".", "F", "R"]]]
 MineField = list[list[int | Literal["M"]]]
 Position = tuple[int, int]
 PositionSet = set[Position]
 SetDict = dict[frozenset[Position], int]
+Deductions = tuple[frozenset[Position], frozenset[Position]]  # to reveal, to flag
+Layouts = dict[int, list[int]]  # number of mines -> placements, as bitmasks over the cells
 
 STANDARD = [[-1, -1], [-1, 0], [-1, 1], [0, -1], [0, 1], [1, -1], [1, 0], [1, 1]]
 KNIGHT = [
@@ -26,6 +31,9 @@ MINE = "M"
 UNKNOWN = "."
 FLAG = "F"
 REVEALED = "R"
+DEADLINE_CHECK_INTERVAL = 256  # placements tried between checks of the clock
+
+logger = logging.getLogger(__name__)
 
 
 def verifier(
@@ -44,12 +52,12 @@ def verifier(
     assert all(FLAG not in row for row in mine_field), "The mine field has a flag in it"
     for r, c in to_reveal:
         if mine_field[r][c] == MINE:
-            print_position(position)
+            log_position(position)
             raise ValueError("Solver tried revealing a mine")
         position[r][c] = mine_field[r][c]  # type: ignore
     for r, c in to_flag:
         if mine_field[r][c] != MINE:
-            print_position(position)
+            log_position(position)
             raise ValueError("Solver flagging a non mine")
         position[r][c] = FLAG
 
@@ -61,39 +69,186 @@ def bind_verifier(mine_field: MineField):
     return func
 
 
+class SolveResult(NamedTuple):
+    revealed: PositionSet
+    flagged: PositionSet
+    complete: bool  # False when the budget ran out before the solver got stuck
+
+
+class BudgetExceeded(Exception):
+    pass
+
+
+class Budget:
+    """How long a solve may take, as a `perf_counter` deadline and a number of search nodes."""
+
+    def __init__(self, deadline: float | None = None, max_nodes: int | None = None) -> None:
+        self.deadline = deadline
+        self.max_nodes = max_nodes
+        self.nodes = 0
+
+    def is_limited(self) -> bool:
+        return self.deadline is not None or self.max_nodes is not None
+
+    def check(self) -> None:
+        if self.deadline is not None and perf_counter() >= self.deadline:
+            raise BudgetExceeded
+
+    def spend(self) -> None:
+        self.nodes += 1
+        if self.max_nodes is not None and self.nodes > self.max_nodes:
+            raise BudgetExceeded
+        if self.nodes % DEADLINE_CHECK_INTERVAL == 0:
+            self.check()
+
+
+def placements(cells: list[Position], sets: SetDict, budget: Budget) -> Iterator[list[int]]:
+    """Yields every placement of mines on `cells` that satisfies `sets`, as a 0 or a 1 for each
+    cell. The same list is yielded every time, changed in place as the search goes on.
+    """
+    index = {pos: i for i, pos in enumerate(cells)}
+    constraints_of: list[list[int]] = [[] for _ in cells]
+    mines_left, cells_left = [], []
+    for j, (s, val) in enumerate(sets.items()):
+        for pos in s:
+            constraints_of[index[pos]].append(j)
+        mines_left.append(val)
+        cells_left.append(len(s))
+
+    def fits(i: int, value: int) -> bool:
+        return all(0 <= mines_left[j] - value <= cells_left[j] - 1 for j in constraints_of[i])
+
+    def place(i: int, value: int, step: int) -> None:
+        for j in constraints_of[i]:
+            mines_left[j] -= value * step
+            cells_left[j] -= step
+
+    num_cells = len(cells)
+    values = [-1] * num_cells
+    i = 0
+    # depth first over the cells in board order, which keeps the constraints of a component
+    # mostly closed before moving on
+    while i >= 0:
+        if i == num_cells:
+            yield values
+            i -= 1
+            continue
+        value = values[i]
+        if value >= 0:
+            place(i, value, -1)
+        value += 1
+        while value <= 1 and not fits(i, value):
+            value += 1
+        if value > 1:
+            values[i] = -1
+            i -= 1
+            continue
+        budget.spend()
+        place(i, value, 1)
+        values[i] = value
+        i += 1
+
+
+class Tally(NamedTuple):
+    """The placements of mines on a component, by the number of mines they use."""
+
+    cells: list[Position]
+    layouts: Layouts
+    complete: bool  # False when the budget ran out before every placement was found
+
+    def counts(self) -> dict[int, int]:
+        return {k: len(placed) for k, placed in self.layouts.items()}
+
+    def deductions(self) -> Deductions:
+        """Returns the cells that are safe in every placement and the ones that are mines in
+        every placement.
+        """
+        seen_mine, always_mine = 0, -1
+        for placed in self.layouts.values():
+            for mask in placed:
+                seen_mine |= mask
+                always_mine &= mask
+        safe = frozenset(pos for k, pos in enumerate(self.cells) if not seen_mine >> k & 1)
+        mines = frozenset(pos for k, pos in enumerate(self.cells) if always_mine >> k & 1)
+        return safe, mines
+
+
+def tally(sets: SetDict, budget: Budget) -> Tally:
+    """Finds every placement of mines that satisfies the constraints of a component. When the
+    budget runs out only the placements found so far are returned, which still fit but come from
+    the first cells searched, and BudgetExceeded is raised if there are none.
+    """
+    cells = sorted(set().union(*sets))
+    layouts: Layouts = {}
+    complete = True
+    try:
+        for values in placements(cells, sets, budget):
+            mask = 0
+            for k, value in enumerate(values):
+                mask |= value << k
+            layouts.setdefault(mask.bit_count(), []).append(mask)
+    except BudgetExceeded:
+        if not layouts:
+            raise
+        complete = False
+    if not layouts:
+        raise ValueError("No placement of mines satisfies the constraints")
+    return Tally(cells, layouts, complete)
+
+
 class Solver:
     def __init__(
         self,
         num_mines: int,
         position: PlayerPosition,
         verifier: Callable[[PlayerPosition, Iterable[Position], Iterable[Position]], None],
+        neighboring: list[list[int]] | None = None,
     ) -> None:
         self.num_mines = num_mines
         self.position = position
         self.verifier = verifier
+        self.neighboring = NEIGHBORING if neighboring is None else neighboring
+        # the cells that changed in the last step, or None when all of the frontier is new
+        self.touched: PositionSet | None = None
 
         self.num_rows = len(position)
         self.num_columns = len(position[0])
 
         self.bordering = set(self.find_all_bordering())
-
-    def solve(self, tentative):
+        # kept through `update`, so repeated solves of a game only work on the parts that changed
+        self.zobrist = ZobristKeys()
+        self.table: TranspositionTable[Deductions] = TranspositionTable()
+        self.tallies: TranspositionTable[Tally] = TranspositionTable()
+
+    def solve(
+        self, tentative, deadline: float | None = None, max_nodes: int | None = None
+    ) -> SolveResult:
+        """Runs the rules until they are stuck. Given a budget, it then escalates to enumerating
+        every placement of mines on each component, going back to the rules whenever that finds
+        something, and returns what it proved so far once the budget runs out.
+
+        `deadline` is a `perf_counter` time and `max_nodes` caps the placements tried. Without
+        either only the rules run, as enumerating can take exponential time.
+        """
+        budget = Budget(deadline, max_nodes)
         revealed, flagged = set(), set()
-        while (val := self.solve_step(tentative))[0]:
-            revealed |= val[1][0]
-            flagged |= val[1][1]
-        # to_reveal, to_flag = self.brute_force(2)
-        # if bool(to_reveal) or bool(to_flag):
-        #     print_marked(
-        #         self.position,
-        #         {
-        #             frozenset(to_reveal): Fore.GREEN + "R" + Fore.RESET,
-        #             frozenset(to_flag): Fore.GREEN + "F" + Fore.RESET,
-        #         },
-        #     )
-        #     print("Brute force revealed something")
-        # return revealed | to_reveal, flagged | to_flag
-        return revealed, flagged
+        try:
+            while True:
+                budget.check()
+                changed, (to_reveal, to_flag) = self.solve_step(tentative)
+                if not changed and budget.is_limited():
+                    to_reveal, to_flag, finished = self.enumeration_step(tentative, budget)
+                    if not finished:
+                        revealed |= to_reveal
+                        flagged |= to_flag
+                        raise BudgetExceeded
+                    changed = bool(to_reveal or to_flag)
+                if not changed:
+                    return SolveResult(revealed, flagged, True)
+                revealed |= to_reveal
+                flagged |= to_flag
+        except BudgetExceeded:
+            return SolveResult(revealed, flagged, False)
 
     def find_all_bordering(self):
         for row in range(self.num_rows):
@@ -111,15 +266,61 @@ class Solver:
         return False
 
     def solve_step(self, tentative=False):
-        sets = self.get_sets()
-        self.check_subsets(sets)
-        self.check_squeezes(sets)
-        self.check_subsets(sets)
-        changed = self.apply_basic_logic(sets, tentative)
-        if not tentative:
-            self.update_bordering()
+        to_reveal, to_flag = set(), set()
+        for key, sets in self.get_components():
+            deductions = self.table.get(key)
+            if deductions is None:
+                deductions = self.deduce(sets)
+                self.table.put(key, deductions)
+            to_reveal |= deductions[0]
+            to_flag |= deductions[1]
+        changed = self.apply_moves(to_reveal, to_flag, tentative)
+        self.end_step(changed, tentative)
         return (bool(changed[0]) or bool(changed[1])), changed
 
+    def end_step(self, changed: tuple[PositionSet, PositionSet], tentative) -> None:
+        self.touched = changed[0] | changed[1]
+        if not tentative:
+            self.update_bordering(self.touched)
+
+    def enumeration_step(self, tentative, budget: Budget) -> tuple[PositionSet, PositionSet, bool]:
+        """Applies what enumerating the components proves, smallest first, and returns the moves
+        along with whether every component was enumerated before the budget ran out.
+        """
+        to_reveal, to_flag = set(), set()
+        finished = True
+        components = sorted(self.get_components(), key=lambda item: len(set().union(*item[1])))
+        try:
+            for key, sets in components:
+                safe, mines = self.enumerate_component(key, sets, budget)
+                to_reveal |= safe
+                to_flag |= mines
+        except BudgetExceeded:
+            finished = False
+        changed = self.apply_moves(to_reveal, to_flag, tentative)
+        self.end_step(changed, tentative)
+        return changed[0], changed[1], finished
+
+    def enumerate_component(self, key: int, sets: SetDict, budget: Budget) -> Deductions:
+        """Tries every placement of mines that satisfies the constraints of a component, and
+        returns the cells that are safe in all of them and the ones that are mines in all of them.
+        """
+        counted = self.component_tally(key, sets, budget)
+        if not counted.complete:
+            raise BudgetExceeded
+        return counted.deductions()
+
+    def component_tally(self, key: int, sets: SetDict, budget: Budget) -> Tally:
+        """Returns the placements of a component with the Zobrist hash `key`, from the table when
+        it was enumerated before. Tallies cut short by the budget are not kept.
+        """
+        counted = self.tallies.get(key)
+        if counted is None:
+            counted = tally(sets, budget)
+            if counted.complete:
+                self.tallies.put(key, counted)
+        return counted
+
     def brute_force(self, max_depth):
         possible_mine_positions = set()
 
@@ -170,9 +371,7 @@ class Solver:
         try:
             self.verifier(self.position, never_mines, always_mines)
         except ValueError as e:
-            print(e)
-            print("Mines:", always_mines)
-            print("Revealed:", never_mines)
+            logger.info("%s. Mines: %s Revealed: %s", e, always_mines, never_mines)
         # print("FINAL:")
         # print_marked(
         #     self.position,
@@ -202,31 +401,31 @@ class Solver:
                 return False
         return True
 
-    def update_bordering(self):
-        new_bordering = set()
-        seen = self.bordering.copy()
-        while self.bordering:
-            r, c = self.bordering.pop()
-            seen.add((r, c))
+    def update_bordering(self, changed: Iterable[Position]):
+        """Re-checks only the cells that `is_bordering` can answer differently for after `changed`
+        were revealed or flagged: those cells and their neighbors.
+        """
+        to_check = set()
+        for r, c in changed:
+            to_check.add((r, c))
+            to_check.update(self.neighbors(r, c))
+        for r, c in to_check:
             if self.is_bordering(r, c):
-                new_bordering.add((r, c))
-            for nr, nc in self.neighbors(r, c):
-                if (nr, nc) in seen:
-                    continue
-                if self.is_bordering(nr, nc):
-                    new_bordering.add((nr, nc))
-        self.bordering = new_bordering
-
-    def apply_basic_logic(self, sets: SetDict, tentative):
-        to_reveal = set()
-        to_flag = set()
-        for s, val in sets.items():
-            if len(s) == 0 or val > len(s):
-                raise ValueError("Sets/values are malformed")
-            if val == 0:
-                to_reveal |= s
-            elif len(s) == val:
-                to_flag |= s
+                self.bordering.add((r, c))
+            else:
+                self.bordering.discard((r, c))
+
+    def deduce(self, sets: SetDict) -> Deductions:
+        """Runs the rules on the constraints of a component, as bitmasks over its cells."""
+        frontier = Frontier()
+        masks = frontier.encode(sets)
+        check_subsets(masks)
+        check_squeezes(masks)
+        check_subsets(masks)
+        to_reveal, to_flag = basic_logic(masks)
+        return frontier.cells_of(to_reveal), frontier.cells_of(to_flag)
+
+    def apply_moves(self, to_reveal: PositionSet, to_flag: PositionSet, tentative):
         if tentative:
             self.mark_tentatively(to_reveal, to_flag)
         else:
@@ -263,84 +462,55 @@ class Solver:
                 sets[frozenset(group)] = val
         return sets
 
-    def check_subsets(self, sets: SetDict):
-        changed = False
-        for (set1, val1), (set2, val2) in combinations(sets.items(), 2):
-            if set1.issubset(set2):
-                superset = set2
-                superset_val = val2
-                subset = set1
-                subset_val = val1
-            elif set2.issubset(set1):
-                superset = set1
-                superset_val = val1
-                subset = set2
-                subset_val = val2
-            else:
-                continue
-            changed = True
-            new_val = superset_val - subset_val
-            new_set = superset - subset
-            if superset in sets:
-                sets.pop(superset)
-            if new_set and new_set not in sets:
-                sets[new_set] = new_val
-        return changed
-
-    def check_squeezes(self, sets: SetDict):
-        """
-        Check for "squeezes" that could occur.
-        Ex:
-        ....
-        .12#
-        The cell in the top right must be a mine and the leftmost two cells must not be mines.
+    def get_components(self) -> list[tuple[int, SetDict]]:
+        """Splits the constraints into groups that share no cells, each with the Zobrist hash of
+        the numbers and unknown cells it comes from.
         """
-        seen_groups = {}
-        changed = False
-        for (set1, val1), (set2, val2) in combinations(sets.items(), 2):
-            if val1 == 0 or val2 == 0:
-                continue
-            # no squeeze can happen if both cells have the same values
-            if val1 == val2:
-                continue
-            intersection = set1 & set2
-            # squeezes can only happen when a number of mines in an area is limited by an adjacent cell, thus the shared area between the sets must be more than the minimum number of mines in an area
-            if len(intersection) < min(val1, val2) + 1:
-                continue
-            large_set, small_val, large_val = (
-                (set2, val1, val2) if val1 < val2 else (set1, val2, val1)
-            )
-            large_not_small = large_set - intersection
-            # after limiting the number of mines that can be in the intersecting area, there must be mines in the larger, non-intersecting area
-            if len(large_not_small) == large_val - small_val:
-                if intersection not in sets:
-                    sets[intersection] = small_val
-                    changed = True
-                continue
-            if intersection not in seen_groups:
-                seen_groups[intersection] = (0, small_val)
-            else:
-                other_small, other_large = seen_groups[intersection]
-                if small_val == other_small and intersection not in sets:
-                    changed = True
-                    sets[intersection] = small_val
+        parent: dict[Position, Position] = {}
 
-            if large_not_small not in seen_groups:
-                seen_groups[large_not_small] = (large_val - small_val, large_val)
-            else:
-                other_small, other_large = seen_groups[large_not_small]
-                if other_small != large_val and other_large != large_val - small_val:
-                    continue
-                val = large_val if other_small == large_val else other_large
-                if large_not_small not in sets:
-                    changed = True
-                    sets[large_not_small] = val
-        return changed
+        def find(pos: Position) -> Position:
+            while parent[pos] != pos:
+                parent[pos] = parent[parent[pos]]
+                pos = parent[pos]
+            return pos
+
+        groups: dict[Position, tuple[set[Position], int]] = {}
+        for row, col in self.bordering:
+            val = int(self.position[row][col])
+            group = set()
+            for nr, nc in self.neighbors(row, col):
+                n_val = self.position[nr][nc]
+                if n_val == UNKNOWN:
+                    group.add((nr, nc))
+                elif n_val == FLAG:
+                    val -= 1
+            if val < 0:
+                raise ValueError
+            if not group:
+                continue
+            groups[(row, col)] = group, val
+            parent.setdefault((row, col), (row, col))
+            for pos in group:
+                parent.setdefault(pos, pos)
+                parent[find(pos)] = find((row, col))
+
+        components: dict[Position, tuple[dict[Position, int], set[Position]]] = {}
+        for pos, (group, val) in groups.items():
+            numbers, unknowns = components.setdefault(find(pos), ({}, set()))
+            numbers[pos] = val
+            unknowns |= group
+        result = []
+        for numbers, unknowns in components.values():
+            sets: SetDict = {}
+            for pos, val in numbers.items():
+                sets[frozenset(groups[pos][0])] = val
+            result.append((self.zobrist.hash(numbers, unknowns), sets))
+        return result
 
     def neighbors(self, r, c):
-        for dr, dc in NEIGHBORING:
+        for dr, dc in self.neighboring:
             nr, nc = r + dr, c + dc
-            if 0 <= nr < len(self.position) and 0 <= nc < len(self.position[1]):
+            if 0 <= nr < self.num_rows and 0 <= nc < self.num_columns:
                 yield (nr, nc)
 
     @staticmethod
@@ -348,10 +518,31 @@ class Solver:
         return isinstance(val, int) or val == REVEALED
 
     def update_position(self, position: PlayerPosition):
+        """Takes the position the player sees now. On a board of the same size only the cells
+        that differ from the last position are looked at, comparing whole rows first.
+        """
+        old = self.position
         self.position = position
-        self.num_rows = len(position)
-        self.num_columns = len(position[0])
-        self.bordering = set(self.find_all_bordering())
+        self.touched = None
+        if (
+            position is old
+            or len(position) != self.num_rows
+            or len(position[0]) != self.num_columns
+        ):
+            self.num_rows = len(position)
+            self.num_columns = len(position[0])
+            self.bordering = set(self.find_all_bordering())
+            return
+        # a tentative solve leaves marks that were never part of the frontier, so the numbers
+        # it was kept for are checked as well
+        self.bordering = {(r, c) for r, c in self.bordering if self.is_bordering(r, c)}
+        self.update_bordering(
+            (r, c)
+            for r, (row, old_row) in enumerate(zip(position, old))
+            if row != old_row
+            for c, (val, old_val) in enumerate(zip(row, old_row))
+            if val != old_val
+        )
 
     def update_num_mines(self, num_mines: int):
         if num_mines < 0:
@@ -363,7 +554,9 @@ class Solver:
         self.update_position(position)
 
 
-def print_position(position: PlayerPosition):
+def format_position(position: PlayerPosition) -> str:
+    from colorama import Fore
+
     def convert(val: int | str) -> str:
         if val == UNKNOWN:
             fore = Fore.LIGHTBLACK_EX
@@ -377,9 +570,17 @@ def print_position(position: PlayerPosition):
             return str(val)
         return fore + str(val) + Fore.RESET
 
-    for row in position:
-        print("".join(map(convert, row)))
-    print()
+    return "".join("".join(map(convert, row)) + "\n" for row in position)
+
+
+def print_position(position: PlayerPosition):
+    print(format_position(position))
+
+
+def log_position(position: PlayerPosition, level: int = logging.DEBUG):
+    """Logs the position, only formatting it when the level is enabled."""
+    if logger.isEnabledFor(level):
+        logger.log(level, "\n%s", format_position(position))
 
 
 def print_marked(position: PlayerPosition, marked: dict[frozenset[Position], str]):
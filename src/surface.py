@@ -3,20 +3,30 @@ import pygame
 from settings import *
 from aliases import *
 from util import *
+from viewport import ChunkCache
 
 
 class Surface(ABC):
+    """A layer of the minefield, drawn from cached chunks covering the part that is on screen."""
+
     def __init__(self):
-        block_size = get_block_size()
-        self.surface = pygame.Surface([MINE_FIELD_WIDTH * block_size, MINE_FIELD_HEIGHT * block_size])
+        self.chunks = ChunkCache((MINE_FIELD_HEIGHT, MINE_FIELD_WIDTH), self.render_chunk)
         self.display_surface = pygame.display.get_surface()
 
     @abstractmethod
     def update(self, position: Position) -> None: ...
 
     @abstractmethod
-    def draw(self) -> None: ...
+    def render_chunk(self, chunk: Position, block_size: int) -> pygame.Surface: ...
+
+    def draw(self) -> None:
+        viewport = get_viewport()
+        for chunk in viewport.visible_chunks(self.chunks.chunk_size):
+            self.display_surface.blit(
+                self.chunks.get(chunk, viewport.block_size),
+                viewport.to_screen(self.chunks.origin(chunk)),
+            )
 
     def resize(self) -> None:
-        block_size = get_block_size()
-        self.surface = pygame.Surface([MINE_FIELD_WIDTH * block_size, MINE_FIELD_HEIGHT * block_size])
+        self.display_surface = pygame.display.get_surface()
+        self.chunks.clear()
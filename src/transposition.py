@@ -0,0 +1,83 @@
+"""
+Zobrist hashing of frontier components and a bounded table of what was concluded about them.
+
+A component is a group of revealed numbers connected through the unknown cells around them. Its
+state is the numbers with their values left after flags, and which of their neighbors are unknown,
+which together fix every constraint the solver builds from it. The hash of a state is the XOR of a
+random key for every (cell, state) pair in it, so equal states always meet in the table, wherever
+and whenever they come up.
+"""
+
+from collections import OrderedDict
+from random import Random
+from typing import Generic, TypeVar
+
+Position = tuple[int, int]
+T = TypeVar("T")
+
+UNKNOWN_STATE = -1  # the state of an unknown cell, numbers are their own state
+MAX_ENTRIES = 4096
+ZOBRIST_SEED = 0
+
+
+class ZobristKeys:
+    """A random 64 bit key for every (cell, state) pair, made the first time it is asked for."""
+
+    def __init__(self, seed: int = ZOBRIST_SEED) -> None:
+        self.rng = Random(seed)
+        self.keys: dict[tuple[Position, int], int] = {}
+
+    def key(self, pos: Position, state: int) -> int:
+        key = self.keys.get((pos, state))
+        if key is None:
+            key = self.keys[(pos, state)] = self.rng.getrandbits(64)
+        return key
+
+    def hash(self, numbers: dict[Position, int], unknowns: set[Position]) -> int:
+        value = 0
+        for pos, state in numbers.items():
+            value ^= self.key(pos, state)
+        for pos in unknowns:
+            value ^= self.key(pos, UNKNOWN_STATE)
+        return value
+
+
+class TranspositionTable(Generic[T]):
+    """Maps state hashes to results, dropping the least recently used beyond `max_entries`.
+
+    Only the 64 bit hashes are stored, not the states, so two states could share an entry. With
+    a few thousand entries the odds of that are around 1 in 10^12.
+    """
+
+    def __init__(self, max_entries: int = MAX_ENTRIES) -> None:
+        self.max_entries = max_entries
+        self.entries: OrderedDict[int, T] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: int) -> T | None:
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key: int, entry: T) -> None:
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+    def stats(self) -> dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit rate": self.hits / lookups if lookups else 0.0,
+        }
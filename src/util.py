@@ -4,6 +4,9 @@ import pygame
 from settings import *
 from aliases import *
 from typing import Any
+from viewport import Viewport
+
+_viewport: Viewport | None = None
 
 
 def make_text(blit_surf: pygame.Surface, pos: Position, text: Any, size: int, color: str) -> None:
@@ -13,36 +16,36 @@ def make_text(blit_surf: pygame.Surface, pos: Position, text: Any, size: int, co
     blit_surf.blit(surf, surf.get_rect(center=pos))
 
 
+def get_viewport() -> Viewport:
+    """Returns the part of the minefield on screen, which is set up once the display exists."""
+    global _viewport
+    if _viewport is None:
+        _viewport = Viewport(
+            (MINE_FIELD_HEIGHT, MINE_FIELD_WIDTH),
+            pygame.display.get_surface().get_size(),
+            HEADER_HEIGHT,
+        )
+    return _viewport
+
+
 def get_mouse_pos() -> Position:
     """Calculates the position on the minefield the mouse is hovering over."""
-    mouse_pos = pygame.mouse.get_pos()
-    block_size = get_block_size()
-    return (
-        (mouse_pos[1] - HEADER_HEIGHT - get_top_margin()) // block_size,
-        (mouse_pos[0] - get_left_margin()) // block_size,
-    )
+    return get_viewport().cell_at(pygame.mouse.get_pos())
 
 
 def get_block_size() -> int:
-    """Calculates the block size of the minefield."""
-    return min(
-        pygame.display.get_surface().get_width() // MINE_FIELD_WIDTH,
-        (pygame.display.get_surface().get_height() - HEADER_HEIGHT) // MINE_FIELD_HEIGHT,
-    )
+    """Returns the block size of the minefield at the current zoom."""
+    return get_viewport().block_size
 
 
 def get_left_margin() -> int:
-    """Calculates the margin left of the minefield."""
-    width = pygame.display.get_surface().get_width()
-    mine_field_width = get_block_size() * MINE_FIELD_WIDTH
-    return (width - mine_field_width) // 2
+    """Calculates the margin left of the minefield, which is negative once it is scrolled."""
+    return -get_viewport().x
 
 
 def get_top_margin() -> int:
-    """Calculates the margin above the minefield."""
-    height = pygame.display.get_surface().get_height()
-    mine_field_height = get_block_size() * MINE_FIELD_HEIGHT
-    return (height - HEADER_HEIGHT - mine_field_height) // 2
+    """Calculates the margin above the minefield, which is negative once it is scrolled."""
+    return -get_viewport().y
 
 
 def value_at(position: Position) -> int | str: ...
@@ -59,8 +62,4 @@ def bind_value_at(mine_field: MineField):
 
 def convert_to_absolute(position: Position) -> Position:
     """Converts a position on the minefield to absolute coordinates on the display surface."""
-    block_size = get_block_size()
-    return (
-        position[1] * block_size + get_left_margin(),
-        position[0] * block_size + get_top_margin() + HEADER_HEIGHT,
-    )
+    return get_viewport().to_screen(position)
@@ -0,0 +1,173 @@
+"""
+The part of the board that is on screen, and a cache of rendered chunks of the board.
+
+Only the chunks overlapping the screen are drawn every frame and a chunk is only rendered again
+once one of its cells changes, so the frame time depends on the size of the window rather than the
+size of the board.
+"""
+
+from collections import OrderedDict
+from collections.abc import Callable, Iterable, Iterator
+from typing import Generic, TypeVar
+
+Position = tuple[int, int]
+T = TypeVar("T")
+
+CHUNK_SIZE = 16  # cells along each side of a chunk
+MAX_CHUNKS = 256  # rendered chunks kept before the least recently drawn ones are evicted
+MIN_BLOCK_SIZE = 4
+MAX_BLOCK_SIZE = 96
+ZOOM_STEP = 1.25
+PAN_STEP = 64  # in pixels
+
+
+class Viewport:
+    """
+    Maps between cells and pixels on the screen. `x` and `y` are the pixel of the board shown at
+    the top left corner of the view, which starts `top` pixels below the top of the screen.
+    """
+
+    def __init__(
+        self,
+        grid_size: tuple[int, int],
+        screen_size: tuple[int, int],
+        top: int = 0,
+        block_size: int | None = None,
+    ) -> None:
+        self.grid_size = grid_size
+        self.top = top
+        self.width, self.height = screen_size[0], screen_size[1] - top
+        self.block_size = self.fitting_block_size() if block_size is None else block_size
+        self.x = self.y = 0
+        self.clamp()
+
+    def fitting_block_size(self) -> int:
+        """The block size that fits the whole board on screen, if that is not too small."""
+        rows, columns = self.grid_size
+        fitting = min(self.width // columns, self.height // rows)
+        return max(MIN_BLOCK_SIZE, min(fitting, MAX_BLOCK_SIZE))
+
+    def resize(self, screen_size: tuple[int, int]) -> None:
+        self.width, self.height = screen_size[0], screen_size[1] - self.top
+        self.clamp()
+
+    def clamp(self) -> None:
+        """Centers boards smaller than the view and stops larger ones from scrolling off screen."""
+        board_width = self.grid_size[1] * self.block_size
+        board_height = self.grid_size[0] * self.block_size
+        if board_width <= self.width:
+            self.x = (board_width - self.width) // 2
+        else:
+            self.x = max(0, min(self.x, board_width - self.width))
+        if board_height <= self.height:
+            self.y = (board_height - self.height) // 2
+        else:
+            self.y = max(0, min(self.y, board_height - self.height))
+
+    def pan(self, dx: int, dy: int) -> None:
+        self.x += dx
+        self.y += dy
+        self.clamp()
+
+    def zoom(self, factor: float, anchor: Position | None = None) -> bool:
+        """
+        Scales the block size by `factor`, keeping the board under the `anchor` pixel (the middle
+        of the view by default) in place. Returns whether the block size changed.
+        """
+        if anchor is None:
+            anchor = self.width // 2, self.height // 2 + self.top
+        ax, ay = anchor[0], anchor[1] - self.top
+        block_size = max(MIN_BLOCK_SIZE, min(round(self.block_size * factor), MAX_BLOCK_SIZE))
+        if block_size == self.block_size:
+            return False
+        board_x = (self.x + ax) / self.block_size
+        board_y = (self.y + ay) / self.block_size
+        self.block_size = block_size
+        self.x = round(board_x * block_size) - ax
+        self.y = round(board_y * block_size) - ay
+        self.clamp()
+        return True
+
+    def cell_at(self, pixel: Position) -> Position:
+        """Returns the cell under a pixel on the screen, which might not be on the board."""
+        return (
+            (pixel[1] - self.top + self.y) // self.block_size,
+            (pixel[0] + self.x) // self.block_size,
+        )
+
+    def to_screen(self, pos: Position) -> Position:
+        """Returns the pixel on the screen of the top left corner of a cell."""
+        return pos[1] * self.block_size - self.x, pos[0] * self.block_size - self.y + self.top
+
+    def visible_cells(self) -> tuple[range, range]:
+        """Returns the rows and columns of the cells that are at least partially on screen."""
+        rows, columns = self.grid_size
+        bottom = -(-(self.y + self.height) // self.block_size)  # rounded up
+        right = -(-(self.x + self.width) // self.block_size)
+        return (
+            range(max(0, self.y // self.block_size), min(rows, bottom)),
+            range(max(0, self.x // self.block_size), min(columns, right)),
+        )
+
+    def visible_chunks(self, chunk_size: int = CHUNK_SIZE) -> Iterator[Position]:
+        rows, columns = self.visible_cells()
+        if not rows or not columns:
+            return
+        for chunk_r in range(rows.start // chunk_size, (rows.stop - 1) // chunk_size + 1):
+            for chunk_c in range(columns.start // chunk_size, (columns.stop - 1) // chunk_size + 1):
+                yield chunk_r, chunk_c
+
+
+class ChunkCache(Generic[T]):
+    """
+    Rendered square chunks of the board, keyed by chunk position. `render` is called with a chunk
+    and the block size whenever a chunk that is not cached is needed, and the least recently used
+    chunks are evicted once there are more than `max_chunks`.
+    """
+
+    def __init__(
+        self,
+        grid_size: tuple[int, int],
+        render: Callable[[Position, int], T],
+        max_chunks: int = MAX_CHUNKS,
+        chunk_size: int = CHUNK_SIZE,
+    ) -> None:
+        self.grid_size = grid_size
+        self.render = render
+        self.max_chunks = max_chunks
+        self.chunk_size = chunk_size
+        self.block_size = 0
+        self.chunks: OrderedDict[Position, T] = OrderedDict()
+
+    def get(self, chunk: Position, block_size: int) -> T:
+        if block_size != self.block_size:  # zooming makes every chunk stale
+            self.chunks.clear()
+            self.block_size = block_size
+        rendered = self.chunks.get(chunk)
+        if rendered is not None:
+            self.chunks.move_to_end(chunk)
+            return rendered
+        rendered = self.chunks[chunk] = self.render(chunk, block_size)
+        if len(self.chunks) > self.max_chunks:
+            self.chunks.popitem(last=False)
+        return rendered
+
+    def invalidate(self, positions: Iterable[Position]) -> None:
+        """Drops the chunks holding any of `positions`, so they are rendered again when drawn."""
+        for r, c in positions:
+            self.chunks.pop((r // self.chunk_size, c // self.chunk_size), None)
+
+    def clear(self) -> None:
+        self.chunks.clear()
+
+    def origin(self, chunk: Position) -> Position:
+        """Returns the top left cell of a chunk."""
+        return chunk[0] * self.chunk_size, chunk[1] * self.chunk_size
+
+    def cells(self, chunk: Position) -> tuple[range, range]:
+        """Returns the rows and columns of the cells in a chunk."""
+        r, c = self.origin(chunk)
+        return (
+            range(r, min(r + self.chunk_size, self.grid_size[0])),
+            range(c, min(c + self.chunk_size, self.grid_size[1])),
+        )
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# the legacy game is run from inside `src`, so its modules are imported without a package
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
@@ -0,0 +1,52 @@
+import random
+
+import pytest
+
+import bitsets as legacy_bitsets
+from rebuild.interfaces import bitsets
+
+Position = tuple[int, int]
+
+
+def test_one_implementation():
+    assert bitsets.Frontier is legacy_bitsets.Frontier
+    assert bitsets.check_subsets is legacy_bitsets.check_subsets
+    assert bitsets.check_squeezes is legacy_bitsets.check_squeezes
+    assert bitsets.basic_logic is legacy_bitsets.basic_logic
+
+
+def random_constraints(
+    rng: random.Random,
+) -> tuple[dict[frozenset[Position], int], set[Position]]:
+    """The constraints of the revealed numbers of a small random board, and its mines."""
+    rows, columns = 5, 6
+    mines = set(rng.sample([(r, c) for r in range(rows) for c in range(columns)], 8))
+    revealed = {(r, c) for r in range(rows) for c in range(columns) if (r, c) not in mines}
+    revealed = set(rng.sample(sorted(revealed), 12))
+    sets = {}
+    for r, c in revealed:
+        cells = frozenset(
+            (r + dr, c + dc)
+            for dr in (-1, 0, 1)
+            for dc in (-1, 0, 1)
+            if 0 <= r + dr < rows and 0 <= c + dc < columns and (r + dr, c + dc) not in revealed
+        )
+        if cells:
+            sets[cells] = len(cells & mines)
+    return sets, mines
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_rules_are_sound(seed):
+    sets, mines = random_constraints(random.Random(seed))
+    frontier = bitsets.Frontier()
+    masks = frontier.encode(sets)
+    assert frontier.decode(masks) == sets
+    while bitsets.check_subsets(masks) or bitsets.check_squeezes(masks):
+        pass
+    # every constraint the rules derive still holds on the layout the numbers came from
+    for cells, val in frontier.decode(masks).items():
+        assert len(cells & mines) == val
+    to_reveal, to_flag = bitsets.basic_logic(masks)
+    assert not frontier.cells_of(to_reveal) & mines
+    assert frontier.cells_of(to_flag) <= mines
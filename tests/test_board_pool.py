@@ -0,0 +1,141 @@
+import time
+from concurrent.futures import Future
+from itertools import product
+
+import board_pool
+from board_pool import (
+    BoardPool,
+    generate_solvable_board,
+    is_clear,
+    is_solvable,
+    make_grid,
+    pool_key,
+)
+
+STANDARD = [(dr, dc) for dr, dc in product((-1, 0, 1), repeat=2) if (dr, dc) != (0, 0)]
+KEY = pool_key((8, 8), 0.15, STANDARD)
+
+
+def board(seed: int):
+    generated = generate_solvable_board(KEY, (4, 4), seed)
+    assert generated is not None
+    return generated
+
+
+def assert_solvable(mines, click):
+    assert mines is not None
+    assert len(mines) == board_pool.count_mines(KEY)
+    assert is_clear(KEY, mines, click)
+    assert is_solvable(KEY, make_grid(KEY, mines), click)
+
+
+def test_servable_clicks():
+    click, mines, clicks = board(0)
+    assert click in clicks
+    for pos in product(range(8), range(8)):
+        expected = is_clear(KEY, mines, pos) and is_solvable(KEY, make_grid(KEY, mines), pos)
+        assert (pos in clicks) == expected
+
+
+def test_take(tmp_path):
+    pool = BoardPool(str(tmp_path / "pool.json"))
+    click, mines, clicks = board(0)
+    pool.add(KEY, click, mines, clicks)
+    assert pool.take(KEY, clicks[-1]) == set(mines)
+    assert pool.available(KEY) == 0
+    assert pool.take(KEY, click) is None
+    pool.close()
+
+
+def test_take_any_click(tmp_path):
+    pool = BoardPool(str(tmp_path / "pool.json"))
+    for seed in range(4):
+        click, mines, _ = board(seed)
+        pool.add(KEY, click, mines)  # only indexed by the clicks opening the same region
+    served = 0
+    for click in [(0, 0), (0, 7), (7, 3), (2, 5)]:
+        if (mines := pool.take(KEY, click)) is not None:
+            assert_solvable(mines, click)
+            served += 1
+    assert served >= 3
+    pool.close()
+
+
+def test_remap_solves_without_the_lock(tmp_path, monkeypatch):
+    pool = BoardPool(str(tmp_path / "pool.json"))
+    for seed in range(4):
+        click, mines, _ = board(seed)
+        pool.add(KEY, click, mines, [click])  # any other click has to be remapped
+    taken = []
+
+    def solvable(key, grid, click):
+        assert not pool.lock.locked()
+        if not taken:
+            # another thread takes the board being solved
+            board_id = next(iter(pool.boards[KEY]))
+            taken.append(pool.boards[KEY].pop(board_id)[1])
+        return is_solvable(key, grid, click)
+
+    monkeypatch.setattr(board_pool, "is_solvable", solvable)
+    served = []
+    for click in [(0, 0), (0, 7), (7, 3), (2, 5)]:
+        if (mines := pool.take(KEY, click)) is not None:
+            assert_solvable(mines, click)
+            served.append(mines)
+    assert served and taken
+    assert len(served) + len(taken) + pool.available(KEY) == 4
+    pool.close()
+
+
+def test_persistence(tmp_path):
+    path = str(tmp_path / "pool.json")
+    pool = BoardPool(path)
+    for seed in range(3):
+        pool.add(KEY, *board(seed))
+    click, mines, clicks = board(0)
+    pool.take(KEY, clicks[0])
+    pool.join()
+    pool.close()
+
+    reloaded = BoardPool(path)
+    assert reloaded.available(KEY) == 2
+    assert sorted(reloaded.boards[KEY].values()) == sorted(
+        (tuple(click), [tuple(mine) for mine in mines], [tuple(pos) for pos in clicks])
+        for click, mines, clicks in pool.boards[KEY].values()
+    )
+    for pos in product(range(8), range(8)):
+        if (mines := reloaded.take(KEY, pos)) is not None:
+            assert_solvable(mines, pos)
+    reloaded.close()
+
+
+def test_refill(tmp_path):
+    path = str(tmp_path / "pool.json")
+    pool = BoardPool(path, pool_size=2, max_workers=1)
+    pool.refill(KEY)
+    deadline = time.monotonic() + 60
+    while pool.available(KEY) < 2 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert pool.available(KEY) == 2
+    pool.join()
+    pool.close()
+    assert BoardPool(path).available(KEY) == 2
+
+
+def test_refill_retries(tmp_path, monkeypatch):
+    pool = BoardPool(str(tmp_path / "pool.json"))
+    refills = []
+    monkeypatch.setattr(pool, "refill", refills.append)
+    for _ in range(board_pool.MAX_RETRIES + 2):
+        pool.pending[KEY] = pool.pending.get(KEY, 0) + 1
+        future: Future = Future()
+        future.set_result(None)
+        pool.on_generated(KEY, future)
+    assert len(refills) == board_pool.MAX_RETRIES
+
+    future = Future()
+    future.set_result(board(0))
+    pool.pending[KEY] += 1
+    pool.on_generated(KEY, future)
+    assert pool.failures[KEY] == 0
+    pool.close()
@@ -0,0 +1,41 @@
+from random import Random
+
+import pytest
+
+from rebuild.difftest import DiffConfig, TooLarge, check, minimize, random_case, run
+from rebuild.interfaces import bitsets
+
+
+def test_solvers_agree():
+    summary, found = run(DiffConfig(cases=100, workers=0))
+    assert summary["checked"] > 50
+    assert not found, [item.to_json() for item in found]
+
+
+def test_unsound_solver_is_caught(monkeypatch):
+    basic_logic = bitsets.basic_logic
+
+    def flag_pairs(masks):
+        # claims the mine of every one in two is on both cells
+        to_reveal, to_flag = basic_logic(masks)
+        for mask, val in masks.items():
+            if val == 1 and mask.bit_count() == 2:
+                to_flag |= mask
+        return to_reveal, to_flag
+
+    monkeypatch.setattr(bitsets, "basic_logic", flag_pairs)
+    config = DiffConfig()
+    for seed in range(100):
+        case = random_case(Random(seed), config)
+        try:
+            failures = check(case)
+        except TooLarge:
+            continue
+        if any(failure.kind == "rebuild > exact" for failure in failures):
+            break
+    else:
+        pytest.fail("no position caught the unsound rule")
+
+    small = minimize(case, "rebuild > exact")
+    assert small.size[0] * small.size[1] <= case.size[0] * case.size[1]
+    assert any(failure.kind == "rebuild > exact" for failure in check(small))
@@ -0,0 +1,74 @@
+import random
+from itertools import combinations
+
+import pytest
+
+from rebuild.interfaces.guessing import (
+    GuessConfig,
+    GuessEngine,
+    Strategy,
+    neighbors,
+    probabilities,
+    unknown_cells,
+    view,
+)
+from rebuild.interfaces.minefield import MineField
+from rebuild.interfaces.position import Pos
+
+
+def brute_force(rows, num_mines):
+    """Counts the layouts of a position directly, returning the chance of every unknown cell."""
+    unknowns = unknown_cells(rows)
+    counts = dict.fromkeys(unknowns, 0)
+    total = 0
+    for mines in combinations(unknowns, num_mines):
+        mines = set(mines)
+        if all(
+            int(val) == sum(n in mines or rows[n.r][n.c] == "F" for n in neighbors(rows, Pos(r, c)))
+            for r, row in enumerate(rows)
+            for c, val in enumerate(row)
+            if val.isdigit()
+        ):
+            total += 1
+            for pos in mines:
+                counts[pos] += 1
+    return {pos: count / total for pos, count in counts.items()}, total
+
+
+def small_position(seed):
+    random.seed(seed)
+    mine_field = MineField((5, 6), 6)
+    mine_field.generate(Pos(2, 3))
+    hidden = [pos for pos in unknown_cells(view(mine_field)) if mine_field.get_value(pos) != "M"]
+    mine_field.mark_all_revealed(random.sample(hidden, min(3, len(hidden))))
+    rows = view(mine_field)
+    return rows, 6
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_probabilities(seed):
+    rows, num_mines = small_position(seed)
+    if "." not in "".join(rows):
+        pytest.skip("the field was solved by the first click")
+    expected, total = brute_force(rows, num_mines)
+    probs = probabilities(rows, num_mines)
+    assert probs.weight == total
+    for pos in unknown_cells(rows):
+        assert probs.of(pos) == pytest.approx(expected[pos])
+
+
+def test_inconsistent_position():
+    Pos.set_bounds(2, 3)
+    # both numbers only touch one unknown cell, but need a different number of mines on it
+    with pytest.raises(ValueError):
+        probabilities(("1..", "2F."), 2)
+
+
+@pytest.mark.parametrize("strategy", list(Strategy))
+def test_choose(strategy):
+    Pos.set_bounds(3, 3)
+    # the 1 in the corner puts a mine on one of the three cells next to it, with two mines left
+    rows = ("1..", "...", "...")
+    with GuessEngine(GuessConfig(strategy)) as engine:
+        pos = engine.choose(rows, 2)
+    assert pos not in (Pos(0, 1), Pos(1, 0), Pos(1, 1))
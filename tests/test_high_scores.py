@@ -0,0 +1,100 @@
+import pytest
+
+from high_scores import HighScores
+
+KEY = ("16*30", "0.2", "[1]")
+OTHER_KEY = ("9*9", "0.12", "[1]")
+# sorted: 10, 10, 20, 20, 20, 30, 30, 40, 50, 60
+HISTORY = [40, 10, 30, 20, 20, 50, 20, 30, 60, 10]
+
+
+def test_append_then_reload(tmp_path):
+    path = tmp_path / "scores.txt"
+    scores = HighScores(str(path))
+    for score in (30, 10, 20):
+        scores.record(KEY, score)
+    scores.record(OTHER_KEY, 5)
+
+    reloaded = HighScores(str(path))
+    assert reloaded.history == {KEY: [30, 10, 20], OTHER_KEY: [5]}
+    assert reloaded.best(KEY) == 10
+
+
+def test_compact(tmp_path):
+    path = tmp_path / "scores.txt"
+    scores = HighScores(str(path), compact_after=3)
+    for score in (30, 10, 20):
+        scores.record(KEY, score)
+    assert path.read_text() == "16*30;0.2;[1];30,10,20\n"
+    assert HighScores(str(path)).history == {KEY: [30, 10, 20]}
+
+
+def test_torn_tail(tmp_path):
+    path = tmp_path / "scores.txt"
+    path.write_text("16*30;0.2;[1];30\n16*30;0.2;")
+    scores = HighScores(str(path))
+    assert scores.history == {KEY: [30]}
+    assert path.read_text() == "16*30;0.2;[1];30\n"
+
+    scores.record(KEY, 12)
+    assert HighScores(str(path)).history == {KEY: [30, 12]}
+
+
+def test_malformed_line(tmp_path):
+    path = tmp_path / "scores.txt"
+    path.write_text("16*30;0.2;[1];30\n16*30;0.2;[1];abc\nnot a score\n16*30;0.2;[1];25,\n")
+    scores = HighScores(str(path))
+    assert scores.history == {KEY: [30]}
+
+    scores.record(KEY, 12)
+    assert HighScores(str(path)).history == {KEY: [30, 12]}
+
+
+def recorded(path, **kwargs) -> HighScores:
+    scores = HighScores(str(path), **kwargs)
+    for score in HISTORY:
+        scores.record(KEY, score)
+    return scores
+
+
+@pytest.mark.parametrize(
+    "percent, expected",
+    [(0, 10), (10, 10), (20, 10), (25, 20), (50, 20), (60, 30), (90, 50), (100, 60), (150, 60)],
+)
+def test_percentile(tmp_path, percent, expected):
+    assert recorded(tmp_path / "scores.txt").percentile(KEY, percent) == expected
+
+
+@pytest.mark.parametrize(
+    "score, expected", [(5, 100.0), (10, 80.0), (20, 50.0), (25, 50.0), (60, 0.0), (70, 0.0)]
+)
+def test_rank(tmp_path, score, expected):
+    # tied scores are not beaten
+    assert recorded(tmp_path / "scores.txt").rank(KEY, score) == expected
+
+
+def test_no_scores(tmp_path):
+    scores = recorded(tmp_path / "scores.txt")
+    assert scores.best(OTHER_KEY) is None
+    assert scores.percentile(OTHER_KEY, 50) is None
+    assert scores.rank(OTHER_KEY, 5) == 100.0
+
+
+def test_history_survives_compaction(tmp_path):
+    path = tmp_path / "scores.txt"
+    scores = recorded(path, compact_after=4)
+    scores.record(OTHER_KEY, 5)
+    assert path.read_text().startswith("16*30;0.2;[1];40,10,30,20,20,50,20,30\n")
+
+    reloaded = HighScores(str(path), compact_after=4)
+    assert reloaded.history == {KEY: HISTORY, OTHER_KEY: [5]}
+    assert reloaded.sorted_scores == scores.sorted_scores
+    for percent in (0, 25, 50, 100):
+        assert reloaded.percentile(KEY, percent) == scores.percentile(KEY, percent)
+    assert reloaded.rank(KEY, 20) == 50.0
+
+    # a compaction after the reload keeps the scores from before it
+    for score in (15, 15):
+        reloaded.record(KEY, score)
+    assert len(path.read_text().splitlines()) == 2
+    assert HighScores(str(path)).history == {KEY: HISTORY + [15, 15], OTHER_KEY: [5]}
@@ -0,0 +1,54 @@
+import subprocess
+import sys
+
+import pytest
+
+PRESENTATION_DEPENDENCIES = ["pygame", "pydantic", "colorama"]
+
+CORE_MODULES = [
+    "rebuild.difftest",
+    "rebuild.interfaces.bitsets",
+    "rebuild.interfaces.guessing",
+    "rebuild.interfaces.infinite",
+    "rebuild.interfaces.minefield",
+    "rebuild.interfaces.probability",
+    "rebuild.interfaces.shared_board",
+    "rebuild.interfaces.solving_field",
+    "rebuild.interfaces.solver",
+    "rebuild.loadgen",
+    "rebuild.server",
+    "rebuild.settings",
+]
+# the legacy game is run from inside `src`, so its modules are imported without a package
+LEGACY_CORE_MODULES = [
+    "bitsets",
+    "board",
+    "board_pool",
+    "high_scores",
+    "replay",
+    "sampler",
+    "solver",
+    "transposition",
+    "viewport",
+]
+
+
+def imported_dependencies(module: str, path: str = ".") -> list[str]:
+    code = (
+        f"import sys; sys.path.insert(0, {path!r}); import {module}; "
+        f"print(*[name for name in {PRESENTATION_DEPENDENCIES!r} if name in sys.modules])"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    return result.stdout.splitlines()[-1].split()
+
+
+@pytest.mark.parametrize("module", CORE_MODULES)
+def test_core_imports(module):
+    assert imported_dependencies(module) == []
+
+
+@pytest.mark.parametrize("module", LEGACY_CORE_MODULES)
+def test_legacy_core_imports(module):
+    assert imported_dependencies(module, "src") == []
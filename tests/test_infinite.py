@@ -0,0 +1,50 @@
+import pytest
+
+from rebuild.interfaces.infinite import InfiniteMineField
+from rebuild.interfaces.position import Pos
+
+
+def test_chunks_are_deterministic(tmp_path):
+    field = InfiniteMineField(7, str(tmp_path / "a"))
+    other = InfiniteMineField(7, str(tmp_path / "b"), max_chunks=1)
+    positions = [Pos(r, c) for r in range(-40, 40, 3) for c in range(1000, 1100, 7)]
+    assert [field.get_value(pos) for pos in positions] == [
+        other.get_value(pos) for pos in positions
+    ]
+    assert len(other.chunks) == 1
+
+
+def test_counts_across_chunk_borders(tmp_path):
+    field = InfiniteMineField(3, str(tmp_path), chunk_size=8)
+    for r in range(-9, 9):
+        for c in range(-9, 9):
+            pos = Pos(r, c)
+            if not field.is_mine(pos):
+                assert field.get_value(pos) == sum(
+                    field.is_mine(npos) for npos in field.neighbors(pos)
+                )
+
+
+def test_spilled_chunks_keep_their_state(tmp_path):
+    field = InfiniteMineField(1, str(tmp_path), max_chunks=2)
+    revealed = field.start()
+    assert revealed and all(field.get_value(pos) != "M" for pos in revealed)
+    for c in range(10):
+        field.get_value(Pos(0, 1000 * c))
+    assert len(field.chunks) == 2
+    assert all(field.is_revealed(pos) for pos in revealed)
+
+
+def test_solve_frontier(tmp_path):
+    field = InfiniteMineField(3, str(tmp_path), max_chunks=16)
+    field.start()
+    for _ in range(3):
+        assert field.solve_frontier(8)
+    assert len(field.chunks) <= 16
+    for pos in field.frontier:
+        assert field.is_revealed(pos) and field.get_value(pos) != "M"
+
+
+def test_density_bounds(tmp_path):
+    with pytest.raises(ValueError):
+        InfiniteMineField(0, str(tmp_path), density=0.01)
@@ -0,0 +1,71 @@
+from copy import deepcopy
+from random import Random
+from time import perf_counter
+
+import pytest
+
+from board_pool import make_grid, opening, pool_key, random_mines
+from solver import MINE, STANDARD, SolveResult, Solver, bind_verifier
+
+KEY = pool_key((16, 30), 0.2, STANDARD)
+CLICK = (8, 15)
+
+
+def opened_board(seed: int):
+    """A random expert-like board, with the player's view after the first click."""
+    mines = random_mines(KEY, CLICK, Random(seed))
+    grid = make_grid(KEY, mines)
+    revealed = opening(KEY, grid, CLICK)
+    position = [
+        [grid[r][c] if (r, c) in revealed else "." for c in range(len(row))]
+        for r, row in enumerate(grid)
+    ]
+    return grid, position, len(mines)
+
+
+def solve(seed: int, **budget) -> SolveResult:
+    grid, position, num_mines = opened_board(seed)
+    # the verifier raises on any move that reveals a mine or flags a safe cell
+    result = Solver(num_mines, deepcopy(position), bind_verifier(grid)).solve(False, **budget)
+    assert all(grid[r][c] != MINE for r, c in result.revealed)
+    assert all(grid[r][c] == MINE for r, c in result.flagged)
+    return result
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_no_budget_runs_the_rules(seed):
+    grid, position, num_mines = opened_board(seed)
+    solver = Solver(num_mines, deepcopy(position), bind_verifier(grid))
+    revealed, flagged = set(), set()
+    while True:
+        changed, (to_reveal, to_flag) = solver.solve_step(False)
+        if not changed:
+            break
+        revealed |= to_reveal
+        flagged |= to_flag
+    assert solve(seed) == SolveResult(revealed, flagged, True)
+
+
+@pytest.mark.parametrize("seed", [4, 8])
+def test_enumeration_finds_more(seed):
+    rules = solve(seed)
+    enumerated = solve(seed, max_nodes=10**6)
+    assert enumerated.complete
+    assert rules.revealed < enumerated.revealed
+    assert rules.flagged <= enumerated.flagged
+
+
+@pytest.mark.parametrize("seed", [2, 3, 4, 5, 7, 8])
+def test_exhausted_budget(seed):
+    # the rules leave components too big to enumerate in 50 placements
+    result = solve(seed, max_nodes=50)
+    assert not result.complete
+    full = solve(seed, max_nodes=10**6)
+    assert result.revealed <= full.revealed and result.flagged <= full.flagged
+
+
+def test_deadline():
+    result = solve(8, deadline=perf_counter())
+    assert not result.complete
+    assert not result.revealed and not result.flagged
+
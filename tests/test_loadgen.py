@@ -0,0 +1,28 @@
+import asyncio
+
+from rebuild.loadgen import LoadConfig, percentile, run_load, solver_moves
+
+
+def test_percentile():
+    values = [float(i) for i in range(1, 101)]
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([3.0], 95) == 3
+    assert percentile([], 50) == 0
+
+
+def test_solver_moves():
+    assert solver_moves(["1.", ".."], 1) == ([], [])
+    # the 1 in the corner has a single unknown neighbor
+    reveals, flags = solver_moves(["1.", "11"], 1)
+    assert [(pos.r, pos.c) for pos in flags] == [(0, 1)] and reveals == []
+
+
+def test_run_load():
+    config = LoadConfig(bots=3, games=2, size=(9, 9), mines=10)
+    report = asyncio.run(run_load(config))
+    assert report["games"] == report["won"] + report["lost"] == 6
+    assert report["errors"] == 0
+    assert report["latency ms"]["actions"]["count"] > 0
+    assert report["memory per game bytes"] > 0
+    assert report["server"]["games"] == 0
@@ -21,16 +21,64 @@ def test_minefield():
         (Pos(0, 3), 0),
         (Pos(0, 4), 1),
         (Pos(1, 0), 0),
-        (Pos(1, 1), 1),
-        (Pos(1, 2), 1),
-        (Pos(1, 3), 1),
+        (Pos(1, 1), 0),
+        (Pos(1, 2), 0),
+        (Pos(1, 3), 0),
         (Pos(1, 4), 1),
         (Pos(2, 0), 0),
         (Pos(2, 1), 1),
+        (Pos(2, 2), 2),
+        (Pos(2, 3), 2),
+        (Pos(2, 4), 1),
         (Pos(3, 0), 0),
         (Pos(3, 1), 1),
-        (Pos(4, 0), 0),
-        (Pos(4, 1), 1),
-        (Pos(5, 0), 1),
-        (Pos(5, 1), 3),
+        (Pos(4, 0), 1),
+        (Pos(4, 1), 2),
     }
+
+
+@pytest.mark.parametrize("num_mines", [20, 90])
+def test_generate(num_mines):
+    # 90 of the 92 cells outside the dispersal area places the safe cells instead of the mines
+    field = MineField((10, 10), num_mines)
+    field.generate(Pos(0, 0))
+    rows = field.rows()
+    assert sum(val == "M" for row in rows for val in row) == num_mines
+    for r, row in enumerate(rows):
+        for c, val in enumerate(row):
+            if val != "M":
+                neighbors = MineField.neighbors(Pos(r, c))
+                assert val == sum(field.get_value(npos) == "M" for npos in neighbors)
+    assert field.is_revealed(Pos(0, 0)) and rows[0][0] == 0
+
+
+def test_mark_all_revealed():
+    field = MineField((10, 10), 20)
+    field.generate(Pos(0, 0))
+    safe = [
+        Pos(r, c) for r in range(10) for c in range(10) if field.get_value(Pos(r, c)) != "M"
+    ]
+    initially_revealed = set(field.all_revealed())
+    batched = field.mark_all_revealed(safe[::7])
+
+    sequential = MineField((10, 10), 20)
+    sequential.from_grid(field.rows(), Pos(0, 0))
+    for pos in safe[::7]:
+        sequential.mark_reveled(pos)
+    assert set(field.all_revealed()) == set(sequential.all_revealed())
+    assert batched == {pos for pos, _ in set(field.all_revealed()) - initially_revealed}
+
+
+def test_chord():
+    field = MineField((10, 10), 20)
+    field.generate(Pos(0, 0))
+    # (3, 1) is a 1 bordering a mine and one other unrevealed cell
+    assert field.chord(Pos(3, 1)) == set()
+    mine = next(
+        npos for npos in MineField.neighbors(Pos(3, 1)) if field.get_value(npos) == "M"
+    )
+    field.flag(mine)
+    revealed = field.chord(Pos(3, 1))
+    assert revealed == {Pos(4, 2)}
+    assert all(field.is_revealed(pos) for pos in revealed)
+    assert all(field.get_value(pos) != "M" for pos in revealed)
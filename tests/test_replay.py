@@ -0,0 +1,110 @@
+import random
+
+import pytest
+
+from board_pool import generate_solvable_board, make_grid, pool_key
+from rebuild.interfaces.guessing import probabilities
+from rebuild.interfaces.position import Pos
+from rebuild.interfaces.solver import Solver as RebuildSolver
+from replay import CHORD, FLAG, REVEAL, UNFLAG, GameRecorder, Replay, export_corpus, forced_cells
+from solver import STANDARD
+
+KEY = pool_key((8, 8), 0.15, STANDARD)
+
+
+def recorded_game(seed: int = 0) -> tuple[GameRecorder, list]:
+    """Records a first click on a board that needs no guess, then some clicks around it."""
+    click, mines, _ = generate_solvable_board(KEY, (4, 4), seed)
+    grid = make_grid(KEY, mines)
+    recorder = GameRecorder((8, 8), STANDARD, seed)
+    recorder.record(0, REVEAL, (0, 0))  # ignored, the game has not started
+    recorder.start(click, mines)
+    safe = [(r, c) for r in range(8) for c in range(8) if grid[r][c] != "M"]
+    events = [
+        (100, FLAG, mines[0]),
+        (250, UNFLAG, mines[0]),
+        (300, FLAG, mines[1]),
+        (420, REVEAL, safe[0]),
+        (500, CHORD, safe[0]),
+        (900, REVEAL, safe[-1]),
+    ]
+    for event in events:
+        recorder.record(*event)
+    return recorder, events
+
+
+def test_round_trip(tmp_path):
+    recorder, events = recorded_game()
+    path = str(tmp_path / "game.replay")
+    recorder.save(path)
+    replay = Replay.load(path, keyframe_interval=2)
+    assert replay.grid_size == (8, 8)
+    assert replay.neighboring == [tuple(offset) for offset in STANDARD]
+    assert replay.seed == 0
+    assert replay.first_click == recorder.first_click
+    assert replay.mine_positions == recorder.mine_positions
+    assert replay.events == events
+    assert replay.move_at_time(300) == 3
+
+    # seeking through the keyframes gives the same states as replaying every event
+    state, lost = replay.state_at(0)
+    for move, (_, action, pos) in enumerate(events, 1):
+        lost = replay.apply(state, action, pos) or lost
+        assert replay.state_at(move) == (state, lost)
+
+
+def test_not_started():
+    with pytest.raises(ValueError):
+        GameRecorder((8, 8), STANDARD, 0).to_bytes()
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_to_solver_test(seed):
+    recorder, events = recorded_game(seed)
+    replay = Replay(recorder.to_bytes())
+    for move in range(len(events) + 1):
+        if replay.state_at(move)[1]:
+            continue
+        test_input, solution = replay.to_solver_test(move)
+        solver = RebuildSolver(test_input, solution)
+        solver.solve()
+        assert solver.verify()
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_forced_cells(seed):
+    random.seed(seed)
+    mines = random.sample([(r, c) for r in range(5) for c in range(6)], 7)
+    grid = make_grid(pool_key((5, 6), 0, STANDARD), mines)
+    safe_cells = [(r, c) for r in range(5) for c in range(6) if grid[r][c] != "M"]
+    shown = set(random.sample(safe_cells, 8))
+    position = [[grid[r][c] if (r, c) in shown else "." for c in range(6)] for r in range(5)]
+    rows = ["".join(map(str, row)) for row in position]
+    Pos.set_bounds(5, 6)
+    probs = probabilities(rows, 7)
+    hidden = [(r, c) for r in range(5) for c in range(6) if (r, c) not in shown]
+    assert forced_cells(position, 7, STANDARD) == (
+        {pos for pos in hidden if probs.of(Pos(*pos)) == 0},
+        {pos for pos in hidden if probs.of(Pos(*pos)) == 1},
+    )
+
+
+def test_nothing_forced(tmp_path):
+    # the 1 in the corner shares its mine with three hidden cells
+    recorder = GameRecorder((2, 2), STANDARD, 0)
+    recorder.start((1, 1), [(0, 0)])
+    replay = Replay(recorder.to_bytes())
+    assert replay.to_solver_test(0) == ("1\n..\n.1\n", "..\n.1\n")
+
+    path = str(tmp_path / "guess.replay")
+    recorder.save(path)
+    assert export_corpus([path], str(tmp_path / "corpus")) == 0
+
+
+def test_export_corpus(tmp_path):
+    recorder, events = recorded_game()
+    path = str(tmp_path / "game.replay")
+    recorder.save(path)
+    written = export_corpus([path], str(tmp_path / "corpus"))
+    assert 0 < written <= len(events)
+    assert len(list((tmp_path / "corpus").glob("*.out"))) == written
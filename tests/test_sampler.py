@@ -0,0 +1,99 @@
+from itertools import combinations
+from random import Random
+
+import pytest
+
+from board_pool import make_grid, pool_key
+from sampler import sample_layout
+from solver import STANDARD, Budget, Solver
+
+# a 1 and a 2 on the edge of a small board, with 4 mines left
+POSITION = [
+    [".", ".", ".", ".", "."],
+    [".", 1, 2, ".", "."],
+    [".", ".", ".", ".", "."],
+    [".", ".", ".", ".", "."],
+]
+NUM_MINES = 4
+
+
+def layouts(position, num_mines, mines=(), safe=()):
+    """Every layout of `num_mines` mines on the unknown cells that fits the numbers."""
+    rows, columns = len(position), len(position[0])
+    unknowns = [
+        (r, c) for r in range(rows) for c in range(columns) if position[r][c] == "."
+    ]
+    key = pool_key((rows, columns), 0, STANDARD)
+    for layout in combinations(unknowns, num_mines):
+        grid = make_grid(key, layout)
+        if (
+            all(
+                grid[r][c] == value
+                for r, row in enumerate(position)
+                for c, value in enumerate(row)
+                if value != "."
+            )
+            and set(mines) <= set(layout)
+            and not set(safe) & set(layout)
+        ):
+            yield set(layout)
+
+
+def marginals(samples):
+    counts = {}
+    for layout in samples:
+        for pos in layout:
+            counts[pos] = counts.get(pos, 0) + 1
+    return {pos: count / len(samples) for pos, count in counts.items()}
+
+
+@pytest.mark.parametrize("mines, safe", [((), ()), ([(2, 1)], ()), ((), [(0, 1)])])
+def test_marginals(mines, safe):
+    exact = list(layouts(POSITION, NUM_MINES, mines, safe))
+    solver = Solver(NUM_MINES, [row[:] for row in POSITION], lambda *_: None, STANDARD)
+    rng = Random(0)
+    samples = []
+    for _ in range(2000):
+        layout, uniform = sample_layout(solver, rng, mines, safe)
+        assert uniform
+        assert layout in exact
+        samples.append(layout)
+    expected, sampled = marginals(exact), marginals(samples)
+    for r in range(len(POSITION)):
+        for c in range(len(POSITION[0])):
+            assert sampled.get((r, c), 0) == pytest.approx(expected.get((r, c), 0), abs=0.04)
+
+
+def test_impossible():
+    solver = Solver(NUM_MINES, [row[:] for row in POSITION], lambda *_: None, STANDARD)
+    with pytest.raises(ValueError):
+        # the 1 cannot have two of its cells be mines
+        sample_layout(solver, Random(0), [(0, 0), (0, 1)])
+
+
+def test_budget():
+    solver = Solver(NUM_MINES, [row[:] for row in POSITION], lambda *_: None, STANDARD)
+    layout, uniform = sample_layout(solver, Random(0), max_nodes=12)
+    assert not uniform
+    assert layout in list(layouts(POSITION, NUM_MINES))
+
+
+def test_tallies_are_shared():
+    solver = Solver(NUM_MINES, [row[:] for row in POSITION], lambda *_: None, STANDARD)
+    ((key, sets),) = solver.get_components()
+    cells = sorted(set().union(*sets))
+    counts = {}
+    for k in range(len(cells) + 1):
+        for mines in combinations(cells, k):
+            if all(len(s & set(mines)) == val for s, val in sets.items()):
+                counts[k] = counts.get(k, 0) + 1
+    assert solver.component_tally(key, sets, Budget()).counts() == counts
+
+    # a budget too small to find any placement, so every draw has to come from the table
+    for _ in range(3):
+        layout, uniform = sample_layout(solver, Random(0), max_nodes=0)
+        assert uniform
+    assert solver.tallies.hits == 3
+    # forcing a cell changes the component, which is enumerated on its own
+    sample_layout(solver, Random(0), [(2, 1)])
+    assert solver.tallies.stats()["entries"] == 1 and solver.tallies.hits == 3
@@ -0,0 +1,85 @@
+import asyncio
+import json
+
+from rebuild.interfaces.position import Pos
+from rebuild.server import GameServer
+
+
+def play_to_the_end(server: GameServer, game_id: int) -> dict:
+    response = server.handle({"op": "reveal", "game": game_id, "pos": [5, 5]})
+    mine_field = server.games[game_id].mine_field
+    rows, columns = mine_field.size
+    for r in range(rows):
+        for c in range(columns):
+            Pos.set_bounds(rows, columns)
+            if mine_field.is_revealed(Pos(r, c)) or mine_field.get_value(Pos(r, c)) == "M":
+                continue
+            response = server.handle({"op": "reveal", "game": game_id, "pos": [r, c]})
+    return response
+
+
+def test_games_are_independent():
+    server = GameServer()
+    small = server.handle({"op": "new", "size": [10, 10], "mines": 10})["game"]
+    large = server.handle({"op": "new", "size": [12, 30], "mines": 50})["game"]
+    server.handle({"op": "reveal", "game": large, "pos": [5, 5]})
+    assert play_to_the_end(server, small)["won"]
+    assert play_to_the_end(server, large)["won"]
+    rows = server.handle({"op": "state", "game": large})["rows"]
+    assert len(rows) == 12 and all(len(row) == 30 for row in rows)
+    assert "error" in server.handle({"op": "reveal", "game": small, "pos": [0, 0]})
+    assert server.handle({"op": "stats"})["finished"] == 2
+
+
+def test_moves():
+    server = GameServer()
+    game_id = server.handle({"id": 1, "op": "new", "size": [10, 10], "mines": 20})["game"]
+    assert server.handle({"op": "flag", "game": game_id, "pos": [9, 9]}) == {"flagged": True}
+    assert server.handle({"op": "flag", "game": game_id, "pos": [9, 9]}) == {"flagged": False}
+    response = server.handle({"op": "reveal", "game": game_id, "pos": [0, 0]})
+    assert [0, 0, 0] in response["revealed"] and not response["lost"]
+    assert "error" in server.handle({"op": "reveal", "game": game_id, "pos": [10, 0]})
+    assert "error" in server.handle({"op": "dance", "game": game_id})
+    assert server.handle({"id": 2, "op": "state", "game": 99}) == {
+        "id": 2,
+        "error": "No game with the id 99",
+    }
+
+
+def test_fields_are_pooled():
+    server = GameServer()
+    first = server.handle({"op": "new", "size": [10, 10], "mines": 10})["game"]
+    mine_field = server.games[first].mine_field
+    server.handle({"op": "reveal", "game": first, "pos": [0, 0]})
+    server.handle({"op": "close", "game": first})
+    second = server.handle({"op": "new", "size": [10, 10], "mines": 10})["game"]
+    assert server.games[second].mine_field is mine_field
+    assert server.handle({"op": "state", "game": second})["rows"] == ["." * 10] * 10
+
+
+def test_socket(tmp_path):
+    async def session():
+        server = GameServer()
+        listener = await server.serve(path=str(tmp_path / "server.sock"))
+        async with listener:
+            reader, writer = await asyncio.open_unix_connection(str(tmp_path / "server.sock"))
+            responses = []
+            for request in [
+                {"op": "new", "size": [8, 8], "mines": 5},
+                {"op": "reveal", "game": 0, "pos": [4, 4]},
+                "not json",
+            ]:
+                line = request if isinstance(request, str) else json.dumps(request)
+                writer.write(line.encode() + b"\n")
+                await writer.drain()
+                responses.append(json.loads(await reader.readline()))
+            writer.close()
+            await writer.wait_closed()
+            await asyncio.sleep(0.01)
+        return server, responses
+
+    server, responses = asyncio.run(session())
+    assert responses[0] == {"game": 0}
+    assert responses[1]["revealed"]
+    assert "error" in responses[2]
+    assert server.games == {}  # closed along with the connection
@@ -0,0 +1,85 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+from rebuild import settings
+
+
+def test_import_is_lazy():
+    code = (
+        "import builtins, sys; opened = []; real_open = builtins.open; "
+        "builtins.open = lambda path, *args, **kwargs: opened.append(path) or real_open("
+        "path, *args, **kwargs); "
+        "import rebuild.settings; print('rebuild.settings_models' in sys.modules, opened)"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.split() == ["False", "[]"]
+
+
+def test_unknown_attribute():
+    with pytest.raises(AttributeError):
+        settings.no_such_setting
+
+
+def test_game_settings_first_access(tmp_path, monkeypatch):
+    path = tmp_path / "settings.json"
+    path.write_text(json.dumps({"grid size": [9, 12], "mine percent": 0.15, "max fps": 30}))
+    monkeypatch.setattr(settings, "GAME_SETTINGS_PATH", str(path))
+    settings.load_game_settings.cache_clear()
+    try:
+        game_settings = settings.game_settings
+        assert game_settings.grid_size == (9, 12)
+        assert game_settings.mine_percent == 0.15
+        assert game_settings.num_mines == 16
+        assert game_settings.max_fps == 30
+        # the pattern is not in the file, so the constant is kept
+        assert game_settings.neighboring_pattern == "STANDARD"
+        assert game_settings.adjacency == settings.CLASSIC
+        path.unlink()  # the settings are only read once
+        assert settings.game_settings is game_settings
+    finally:
+        settings.load_game_settings.cache_clear()
+
+
+def test_game_settings_pattern(tmp_path, monkeypatch):
+    path = tmp_path / "settings.json"
+    path.write_text(json.dumps({"neighboring pattern": "KNIGHT"}))
+    monkeypatch.setattr(settings, "GAME_SETTINGS_PATH", str(path))
+    settings.load_game_settings.cache_clear()
+    try:
+        assert settings.game_settings.adjacency == settings.KNIGHT
+        assert settings.game_settings.grid_size == (
+            settings.MINE_FIELD_HEIGHT,
+            settings.MINE_FIELD_WIDTH,
+        )
+    finally:
+        settings.load_game_settings.cache_clear()
+
+
+def test_repo_game_settings():
+    with open(settings.GAME_SETTINGS_PATH) as f:
+        data = json.load(f)
+    settings.load_game_settings.cache_clear()
+    assert settings.game_settings.grid_size == tuple(data["grid size"])
+
+
+def test_color_pallette_first_access(tmp_path, monkeypatch):
+    pytest.importorskip("pydantic")
+    with open(settings.COLOR_PALLETTES_PATH) as f:
+        data = json.load(f)
+    data["default"]["background"] = "#123456"
+    path = tmp_path / "pallettes.json"
+    path.write_text(json.dumps(data))
+    monkeypatch.setattr(settings, "COLOR_PALLETTES_PATH", str(path))
+    settings.load_color_pallette.cache_clear()
+    try:
+        pallette = settings.color_pallette
+        assert pallette.background == "#123456"
+        path.unlink()  # the pallette is only read once
+        assert settings.color_pallette is pallette
+    finally:
+        settings.load_color_pallette.cache_clear()
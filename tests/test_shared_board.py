@@ -0,0 +1,52 @@
+import random
+
+import pytest
+
+from rebuild.interfaces.guessing import GuessConfig, GuessEngine, Strategy, view
+from rebuild.interfaces.minefield import MineField
+from rebuild.interfaces.position import Pos
+from rebuild.interfaces.shared_board import SharedBoard, SolverPool, read_field, read_rows
+from rebuild.interfaces.solver import Solver
+from rebuild.interfaces.solving_field import SolvingField
+
+
+def expert_field(seed):
+    random.seed(seed)
+    mine_field = MineField((16, 30), 99)
+    mine_field.generate(Pos(8, 15))
+    return mine_field
+
+
+def test_round_trip():
+    mine_field = expert_field(0)
+    field = SolvingField(mine_field)
+    rows = view(mine_field)
+    with SharedBoard.from_field(field, 99) as board:
+        assert read_field(board.handle).to_bytes() == field.to_bytes()
+        assert read_rows(board.handle) == rows
+    with SharedBoard.from_rows(rows, 99) as board:
+        assert read_field(board.handle).to_bytes() == field.to_bytes()
+
+
+def test_solver_pool():
+    boards = []
+    expected = []
+    for seed in range(4):
+        mine_field = expert_field(seed)
+        boards.append((SolvingField(mine_field), mine_field.num_mines))
+        solver = Solver(SolvingField(mine_field), mine_field.num_mines)
+        solver.solve()
+        expected.append((solver.field.revealed, solver.field.flagged))
+    with SolverPool(2) as pool:
+        results = pool.solve_all(boards)
+    assert [(set(revealed), set(flagged)) for revealed, flagged in results] == expected
+
+
+@pytest.mark.parametrize("strategy", list(Strategy))
+def test_guessing_workers(strategy):
+    Pos.set_bounds(3, 3)
+    rows = ("1..", "...", "...")
+    with GuessEngine(GuessConfig(strategy)) as engine:
+        expected = engine.choose(rows, 2)
+    with GuessEngine(GuessConfig(strategy, workers=2)) as engine:
+        assert engine.choose(rows, 2) == expected
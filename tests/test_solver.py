@@ -1,8 +1,16 @@
+import math
+import random
+import sys
 from pathlib import Path
 
 import pytest
 
-from rebuild.interfaces.solver import Solver
+from rebuild.interfaces import bitsets
+from rebuild.interfaces.elimination import eliminate
+from rebuild.interfaces.minefield import MineField
+from rebuild.interfaces.position import Pos
+from rebuild.interfaces.solver import GLOBAL_CONSTRAINT_THRESHOLD, STANDARD_ADJACENCY, Solver
+from rebuild.interfaces.trace import TraceLevel
 
 
 def load_data():
@@ -22,3 +30,154 @@ def test_solver(test_input, solution):
     solver.solve()
     print(solver)
     assert solver.verify()
+
+
+def test_solver_profile():
+    test_input, solution = load_data()[0]
+    solver = Solver(test_input, solution, profile=True)
+    solver.solve()
+    assert solver.verify()
+    assert solver.profiler is not None
+    phases = [record.phase for record in solver.profiler.records]
+    assert phases[:5] == [
+        "get_masks",
+        "check_subsets",
+        "check_squeezes",
+        "check_subsets",
+        "apply_basic_logic",
+    ]
+    resolved = sum(
+        record.cells_resolved
+        for record in solver.profiler.records
+        if record.phase == "apply_basic_logic"
+    )
+    assert resolved == len(solver.field.revealed) + len(solver.field.flagged)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_profiled_solve(seed):
+    results = []
+    for profile in (False, True):
+        random.seed(seed)
+        field = MineField((16, 30), 99)
+        field.generate(Pos(8, 15))
+        solver = Solver(field, profile=profile)
+        solver.solve()
+        results.append((solver.field.revealed, solver.field.flagged, solver.steps))
+    assert results[0] == results[1]
+
+
+def test_solver_trace(capsys):
+    test_input, solution = load_data()[0]
+    Solver(test_input, solution).solve()
+    assert capsys.readouterr().out == ""
+
+    solver = Solver(test_input, solution, trace=TraceLevel.STEP)
+    solver.solve()
+    out = capsys.readouterr().out
+    assert out.count("Step ") == solver.steps
+    assert f"Stopped after {solver.steps} steps" in out
+
+
+def solve_random_field(seed: int, global_threshold: float) -> tuple[set, set]:
+    random.seed(seed)
+    field = MineField((16, 16), 40)
+    field.generate(Pos(8, 8))
+    solver = Solver(field)
+    solver.global_threshold = global_threshold
+    solver.solve()
+    return solver.field.revealed, solver.field.flagged
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_global_constraint_gating(seed):
+    assert solve_random_field(seed, GLOBAL_CONSTRAINT_THRESHOLD) == solve_random_field(
+        seed, math.inf
+    )
+
+
+def test_elimination():
+    Pos.set_bounds(1, 5)
+    a, b, c, d, e = (Pos(0, i) for i in range(5))
+    # no two of these constraints decide anything, but their alternating sum is 2b = 2
+    sets = {frozenset([a, b, d]): 2, frozenset([a, c, d, e]): 2, frozenset([b, c, e]): 2}
+    solver = Solver.__new__(Solver)
+    assert not solver.check_subsets(dict(sets)) and not solver.check_squeezes(dict(sets))
+    assert eliminate(sets) == (set(), {b})
+
+    with pytest.raises(ValueError):
+        eliminate({frozenset([a, b]): 1, frozenset([b, c]): 1, frozenset([a, b, c]): 0})
+
+
+def test_bitsets():
+    Pos.set_bounds(1, 4)
+    a, b, c, d = (Pos(0, i) for i in range(4))
+    # a 1 next to a 2 squeezes the mine of the 1 into the cells they share
+    sets = {frozenset([a, b, c]): 1, frozenset([b, c, d]): 2}
+    frontier = bitsets.Frontier()
+    masks = frontier.encode(sets)
+    assert frontier.decode(masks) == sets
+    assert bitsets.check_squeezes(masks)
+    bitsets.check_subsets(masks)
+    assert frontier.decode(masks) == {frozenset([b, c]): 1, frozenset([a]): 0, frozenset([d]): 1}
+    to_reveal, to_flag = bitsets.basic_logic(masks)
+    assert frontier.cells_of(to_reveal) == {a} and frontier.cells_of(to_flag) == {d}
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_elimination_on_expert_fields(seed):
+    random.seed(seed)
+    field = MineField((16, 30), 99)
+    field.generate(Pos(8, 15))
+    solver = Solver(field)
+    solver.solve()
+    assert all(field.get_value(pos) == "M" for pos in solver.field.flagged)
+    assert all(field.get_value(pos) != "M" for pos in solver.field.revealed)
+
+
+@pytest.mark.parametrize("test_input, solution", load_data())
+def test_frontier_matrix(test_input, solution):
+    pytest.importorskip("numpy")
+    from rebuild.interfaces.frontier_matrix import build_frontier_matrix
+
+    solver = Solver(test_input, solution)
+    solver.use_global_constraint = False
+    offsets = [(pos.r, pos.c) for pos in STANDARD_ADJACENCY]
+    assert build_frontier_matrix(solver.field, offsets).to_sets() == solver.get_sets()
+
+    solver = Solver(test_input, solution, matrix=True)
+    solver.solve()
+    assert solver.verify()
+
+
+def test_endgame():
+    # the rules are stuck here, but 8 cells are safe in all 8 ways to place the last 5 mines
+    test_input = "5\n......\n..112.\n2.101.\n..111.\n......"
+    solver = Solver(test_input, None)
+    solver.endgame_threshold = 0
+    solver.solve()
+    assert not solver.field.revealed and not solver.field.flagged
+
+    solver = Solver(test_input, None)
+    solver.solve()
+    assert solver.field.revealed == {
+        Pos(0, 0),
+        Pos(0, 1),
+        Pos(0, 2),
+        Pos(0, 5),
+        Pos(3, 5),
+        Pos(4, 0),
+        Pos(4, 1),
+        Pos(4, 5),
+    }
+    assert solver.probabilities is not None
+    assert solver.probabilities.weight == 8
+    assert solver.probabilities.of(Pos(0, 4)) == 0.75
+
+
+def test_matrix_without_numpy(monkeypatch):
+    test_input, solution = load_data()[0]
+    monkeypatch.setitem(sys.modules, "numpy", None)
+    monkeypatch.delitem(sys.modules, "rebuild.interfaces.frontier_matrix", raising=False)
+    with pytest.raises(ImportError):
+        Solver(test_input, solution, matrix=True)
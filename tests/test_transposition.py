@@ -0,0 +1,89 @@
+from copy import deepcopy
+
+import pytest
+
+from solver import Budget, BudgetExceeded, Solver
+from transposition import TranspositionTable, ZobristKeys
+
+# two components, one around each column of ones, with the zeros between them
+POSITION = [
+    [".", ".", 1, 0, 0, 0, 1, ".", "."],
+    [".", ".", 1, 0, 0, 0, 1, ".", "."],
+    [".", ".", 1, 0, 0, 0, 1, ".", "."],
+]
+
+
+def component_keys(solver: Solver) -> dict[int, set]:
+    """The key of every component, along with the unknown cells it covers."""
+    return {key: set().union(*sets) for key, sets in solver.get_components()}
+
+
+def key_of(keys: dict[int, set], column: int) -> int:
+    (key,) = [key for key, cells in keys.items() if any(c == column for _, c in cells)]
+    return key
+
+
+def test_lru_eviction():
+    table: TranspositionTable[str] = TranspositionTable(max_entries=2)
+    table.put(1, "a")
+    table.put(2, "b")
+    assert table.get(1) == "a"  # 2 is now the least recently used
+    table.put(3, "c")
+    assert list(table.entries) == [1, 3]
+    assert table.get(2) is None
+
+
+def test_hits_and_misses():
+    table: TranspositionTable[str] = TranspositionTable()
+    assert table.get(1) is None
+    table.put(1, "a")
+    assert table.get(1) == "a"
+    assert table.get(1) == "a"
+    assert table.stats() == {"entries": 1, "hits": 2, "misses": 1, "hit rate": 2 / 3}
+    table.clear()
+    assert table.get(1) is None and table.misses == 2
+
+
+def test_equal_states_hash_equal():
+    zobrist = ZobristKeys()
+    numbers = {(0, 2): 1, (1, 2): 1}
+    unknowns = {(0, 1), (1, 1), (2, 1)}
+    reordered = dict(reversed(numbers.items()))
+    assert zobrist.hash(numbers, unknowns) == zobrist.hash(reordered, set(unknowns))
+    assert zobrist.hash(numbers, unknowns) != zobrist.hash({(0, 2): 1, (1, 2): 2}, unknowns)
+
+    # the same component on boards that differ elsewhere
+    other = deepcopy(POSITION)
+    other[0][8] = 1
+    keys = component_keys(Solver(2, deepcopy(POSITION), lambda *_: None))
+    other_keys = component_keys(Solver(2, other, lambda *_: None))
+    assert key_of(keys, 1) == key_of(other_keys, 1)
+    assert key_of(keys, 7) != key_of(other_keys, 7)
+
+
+def test_changed_component_misses():
+    solver = Solver(2, deepcopy(POSITION), lambda *_: None)
+    keys = component_keys(solver)
+    for key in keys:
+        solver.table.put(key, (frozenset(), frozenset()))
+
+    position = deepcopy(POSITION)
+    position[1][7] = 2  # the right component loses an unknown cell
+    solver.update_position(position)
+    new_keys = component_keys(solver)
+    assert key_of(new_keys, 1) == key_of(keys, 1)
+    assert solver.table.get(key_of(new_keys, 1)) is not None
+    assert solver.table.get(key_of(new_keys, 7)) is None
+
+
+def test_enumeration_hits_the_tallies():
+    solver = Solver(2, deepcopy(POSITION), lambda *_: None)
+    ((key, sets), _) = solver.get_components()
+    with pytest.raises(BudgetExceeded):
+        solver.enumerate_component(key, sets, Budget(max_nodes=0))
+    assert solver.tallies.stats()["entries"] == 0
+    deductions = solver.enumerate_component(key, sets, Budget())
+    # the middle of the column of ones is the only mine
+    assert deductions[1] and len(deductions[0]) == len(set().union(*sets)) - 1
+    assert solver.tallies.get(key).counts() == {1: 1}
+    assert solver.enumerate_component(key, sets, Budget(max_nodes=0)) == deductions
@@ -0,0 +1,131 @@
+import pytest
+
+from viewport import MAX_BLOCK_SIZE, ChunkCache, Viewport
+
+HUGE = (10**4, 10**4)
+SCREEN = (800, 640)
+TOP = 40  # the bar above the board
+
+
+def huge_viewport(block_size: int = 20) -> Viewport:
+    viewport = Viewport(HUGE, SCREEN, top=TOP, block_size=block_size)
+    viewport.pan(123_457, 98_765)
+    return viewport
+
+
+def test_round_trip():
+    viewport = huge_viewport()
+    rows, columns = viewport.visible_cells()
+    for pos in [(rows.start, columns.start), (rows[5], columns[7]), (rows[-1], columns[-1])]:
+        x, y = viewport.to_screen(pos)
+        assert viewport.cell_at((x, y)) == pos
+        # the far corner of the cell is still in it, and the next pixel is not
+        assert viewport.cell_at((x + 19, y + 19)) == pos
+        assert viewport.cell_at((x + 20, y + 20)) == (pos[0] + 1, pos[1] + 1)
+
+
+@pytest.mark.parametrize("factor", [1.25, 0.8, 3.0])
+def test_zoom_keeps_the_anchor(factor):
+    viewport = huge_viewport()
+    anchor = (311, 257)
+    cell = viewport.cell_at(anchor)
+    x, y = viewport.to_screen(cell)
+    fraction = (anchor[0] - x) / 20, (anchor[1] - y) / 20
+    assert viewport.zoom(factor, anchor)
+    assert viewport.cell_at(anchor) == cell
+    # the anchor stays at the same point within the cell, up to rounding
+    x, y = viewport.to_screen(cell)
+    size = viewport.block_size
+    assert abs((anchor[0] - x) / size - fraction[0]) <= 1 / size
+    assert abs((anchor[1] - y) / size - fraction[1]) <= 1 / size
+
+
+def test_zoom_at_the_limit():
+    viewport = huge_viewport(MAX_BLOCK_SIZE)
+    x, y = viewport.x, viewport.y
+    assert not viewport.zoom(2.0)
+    assert (viewport.x, viewport.y, viewport.block_size) == (x, y, MAX_BLOCK_SIZE)
+
+
+def test_clamp_at_the_edges():
+    viewport = huge_viewport()
+    viewport.pan(-(10**9), -(10**9))
+    assert (viewport.x, viewport.y) == (0, 0)
+    assert viewport.cell_at((0, TOP)) == (0, 0)
+    viewport.pan(10**9, 10**9)
+    assert (viewport.x, viewport.y) == (10**4 * 20 - 800, 10**4 * 20 - 600)
+    rows, columns = viewport.visible_cells()
+    assert (rows.stop, columns.stop) == HUGE
+    assert viewport.cell_at((799, 639)) == (10**4 - 1, 10**4 - 1)
+
+
+def test_small_boards_are_centered():
+    viewport = Viewport((9, 9), SCREEN, top=TOP, block_size=20)
+    viewport.pan(500, -500)
+    assert viewport.to_screen((0, 0)) == ((800 - 180) // 2, TOP + (600 - 180) // 2)
+    assert viewport.visible_cells() == (range(9), range(9))
+
+
+@pytest.mark.parametrize("block_size", [4, 7, 20, MAX_BLOCK_SIZE])
+def test_visible_bounds(block_size):
+    viewport = huge_viewport(block_size)
+    rows, columns = viewport.visible_cells()
+    # only the cells that are at least partially on screen, however big the board is
+    assert len(rows) <= 600 // block_size + 2
+    assert len(columns) <= 800 // block_size + 2
+    x, y = viewport.to_screen((rows.start, columns.start))
+    assert x <= 0 and y <= TOP
+    x, y = viewport.to_screen((rows[-1], columns[-1]))
+    assert x < 800 and y < 640
+    x, y = viewport.to_screen((rows.stop, columns.stop))
+    assert x >= 800 and y >= 640
+
+    chunks = set(viewport.visible_chunks())
+    assert len(chunks) <= (len(rows) // 16 + 2) * (len(columns) // 16 + 2)
+    corners = [(r, c) for r in (rows.start, rows[-1]) for c in (columns.start, columns[-1])]
+    assert {(r // 16, c // 16) for r, c in corners} <= chunks
+    assert all(rows.start // 16 <= r <= rows[-1] // 16 for r, _ in chunks)
+    assert all(columns.start // 16 <= c <= columns[-1] // 16 for _, c in chunks)
+
+
+def rendering_cache(max_chunks: int = 3) -> tuple[ChunkCache[tuple], list]:
+    rendered = []
+
+    def render(chunk, block_size):
+        rendered.append(chunk)
+        return chunk, block_size
+
+    return ChunkCache(HUGE, render, max_chunks=max_chunks), rendered
+
+
+def test_chunk_eviction_order():
+    cache, rendered = rendering_cache()
+    for chunk in [(0, 0), (0, 1), (0, 2), (0, 0)]:
+        assert cache.get(chunk, 20) == (chunk, 20)
+    assert rendered == [(0, 0), (0, 1), (0, 2)]
+    # (0, 1) is now the least recently used
+    cache.get((1, 0), 20)
+    assert list(cache.chunks) == [(0, 2), (0, 0), (1, 0)]
+    cache.get((0, 1), 20)
+    assert list(cache.chunks) == [(0, 0), (1, 0), (0, 1)]
+    assert rendered == [(0, 0), (0, 1), (0, 2), (1, 0), (0, 1)]
+
+
+def test_zooming_clears_the_chunks():
+    cache, rendered = rendering_cache()
+    cache.get((0, 0), 20)
+    assert cache.get((0, 0), 25) == ((0, 0), 25)
+    assert rendered == [(0, 0), (0, 0)]
+
+
+def test_invalidate_touched_chunks():
+    cache, rendered = rendering_cache(max_chunks=8)
+    chunks = [(0, 0), (0, 1), (1, 0), (1, 1)]
+    for chunk in chunks:
+        cache.get(chunk, 20)
+    # one cell in the middle of (0, 1) and one on the corner of (1, 1)
+    cache.invalidate([(5, 20), (16, 16)])
+    assert list(cache.chunks) == [(0, 0), (1, 0)]
+    for chunk in chunks:
+        cache.get(chunk, 20)
+    assert rendered == chunks + [(0, 1), (1, 1)]